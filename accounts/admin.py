@@ -1,3 +1,25 @@
-from django.contrib import admin
-from .models import User
-admin.site.register(User)
\ No newline at end of file
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from .email_outbox import process_outbox
+from .models import EmailOutbox, User
+
+admin.site.register(User)
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "to_email", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status", "kind")
+    search_fields = ("to_email",)
+    # params (lien de réinitialisation = jeton valide) jamais affiché ni éditable
+    exclude = ("params",)
+    readonly_fields = ("kind", "to_email", "attempts", "last_error", "created_at", "sent_at")
+    actions = ["resend"]
+
+    @admin.action(description="Renvoyer les emails en attente")
+    def resend(self, request, queryset):
+        # 'failed' / 'sent' : params vidés, plus rien à envoyer (l'utilisateur refait une demande)
+        queryset.filter(status="pending").update(next_attempt_at=timezone.now(), attempts=0)
+        n = process_outbox()
+        messages.success(request, f"{n} email(s) envoyé(s).")
@@ -0,0 +1,35 @@
+# accounts/async_views.py
+# Variante async (ASYNC_VIEWS, mode ASGI) du mot de passe oublié.
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse
+
+from formaflix.throttling import athrottle
+from .models import normalize_email_key
+from .password_reset import NEUTRAL_RESET_DETAIL
+from .tasks import send_password_reset
+
+
+async def forgot_password(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    # même seau (par IP) que ForgotPasswordView
+    throttled = await athrottle(request, "password_reset")
+    if throttled:
+        return throttled
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "invalid json"}, status=400)
+    email = (data.get("email") or "").strip()
+    if not email:
+        return JsonResponse({"detail": "email is required"}, status=400)
+
+    # même chemin que ForgotPasswordView : un job par demande, recherche du compte dans le worker
+    await sync_to_async(send_password_reset.enqueue)(normalize_email_key(email))
+    # Réponse neutre, compte existant ou non
+    return JsonResponse({"detail": NEUTRAL_RESET_DETAIL})
+
+
+forgot_password.csrf_exempt = True
@@ -4,6 +4,8 @@ from rest_framework import serializers
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from .models import normalize_email_key
+
 User = get_user_model()
 
 class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -27,7 +29,7 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
             raise serializers.ValidationError({"detail": "email and password required"})
 
         try:
-            user = User.objects.get(email__iexact=email)
+            user = User.objects.only(self.username_field).get(email_normalized=normalize_email_key(email))
         except User.DoesNotExist:
             # même message que SimpleJWT pour rester neutre
             raise serializers.ValidationError({"detail": "No active account found with the given credentials"})
@@ -45,6 +47,8 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['email']      = user.email
         token['first_name'] = user.first_name
         token['last_name']  = user.last_name
+        # TokenUser (endpoints sans requête SQL) : en-tête Server-Timing du staff
+        token['is_staff']   = user.is_staff
         return token
 
 
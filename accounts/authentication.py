@@ -0,0 +1,160 @@
+# accounts/authentication.py
+import copy
+import time
+from functools import wraps
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+# durée de vie de l'utilisateur en cache (cache partagé uniquement, cf. shared_cache)
+AUTH_USER_CACHE_TTL = 60
+
+
+def shared_cache() -> bool:
+    """
+    Cache vu par tous les workers (Redis…). Sinon (LocMem, Dummy) ni le cache d'utilisateur
+    ni le marqueur de révocation ne peuvent être invalidés ailleurs que dans le process courant :
+    les deux authentifications relisent alors l'utilisateur en base, comme JWTAuthentication.
+    """
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def _user_key(user_id) -> str:
+    return f"auth:user:{user_id}"
+
+
+def _revoked_key(user_id) -> str:
+    return f"auth:revoked:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+def revoke_tokens_before_now(user_id):
+    """
+    Mot de passe changé / compte désactivé : les access tokens émis avant maintenant sont refusés
+    par l'authentification sans état (le marqueur vit aussi longtemps qu'un access token).
+    """
+    lifetime = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    cache.set(_revoked_key(user_id), int(time.time()), lifetime)
+    invalidate_cached_user(user_id)
+
+
+def _cacheable(user):
+    # copie sans le hash du mot de passe : champ différé, relu en base si jamais utilisé
+    user = copy.copy(user)
+    user.__dict__.pop("password", None)
+    return user
+
+
+def _check_not_revoked(validated_token):
+    revoked_at = cache.get(_revoked_key(validated_token[api_settings.USER_ID_CLAIM]))
+    if revoked_at and int(validated_token.get("iat", 0)) < revoked_at:
+        raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication avec chargement de l'utilisateur mis en cache (AUTH_USER_CACHE_TTL).
+    Authentification par défaut : request.user reste un vrai User.
+    """
+
+    def get_user(self, validated_token):
+        _check_not_revoked(validated_token)
+        if not shared_cache():
+            return super().get_user(validated_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        key = _user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, _cacheable(user), AUTH_USER_CACHE_TTL)
+        return user
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Aucune requête SQL : request.user est un TokenUser construit depuis les claims.
+    Réservé aux endpoints qui n'ont besoin que de l'id (heartbeat, lectures) ;
+    ils filtrent donc par user_id=request.user.id, jamais par user=request.user.
+    Sans cache partagé, la révocation ne serait pas vue : User relu en base (is_active compris).
+    """
+
+    def get_user(self, validated_token):
+        if not shared_cache():
+            return JWTAuthentication.get_user(self, validated_token)
+        user = super().get_user(validated_token)
+        _check_not_revoked(validated_token)
+        return user
+
+
+# ---- vues Django async (mode ASGI) : DRF n'y passe pas, même contrôle du JWT à la main ----
+
+async def aauthenticate(request, stateless: bool = False):
+    """
+    Équivalent async de Cached/StatelessJWTAuthentication.
+    Retourne un User (ou un TokenUser si stateless) ; None si pas de token ou token refusé.
+    """
+    auth = StatelessJWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header else None
+    if raw is None:
+        return None
+    return await aauthenticate_token(raw, stateless=stateless)
+
+
+async def aauthenticate_token(raw, stateless: bool = False):
+    """Valide un access token brut (en-tête, ou 1re trame du WebSocket de progression)."""
+    auth = StatelessJWTAuthentication()
+    try:
+        token = auth.get_validated_token(raw)
+        user_id = token[api_settings.USER_ID_CLAIM]
+    except (InvalidToken, TokenError, KeyError):
+        return None
+
+    revoked_at = await cache.aget(_revoked_key(user_id))
+    if revoked_at and int(token.get("iat", 0)) < revoked_at:
+        return None
+    shared = shared_cache()
+    if stateless and shared:
+        return api_settings.TOKEN_USER_CLASS(token)
+
+    key = _user_key(user_id)
+    user = await cache.aget(key) if shared else None
+    if user is None:
+        user = await get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}, is_active=True
+        ).afirst()
+        if user is None:
+            return None
+        if shared:
+            await cache.aset(key, _cacheable(user), AUTH_USER_CACHE_TTL)
+    return user
+
+
+def async_jwt_required(methods: tuple[str, ...], stateless: bool = False):
+    """
+    Décorateur de vue async : méthodes autorisées, puis request.user authentifié par JWT (401 sinon).
+    Pas de CSRF : API à jeton, comme les vues DRF.
+    """
+    def deco(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return HttpResponseNotAllowed(methods)
+            user = await aauthenticate(request, stateless=stateless)
+            if user is None:
+                return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        wrapper.csrf_exempt = True
+        return wrapper
+    return deco
@@ -0,0 +1,206 @@
+# accounts/email_outbox.py
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from formaflix.timing import timed
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+BREVO_API_URL = "https://api.brevo.com/v3/smtp/email"
+# nombre de destinataires par appel Brevo (messageVersions, max 2000 côté API)
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+# appels API par seconde au maximum (par process)
+EMAIL_RATE_PER_SECOND = float(os.getenv("EMAIL_OUTBOX_RATE", "5"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+EMAIL_BACKOFF_BASE = 30  # secondes : 30, 60, 120, 240…
+EMAIL_BACKOFF_MAX = 3600
+# un envoi 'sending' sans nouvelles depuis ce délai = process mort → on le remet en file
+EMAIL_STALE_MINUTES = 10
+# lignes 'sent' / 'failed' supprimées après ce délai (params déjà vidés, cf. _finish)
+EMAIL_RETENTION_DAYS = int(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", "30"))
+
+TEMPLATES = {
+    "password_reset": {
+        "subject": "Réinitialisation de ton mot de passe - SBeautyflix",
+        "html": """
+            <html>
+              <body>
+                <p>Bonjour,</p>
+                <p>Tu as demandé à réinitialiser ton mot de passe SBeautyflix.</p>
+                <p>
+                  👉 Clique sur ce lien pour définir un nouveau mot de passe :<br/>
+                  <a href="{{ params.reset_link }}">{{ params.reset_link }}</a>
+                </p>
+                <p>Si tu n'es pas à l'origine de cette demande, tu peux ignorer cet email.</p>
+              </body>
+            </html>
+        """,
+    },
+}
+
+
+class PermanentEmailError(Exception):
+    """Refus définitif de Brevo (4xx hors 429) : inutile de réessayer."""
+
+
+_session = None
+_session_lock = threading.Lock()
+# un seul worker d'envoi par process : le débit reste sous EMAIL_RATE_PER_SECOND
+_process_lock = threading.Lock()
+
+
+def _brevo_session() -> requests.Session:
+    """Session HTTP partagée : connexions TLS réutilisées d'un envoi à l'autre."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            s.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+            s.headers.update({"Content-Type": "application/json", "accept": "application/json"})
+            _session = s
+        return _session
+
+
+def enqueue_email(kind: str, to_email: str, params: dict) -> EmailOutbox:
+    """
+    Met l'email en file et rend la main ; l'envoi est fait par un worker (jobs).
+    """
+    from .tasks import process_email_outbox
+    if kind not in TEMPLATES:
+        raise ValueError(f"gabarit email inconnu: {kind}")
+    row = EmailOutbox.objects.create(kind=kind, to_email=to_email, params=params)
+    process_email_outbox.enqueue()
+    return row
+
+
+def _send_batch(kind: str, rows: list[EmailOutbox]):
+    api_key = os.getenv("BREVO_API_KEY")
+    if not api_key:
+        raise RuntimeError("BREVO_API_KEY manquant")
+    tpl = TEMPLATES[kind]
+    payload = {
+        "sender": {"name": "SBeautyflix", "email": getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@sbeautyflix.com")},
+        "subject": tpl["subject"],
+        "htmlContent": tpl["html"],
+        # une version par destinataire : un seul appel API pour tout le lot
+        "messageVersions": [{"to": [{"email": r.to_email}], "params": r.params} for r in rows],
+    }
+    with timed("brevo"):
+        r = _brevo_session().post(BREVO_API_URL, json=payload, headers={"api-key": api_key}, timeout=10)
+    if 400 <= r.status_code < 500 and r.status_code != 429:
+        raise PermanentEmailError(f"{r.status_code} {r.text[:500]}")
+    r.raise_for_status()
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(EMAIL_BACKOFF_BASE * 2 ** max(attempts - 1, 0), EMAIL_BACKOFF_MAX))
+
+
+def _claim_batch(kind: str, limit: int) -> list[EmailOutbox]:
+    now = timezone.now()
+    ids = list(EmailOutbox.objects
+               .filter(kind=kind, status="pending", next_attempt_at__lte=now)
+               .order_by("next_attempt_at", "pk")
+               .values_list("pk", flat=True)[:limit])
+    if not ids:
+        return []
+    # UPDATE conditionnel : un autre worker peut avoir pris une partie du lot
+    EmailOutbox.objects.filter(pk__in=ids, status="pending").update(
+        status="sending", attempts=F("attempts") + 1, next_attempt_at=now
+    )
+    return list(EmailOutbox.objects.filter(pk__in=ids, status="sending", next_attempt_at=now))
+
+
+def requeue_stale_emails() -> int:
+    limit = timezone.now() - timedelta(minutes=EMAIL_STALE_MINUTES)
+    return EmailOutbox.objects.filter(status="sending", next_attempt_at__lt=limit).update(status="pending")
+
+
+def _mark_failed(rows: list[EmailOutbox], error: Exception, permanent: bool):
+    logger.warning("email batch %s (%d) failed: %s", rows[0].kind, len(rows), error)
+    for r in rows:
+        if not permanent and r.attempts < EMAIL_MAX_ATTEMPTS:
+            EmailOutbox.objects.filter(pk=r.pk).update(
+                status="pending",
+                next_attempt_at=timezone.now() + _backoff(r.attempts),
+                last_error=str(error)[:2000],
+            )
+        else:
+            _finish([r.pk], status="failed", last_error=str(error)[:2000])
+
+
+def _finish(pks: list[int], **fields):
+    """
+    Ligne terminée ('sent' / 'failed') : params vidés. Ils portent le lien de réinitialisation,
+    un jeton valable PASSWORD_RESET_TIMEOUT — inutile de le garder en base une fois traité.
+    """
+    EmailOutbox.objects.filter(pk__in=pks).update(params={}, **fields)
+
+
+def purge_outbox(days: int = EMAIL_RETENTION_DAYS) -> int:
+    """Supprime les lignes terminées de plus de `days` jours ; retourne le nombre supprimé."""
+    limit = timezone.now() - timedelta(days=days)
+    deleted, _ = (EmailOutbox.objects
+                  .filter(status__in=("sent", "failed"), created_at__lt=limit)
+                  .delete())
+    return deleted
+
+
+def process_outbox(max_batches: int = 100) -> int:
+    """
+    Envoie les emails dus, par lots de EMAIL_BATCH_SIZE, à EMAIL_RATE_PER_SECOND appels/s au plus.
+    Échec temporaire (réseau, 429, 5xx) → nouvel essai avec backoff exponentiel ;
+    refus définitif ou EMAIL_MAX_ATTEMPTS atteint → 'failed'. Retourne le nombre d'emails envoyés.
+    """
+    if not _process_lock.acquire(blocking=False):
+        return 0  # un autre thread du process vide déjà la file
+    sent = 0
+    min_interval = 1.0 / EMAIL_RATE_PER_SECOND if EMAIL_RATE_PER_SECOND > 0 else 0
+    last_call = 0.0
+    try:
+        requeue_stale_emails()
+        for _ in range(max_batches):
+            progressed = False
+            for kind in TEMPLATES:
+                rows = _claim_batch(kind, EMAIL_BATCH_SIZE)
+                if not rows:
+                    continue
+                progressed = True
+                # lot refusé en bloc (ex: une adresse invalide) → on retente chaque email seul
+                groups = [rows]
+                while groups:
+                    group = groups.pop(0)
+                    wait = min_interval - (time.monotonic() - last_call)
+                    if wait > 0:
+                        time.sleep(wait)
+                    last_call = time.monotonic()
+                    try:
+                        _send_batch(kind, group)
+                    except PermanentEmailError as e:
+                        if len(group) > 1:
+                            groups.extend([r] for r in group)
+                            continue
+                        _mark_failed(group, e, permanent=True)
+                        continue
+                    except Exception as e:
+                        _mark_failed(group, e, permanent=False)
+                        continue
+                    _finish([r.pk for r in group], status="sent", sent_at=timezone.now(), last_error="")
+                    sent += len(group)
+            if not progressed:
+                break
+    finally:
+        _process_lock.release()
+    return sent
@@ -0,0 +1,23 @@
+# accounts/management/commands/process_email_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.email_outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails en attente de l'outbox (lots, débit limité, backoff)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu.")
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **opts):
+        while True:
+            n = process_outbox()
+            if n:
+                self.stdout.write(self.style.SUCCESS(f"{n} email(s) envoyé(s)"))
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
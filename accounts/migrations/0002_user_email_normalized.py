@@ -0,0 +1,43 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:07
+
+from django.db import migrations, models
+
+
+def backfill_email_normalized(apps, schema_editor):
+    # une seule ligne par email normalisé : le compte le plus ancien garde la clé,
+    # les doublons éventuels restent à NULL (ils n'étaient déjà pas trouvables par email__iexact.get)
+    User = apps.get_model("accounts", "User")
+    seen, batch = set(), []
+    for user in User.objects.order_by("id").only("id", "email").iterator(chunk_size=2000):
+        key = (user.email or "").strip().lower() or None
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        user.email_normalized = key
+        batch.append(user)
+        if len(batch) >= 1000:
+            User.objects.bulk_update(batch, ["email_normalized"])
+            batch = []
+    if batch:
+        User.objects.bulk_update(batch, ["email_normalized"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=254, null=True),
+        ),
+        migrations.RunPython(backfill_email_normalized, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='email_normalized',
+            field=models.CharField(blank=True, editable=False, max_length=254, null=True, unique=True),
+        ),
+    ]
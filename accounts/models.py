@@ -1,5 +1,85 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from django.core.exceptions import ValidationError
+from django.db import models
+
+
+def normalize_email_key(email: str | None) -> str | None:
+    """Clé de recherche email : minuscules, sans espaces ; None si vide (pas de conflit d'unicité)."""
+    email = (email or "").strip().lower()
+    return email or None
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # update() ne passe pas par post_save : révocation des access tokens faite ici
+        if "password" not in kwargs and "is_active" not in kwargs:
+            return super().update(**kwargs)
+        from .authentication import revoke_tokens_before_now
+        ids = list(self.values_list("pk", flat=True))
+        updated = super().update(**kwargs)
+        for pk in ids:
+            revoke_tokens_before_now(pk)
+        return updated
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
 
 class User(AbstractUser):
     # extensible: avatar, entreprise, etc.
-    pass
\ No newline at end of file
+
+    objects = UserManager()
+
+    # email en minuscules, indexé (unique) : login / mot de passe oublié sans UPPER(email) ni scan
+    email_normalized = models.CharField(max_length=254, unique=True, null=True, blank=True, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_auth_state()
+        return instance
+
+    def remember_auth_state(self):
+        # état chargé : sert à détecter changement de mot de passe / désactivation (cache d'auth JWT)
+        self._auth_state = (self.__dict__.get("password"), self.__dict__.get("is_active"))
+
+    def auth_state_changed(self) -> bool:
+        loaded = getattr(self, "_auth_state", None)
+        if not loaded or None in loaded:
+            return False
+        return loaded != (self.__dict__.get("password"), self.__dict__.get("is_active"))
+
+    def clean(self):
+        super().clean()
+        key = normalize_email_key(self.email)
+        if key and User.objects.filter(email_normalized=key).exclude(pk=self.pk).exists():
+            raise ValidationError({"email": "Un compte existe déjà avec cet email."})
+
+    def save(self, *args, **kwargs):
+        self.email_normalized = normalize_email_key(self.email)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "email" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "email_normalized"}
+        super().save(*args, **kwargs)
+
+
+class EmailOutbox(models.Model):
+    """Email transactionnel en attente d'envoi (worker : accounts.email_outbox.process_outbox)."""
+    STATUS = [("pending", "pending"), ("sending", "sending"), ("sent", "sent"), ("failed", "failed")]
+
+    kind = models.CharField(max_length=50)  # gabarit, voir email_outbox.TEMPLATES
+    to_email = models.EmailField()
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="emailoutbox_due_idx")]
+
+    def __str__(self):
+        return f"{self.kind} → {self.to_email} ({self.status})"
@@ -1,6 +1,5 @@
 # accounts/password_reset.py
 import os
-import requests
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -12,53 +11,31 @@ from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from formaflix.throttling import TokenBucketThrottle
+from .models import normalize_email_key
+from .tasks import send_password_reset
+
 User = get_user_model()
 
 
-def send_brevo_reset_email(to_email: str, reset_link: str):
-    """
-    Envoi de l'email via l'API HTTP Brevo (pas SMTP).
-    """
-    api_key = os.getenv("BREVO_API_KEY")
-    if not api_key:
-        raise RuntimeError("BREVO_API_KEY manquant")
-
-    sender_email = getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@sbeautyflix.com")
-
-    payload = {
-        "sender": {"name": "SBeautyflix", "email": sender_email},
-        "to": [{"email": to_email}],
-        "subject": "Réinitialisation de ton mot de passe - SBeautyflix",
-        "htmlContent": f"""
-            <html>
-              <body>
-                <p>Bonjour,</p>
-                <p>Tu as demandé à réinitialiser ton mot de passe SBeautyflix.</p>
-                <p>
-                  👉 Clique sur ce lien pour définir un nouveau mot de passe :<br/>
-                  <a href="{reset_link}">{reset_link}</a>
-                </p>
-                <p>Si tu n'es pas à l'origine de cette demande, tu peux ignorer cet email.</p>
-              </body>
-            </html>
-        """,
-    }
-
-    r = requests.post(
-        "https://api.brevo.com/v3/smtp/email",
-        json=payload,
-        headers={
-            "api-key": api_key,
-            "Content-Type": "application/json",
-            "accept": "application/json",
-        },
-        timeout=10,
-    )
-    r.raise_for_status()  # lèvera une exception si Brevo répond 4xx / 5xx
+NEUTRAL_RESET_DETAIL = "If an account exists, an email has been sent."
+
+
+def build_reset_link(user) -> str:
+    uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
+    token = default_token_generator.make_token(user)
+
+    frontend_base = getattr(settings, "FRONTEND_URL", None) \
+                    or os.getenv("FRONTEND_BASE_URL", "").strip() \
+                    or "https://formaflix.vercel.app"
+
+    return f"{frontend_base}/reset-password?uid={uidb64}&token={token}"
 
 
 class ForgotPasswordView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "password_reset"
 
     def post(self, request):
         email = (request.data.get("email") or "").strip()
@@ -68,41 +45,13 @@ class ForgotPasswordView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        qs = User.objects.filter(email__iexact=email, is_active=True)
-
-        if not qs.exists():
-            # Réponse neutre
-            return Response(
-                {"detail": "If an account exists, an email has been sent."},
-                status=status.HTTP_200_OK,
-            )
-
-        user = qs.order_by("id").first()
-
-        uidb64 = urlsafe_base64_encode(force_bytes(user.pk))
-        token = default_token_generator.make_token(user)
-
-        frontend_base = getattr(settings, "FRONTEND_URL", None) \
-                        or os.getenv("FRONTEND_BASE_URL", "").strip() \
-                        or "https://formaflix.vercel.app"
-
-        reset_link = f"{frontend_base}/reset-password?uid={uidb64}&token={token}"
-
-        # 🔥 ICI on utilise l’API Brevo au lieu du SMTP Django
-        try:
-            send_brevo_reset_email(email, reset_link)
-        except Exception as e:
-            import logging, traceback
-            logging.exception("BREVO RESET EMAIL ERROR")
-            traceback.print_exc()
-            # On renvoie quand même 200 pour ne pas exposer l'erreur aux utilisateurs
-            return Response(
-                {"detail": "If an account exists, an email has been sent."},
-                status=status.HTTP_200_OK,
-            )
+        # 📬 un job par demande, compte existant ou non : recherche, lien et envoi Brevo hors requête
+        # (accounts.tasks.send_password_reset) → même travail, donc même temps de réponse
+        send_password_reset.enqueue(normalize_email_key(email))
 
+        # Réponse neutre
         return Response(
-            {"detail": "If an account exists, an email has been sent."},
+            {"detail": NEUTRAL_RESET_DETAIL},
             status=status.HTTP_200_OK,
         )
 
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import User
+from .models import User, normalize_email_key
 
 class RegisterSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(max_length=150)
@@ -10,6 +10,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         model  = User
         fields = ["username", "email", "first_name", "last_name", "password"]
 
+    def validate_email(self, value):
+        key = normalize_email_key(value)
+        if key and User.objects.filter(email_normalized=key).exists():
+            raise serializers.ValidationError("Un compte existe déjà avec cet email.")
+        return value
+
     def create(self, validated_data):
         return User.objects.create_user(
             username   = validated_data["username"],
@@ -0,0 +1,21 @@
+# accounts/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user, revoke_tokens_before_now
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def refresh_auth_cache(sender, instance, created, **kwargs):
+    if not created:
+        if instance.auth_state_changed():
+            revoke_tokens_before_now(instance.pk)
+        else:
+            invalidate_cached_user(instance.pk)
+    instance.remember_auth_state()
+
+
+@receiver(post_delete, sender=User)
+def drop_auth_cache(sender, instance, **kwargs):
+    revoke_tokens_before_now(instance.pk)
@@ -0,0 +1,27 @@
+# accounts/tasks.py
+from datetime import timedelta
+
+from jobs.registry import task
+from .email_outbox import enqueue_email, process_outbox, purge_outbox
+
+
+@task(every=timedelta(minutes=1), priority=5)
+def process_email_outbox():
+    # périodique : les nouveaux essais (backoff) sont repris sans nouvelle mise en file
+    process_outbox()
+
+
+@task(every=timedelta(days=1), priority=-10)
+def purge_email_outbox():
+    purge_outbox()
+
+
+@task(unique=True, priority=5)
+def send_password_reset(email_key: str):
+    # recherche du compte hors requête : la réponse de l'API ne dépend pas de son existence
+    from django.contrib.auth import get_user_model
+    from .password_reset import build_reset_link
+
+    user = get_user_model().objects.filter(email_normalized=email_key, is_active=True).first()
+    if user is not None:
+        enqueue_email("password_reset", user.email, {"reset_link": build_reset_link(user)})
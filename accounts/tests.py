@@ -1,3 +1,63 @@
-from django.test import TestCase
+# accounts/tests.py
+# Mot de passe oublié : même travail en requête (un job) que le compte existe ou non ;
+# recherche du compte et mise en file de l'email dans le worker ; seau par IP, en sync comme en async.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
 
-# Create your tests here.
+from jobs.models import Job
+from .async_views import forgot_password
+from .models import EmailOutbox
+from .tasks import send_password_reset
+
+
+class ForgotPasswordTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.create_user(username="known", email="Known@Example.com", password="x")
+
+    def setUp(self):
+        cache.clear()  # seaux du throttle
+
+    def _forgot(self, email):
+        r = self.client.post("/api/auth/password/forgot/", {"email": email},
+                             content_type="application/json", secure=True)
+        self.assertEqual(r.status_code, 200)
+        return r.json()
+
+    def test_same_request_work_for_known_and_unknown(self):
+        for email in (" KNOWN@example.com", "nobody@example.com"):
+            with self.subTest(email=email):
+                Job.objects.all().delete()
+                self.assertEqual(self._forgot(email), {"detail": "If an account exists, an email has been sent."})
+                self.assertEqual(list(Job.objects.values_list("name", "args")),
+                                 [("accounts.tasks.send_password_reset", [email.strip().lower()])])
+                self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_worker_looks_up_the_account(self):
+        send_password_reset("nobody@example.com")
+        self.assertFalse(EmailOutbox.objects.exists())
+        send_password_reset("known@example.com")
+        outbox = EmailOutbox.objects.get()
+        self.assertEqual((outbox.kind, outbox.to_email), ("password_reset", "Known@example.com"))
+        self.assertIn("/reset-password?uid=", outbox.params["reset_link"])
+
+    def test_throttled_per_ip(self):
+        for _ in range(3):
+            self._forgot("nobody@example.com")
+        r = self.client.post("/api/auth/password/forgot/", {"email": "nobody@example.com"},
+                             content_type="application/json", secure=True)
+        self.assertEqual(r.status_code, 429)
+        self.assertIn("Retry-After", r.headers)
+
+    def test_async_view_shares_the_bucket(self):
+        self._forgot("nobody@example.com")
+        factory = RequestFactory()
+        statuses = []
+        for _ in range(3):
+            request = factory.post("/api/auth/password/forgot/", data=b'{"email": "nobody@example.com"}',
+                                   content_type="application/json")
+            statuses.append(async_to_sync(forgot_password)(request).status_code)
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(Job.objects.filter(name="accounts.tasks.send_password_reset").count(), 1)
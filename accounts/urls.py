@@ -1,10 +1,15 @@
 # accounts/urls.py
+from django.conf import settings
 from django.urls import path
 from .views import RegisterView
 from .password_reset import ForgotPasswordView, ResetPasswordView
 from .auth import EmailTokenObtainPairView
 from rest_framework_simplejwt.views import TokenRefreshView
 
+forgot_password_view = ForgotPasswordView.as_view()
+if settings.ASYNC_VIEWS:
+    from .async_views import forgot_password as forgot_password_view  # noqa: F811
+
 urlpatterns = [
     # Auth existante
     path("register/", RegisterView.as_view(), name="register"),
@@ -12,6 +17,6 @@ urlpatterns = [
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 
     # Mot de passe oublié / reset
-    path("password/forgot/", ForgotPasswordView.as_view(), name="password_forgot"),
+    path("password/forgot/", forgot_password_view, name="password_forgot"),
     path("password/reset/", ResetPasswordView.as_view(), name="password_reset"),
 ]
\ No newline at end of file
@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.contrib import admin, messages
 
 from learning.services.cloudflare_stream import create_from_url
+from learning.services.stream_ingest import enqueue_trailer_upload, supersede_trailer_uploads
+from learning.services.stream_sync import reconcile_stream_assets, sync_local_durations
+from learning.tasks import process_stream_uploads
+from payments.tasks import sync_course_price
 from .models import Course, Category
+from .tasks import generate_image_variants
 from learning.models import Lesson, Document
 
 class LessonInline(admin.TabularInline):
@@ -31,19 +37,96 @@ class CourseAdmin(admin.ModelAdmin):
     fields = (
         "title","slug","synopsis","description",
         "thumbnail","hero_banner","trailer_file","trailer_url",
+        # ↓ suivi Stream de la bande-annonce
+        "trailer_cf_uid","trailer_cf_playback_id","trailer_cf_ready",
         "price_cents","currency","categories","is_active",
         # ↓ nouveaux champs Home
         "is_editor_pick","editor_pick_weight",
         "is_full_pack","pack_weight",
         "top10_rank",
     )
+    readonly_fields = ("trailer_cf_uid", "trailer_cf_playback_id", "trailer_cf_ready")
     inlines = [LessonInline, DocumentInline]
+    actions = ["send_trailer_to_stream", "refresh_trailer_status"]
+
+    def _ingest_trailer(self, request, course) -> str:
+        """
+        Démarre l'ingestion Stream de la bande-annonce :
+        fichier local → file d'envoi TUS ; URL externe → copie Cloudflare.
+        Retourne "queued", "copy" ou "" (rien à envoyer).
+        """
+        if course.trailer_file:
+            enqueue_trailer_upload(course)
+            return "queued"
+        if course.trailer_url:
+            if settings.DEBUG and ("127.0.0.1" in course.trailer_url or "localhost" in course.trailer_url):
+                messages.warning(request, f"[{course}] URL locale non joignable par Cloudflare.")
+                return ""
+            res = create_from_url(course.trailer_url, meta={"kind": "trailer", "course_id": course.id},
+                                  require_signed=False)
+            Course.objects.filter(pk=course.pk).update(
+                trailer_cf_uid=res["uid"], trailer_cf_playback_id="", trailer_cf_ready=False
+            )
+            return "copy"
+        return ""
+
+    @admin.action(description="Envoyer la bande-annonce vers Cloudflare Stream")
+    def send_trailer_to_stream(self, request, queryset):
+        started = queued = 0
+        for course in queryset:
+            if course.trailer_cf_uid:
+                messages.warning(request, f"[{course}] bande-annonce déjà envoyée (uid={course.trailer_cf_uid}).")
+                continue
+            try:
+                mode = self._ingest_trailer(request, course)
+            except Exception as e:
+                messages.error(request, f"[{course}] envoi bande-annonce échoué: {e}")
+                continue
+            if not mode:
+                messages.warning(request, f"[{course}] aucune bande-annonce (trailer_file / trailer_url).")
+            started += 1 if mode else 0
+            queued += 1 if mode == "queued" else 0
+        if queued:
+            process_stream_uploads.enqueue()
+        if started:
+            messages.success(request, f"Ingestion bande-annonce démarrée pour {started} cours.")
+
+    @admin.action(description="Rafraîchir statut Cloudflare de la bande-annonce")
+    def refresh_trailer_status(self, request, queryset):
+        try:
+            stats = reconcile_stream_assets(lessons=Lesson.objects.none(), courses=queryset)
+        except Exception as e:
+            messages.error(request, f"refresh échec: {e}")
+            return
+        messages.success(request, f"Statut mis à jour pour {stats['courses_updated']} bande(s)-annonce.")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Product / Price Stripe resynchronisés hors requête (utilisés tels quels au checkout)
+        if {"title", "price_cents", "currency"} & set(form.changed_data):
+            sync_course_price.enqueue(obj.pk)
+        # vignette / bannière : déclinaisons responsive générées hors requête (Pillow)
+        if {"thumbnail", "hero_banner"} & set(form.changed_data):
+            generate_image_variants.enqueue(obj.pk)
+        # nouvelle source de bande-annonce → on repart sur un nouvel asset Stream
+        # (get_trailer_src bascule seul sur Stream dès que trailer_cf_ready passe à True)
+        if "trailer_file" in form.changed_data or "trailer_url" in form.changed_data:
+            Course.objects.filter(pk=obj.pk).update(trailer_cf_uid="", trailer_cf_playback_id="", trailer_cf_ready=False)
+            obj.trailer_cf_uid = ""
+            supersede_trailer_uploads(obj)
+            try:
+                if self._ingest_trailer(request, obj) == "queued":
+                    process_stream_uploads.enqueue()
+                    messages.success(request, "Bande-annonce mise en file d'envoi vers Stream.")
+            except Exception as e:
+                messages.error(request, f"Echec envoi bande-annonce Cloudflare: {e}")
 
     def save_formset(self, request, form, formset, change):
         instances = formset.save()
         super().save_formset(request, form, formset, change)
 
         if formset.model is Lesson:
+            sync_local_durations(Lesson.objects.filter(pk__in=[i.pk for i in instances]))
             created = 0
             for inst in instances:
                 if inst.cf_uid:
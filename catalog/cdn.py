@@ -0,0 +1,152 @@
+# catalog/cdn.py
+# Cache CDN des réponses publiques du catalogue : Cache-Control / Surrogate-Control + Surrogate-Key,
+# purge par clé (backend enfichable) après commit des modifications (admin, leçons, état Stream).
+#
+# Clés : "catalog" (toutes les réponses du catalogue), "courses" (liste), "home" (rails),
+# "course-<id>" (détail d'un cours). Les listes ne portent pas les ids : toute modification
+# d'un cours visible en carte purge de toute façon "courses" et "home".
+from functools import partial
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.module_loading import import_string
+
+CATALOG_KEY = "catalog"
+LIST_KEY = "courses"
+HOME_KEY = "home"
+
+DEFAULTS = {
+    "BACKEND": "catalog.cdn.NullPurgeBackend",
+    "OPTIONS": {},
+    "BROWSER_TTL": 60,
+    "EDGE_TTL": 600,
+    "STALE_TTL": 300,
+}
+
+
+def course_key(course_id) -> str:
+    return f"course-{course_id}"
+
+
+def cdn_settings() -> dict:
+    return {**DEFAULTS, **getattr(settings, "CDN_CACHE", {})}
+
+
+class PurgeBackend:
+    enabled = True
+    synchronous = False  # True : purge directe au commit, sans passer par la file de jobs
+
+    def __init__(self, **options):
+        self.options = options
+
+    def headers(self, keys: list[str], edge: str) -> dict:
+        """En-têtes propres au CDN, ajoutés aux réponses publiques."""
+        return {}
+
+    def purge(self, keys: list[str]) -> None:
+        raise NotImplementedError
+
+
+class NullPurgeBackend(PurgeBackend):
+    """Pas de CDN configuré : en-têtes posés quand même, aucune purge (expiration par EDGE_TTL)."""
+    enabled = False
+
+    def purge(self, keys):
+        pass
+
+
+class RecordingPurgeBackend(PurgeBackend):
+    """Tests / dev : garde les clés purgées en mémoire (process courant)."""
+    synchronous = True
+    purged: list[list[str]] = []
+
+    def purge(self, keys):
+        RecordingPurgeBackend.purged.append(list(keys))
+
+    @classmethod
+    def reset(cls):
+        cls.purged.clear()
+
+
+class FastlyPurgeBackend(PurgeBackend):
+    """Purge douce par Surrogate-Key (OPTIONS : service_id, api_token)."""
+    MAX_KEYS = 256
+
+    def purge(self, keys):
+        url = f"https://api.fastly.com/service/{self.options['service_id']}/purge"
+        for i in range(0, len(keys), self.MAX_KEYS):
+            r = requests.post(url, headers={
+                "Fastly-Key": self.options["api_token"],
+                "Fastly-Soft-Purge": "1",
+                "Surrogate-Key": " ".join(keys[i:i + self.MAX_KEYS]),
+            }, timeout=10)
+            r.raise_for_status()
+
+
+class CloudflarePurgeBackend(PurgeBackend):
+    """Purge par Cache-Tag (OPTIONS : zone_id, api_token)."""
+    MAX_KEYS = 30
+
+    def headers(self, keys, edge):
+        # Cloudflare ignore Surrogate-* : mêmes clés et même TTL sous ses propres en-têtes
+        return {"Cache-Tag": ",".join(keys), "CDN-Cache-Control": edge}
+
+    def purge(self, keys):
+        url = f"https://api.cloudflare.com/client/v4/zones/{self.options['zone_id']}/purge_cache"
+        for i in range(0, len(keys), self.MAX_KEYS):
+            r = requests.post(url, headers={"Authorization": f"Bearer {self.options['api_token']}"},
+                              json={"tags": keys[i:i + self.MAX_KEYS]}, timeout=10)
+            r.raise_for_status()
+
+
+def get_backend() -> PurgeBackend:
+    conf = cdn_settings()
+    return import_string(conf["BACKEND"])(**conf["OPTIONS"])
+
+
+def edge_cache(request, response, *keys: str):
+    """
+    Réponse publique (anonyme, 200) : cache navigateur court, cache CDN plus long + clés de purge.
+    Requête authentifiée (user_rating…) : privée. Vary: Authorization dans les deux cas.
+    """
+    patch_vary_headers(response, ["Authorization"])
+    if response.status_code != 200 or request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    conf = cdn_settings()
+    keys = [CATALOG_KEY, *keys]
+    edge = (f"max-age={conf['EDGE_TTL']}, stale-while-revalidate={conf['STALE_TTL']}, "
+            f"stale-if-error={conf['STALE_TTL']}")
+    patch_cache_control(response, public=True, max_age=conf["BROWSER_TTL"])
+    response["Surrogate-Control"] = edge
+    response["Surrogate-Key"] = " ".join(keys)
+    for name, value in get_backend().headers(keys, edge).items():
+        response[name] = value
+    return response
+
+
+def _dispatch(keys: list[str]):
+    backend = get_backend()
+    if backend.synchronous:
+        backend.purge(keys)
+        return
+    from .tasks import purge_cdn_keys
+    purge_cdn_keys.enqueue(keys)
+
+
+def purge(*keys: str):
+    """Purge des clés au commit de la transaction courante (rien si aucun CDN n'est configuré)."""
+    if not keys or not get_backend().enabled:
+        return
+    transaction.on_commit(partial(_dispatch, sorted(set(keys))))
+
+
+def purge_courses(course_ids, listings: bool = False):
+    """Détail des cours donnés ; `listings` : aussi la liste et les rails (champs visibles en carte)."""
+    keys = [course_key(pk) for pk in set(course_ids) if pk]
+    if listings and keys:
+        keys += [LIST_KEY, HOME_KEY]
+    purge(*keys)
@@ -0,0 +1,102 @@
+# catalog/fast_serializers.py
+# Chemin rapide (lecture seule) des listes de cours : dicts construits depuis .values(),
+# même forme JSON que CourseListSerializer, sans arbre de champs DRF par objet.
+from django.core.files.storage import default_storage
+from django.utils.encoding import iri_to_uri
+
+from formaflix.sparse_fields import get_sparse
+from formaflix.timing import timed
+from learning.services.cloudflare_stream import build_hls_url
+from .images import IMAGE_WIDTHS, srcset_map
+from .models import Course
+
+CARD_FIELDS = (
+    "id", "title", "slug", "synopsis", "thumbnail", "hero_banner", "image_srcset", "trailer_src",
+    "price_cents", "currency", "categories",
+)
+CARD_VALUES = (
+    "id", "title", "slug", "synopsis", "thumbnail", "hero_banner", "price_cents", "currency",
+    "trailer_url", "trailer_file", "trailer_cf_playback_id", "trailer_cf_ready", "image_variants",
+)
+
+
+class MediaURLs:
+    """URLs absolues des médias : schéma + hôte calculés une fois par requête."""
+
+    def __init__(self, request=None):
+        self.request = request
+        self.base = f"{request.scheme}://{request.get_host()}" if request else ""
+
+    def absolute(self, url: str) -> str:
+        if not self.request:
+            return url
+        # cas courant de build_absolute_uri ("/media/…") sans urlsplit ; le reste lui est délégué
+        if url.startswith("/") and not url.startswith("//") and "/./" not in url and "/../" not in url:
+            return iri_to_uri(self.base + url)
+        return self.request.build_absolute_uri(url)
+
+    def file(self, name: str) -> str:
+        return self.absolute(default_storage.url(name)) if name else ""
+
+
+def _srcset(row: dict, media: MediaURLs) -> dict:
+    return srcset_map(row["image_variants"], {f: row[f] for f in IMAGE_WIDTHS}, media.file)
+
+
+def course_srcset(course: Course, request=None) -> dict:
+    """image_srcset d'une instance (CourseListSerializer / CourseDetailSerializer)."""
+    media = MediaURLs(request)
+    return srcset_map(course.image_variants, {f: getattr(course, f).name for f in IMAGE_WIDTHS}, media.file)
+
+
+def _trailer_src(row: dict, media: MediaURLs) -> str:
+    # Stream d'abord, puis fichier local, puis URL externe (comme CourseListSerializer)
+    if row["trailer_cf_playback_id"] and row["trailer_cf_ready"]:
+        return build_hls_url(row["trailer_cf_playback_id"], sign=True)
+    if row["trailer_file"]:
+        return media.file(row["trailer_file"])
+    return row["trailer_url"] or ""
+
+
+def _category_slugs(course_ids) -> dict[int, list[str]]:
+    slugs: dict[int, list[str]] = {}
+    through = Course.categories.through.objects.filter(course_id__in=course_ids).order_by("id")
+    for course_id, slug in through.values_list("course_id", "category__slug"):
+        slugs.setdefault(course_id, []).append(slug)
+    return slugs
+
+
+def _cards(rows: list[dict], request, path: tuple) -> list[dict]:
+    names = CARD_FIELDS
+    sparse = get_sparse(request)
+    if sparse:
+        names = sparse.allowed(path, CARD_FIELDS)
+    media = MediaURLs(request)
+    # champs calculés : seulement ceux demandés (trailer_src = signature RS256)
+    computed = {
+        "thumbnail": lambda r: media.file(r["thumbnail"]),
+        "hero_banner": lambda r: media.file(r["hero_banner"]),
+        "image_srcset": lambda r: _srcset(r, media),
+        "trailer_src": lambda r: _trailer_src(r, media),
+    }
+    if "categories" in names:
+        slugs = _category_slugs([r["id"] for r in rows])
+        computed["categories"] = lambda r: slugs.get(r["id"], [])
+    return [{n: computed[n](r) if n in computed else r[n] for n in names} for r in rows]
+
+
+@timed("serialize")
+def course_cards(queryset, request=None, path: tuple = ()) -> list[dict]:
+    """
+    Cartes de cours (forme CourseListSerializer) pour un queryset, dans son ordre.
+    Deux requêtes au plus : les colonnes utiles, puis les slugs de catégories (si demandées).
+    `path` : position des cartes dans la réponse, pour ?fields= / ?omit= (ex. ("course",)).
+    """
+    return _cards(list(queryset.values(*CARD_VALUES)), request, path)
+
+
+@timed("serialize")
+def course_cards_by_id(course_ids, request=None, path: tuple = ("course",)) -> dict[int, dict]:
+    """Cartes indexées par id, pour les listes qui imbriquent un cours (bibliothèque, favoris…)."""
+    rows = list(Course.objects.filter(id__in=set(course_ids)).values(*CARD_VALUES))
+    return {r["id"]: card for r, card in zip(rows, _cards(rows, request, path))}
@@ -0,0 +1,108 @@
+# catalog/images.py
+# Déclinaisons responsive des visuels de cours (vignette, bannière) : largeurs fixes en WebP + JPEG,
+# noms dérivés du contenu (cache long côté navigateur / CDN), exposées en srcset par les serializers.
+import hashlib
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .cdn import purge_courses
+from .models import Course
+
+logger = logging.getLogger(__name__)
+
+# cartes 230–260 px (x1 / x2 / x3) ; bannière plein écran mobile → desktop
+IMAGE_WIDTHS = {
+    "thumbnail": (320, 640, 960),
+    "hero_banner": (640, 1280, 1920),
+}
+IMAGE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+VARIANTS_DIR = "variants"
+
+
+def _encode(img: Image.Image, width: int, fmt: str) -> bytes:
+    height = max(1, round(img.height * width / img.width))
+    resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+    pil_format, options = IMAGE_FORMATS[fmt]
+    buf = BytesIO()
+    resized.save(buf, pil_format, **options)
+    return buf.getvalue()
+
+
+def build_variants(field: str, name: str) -> dict:
+    """
+    Génère les déclinaisons d'une image stockée. Largeurs > original ignorées (une seule
+    déclinaison à la taille d'origine si l'image est plus petite que la plus petite largeur).
+    Retourne {"source": name, "<format>": {"<largeur>": chemin, ...}, ...}.
+    """
+    with default_storage.open(name, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    widths = IMAGE_WIDTHS[field]
+
+    img = Image.open(BytesIO(data))
+    img.draft("RGB", (widths[-1], widths[-1]))  # JPEG : décodage réduit, bien plus rapide
+    img = ImageOps.exif_transpose(img).convert("RGB")
+    targets = [w for w in widths if w < img.width] or [img.width]
+
+    variants = {"source": name}
+    for fmt in IMAGE_FORMATS:
+        variants[fmt] = {}
+        for width in targets:
+            path = f"{VARIANTS_DIR}/{field}/{digest}-{width}.{fmt}"
+            if not default_storage.exists(path):  # même contenu = même nom : déjà généré
+                saved = default_storage.save(path, ContentFile(_encode(img, width, fmt)))
+                if saved != path:
+                    # écrit en parallèle par un autre process (même image) : on garde le nom canonique
+                    default_storage.delete(saved)
+            variants[fmt][str(width)] = path
+    return variants
+
+
+def generate_course_variants(course_id: int, force: bool = False) -> list[str]:
+    """
+    (Re)génère les déclinaisons des images d'un cours dont la source a changé.
+    Retourne les champs traités. Écrit via update() : pas de signal ni de save() complet.
+    """
+    course = Course.objects.filter(pk=course_id).only("id", "thumbnail", "hero_banner", "image_variants").first()
+    if not course:
+        return []
+    variants = dict(course.image_variants or {})
+    done = []
+    for field in IMAGE_WIDTHS:
+        name = getattr(course, field).name
+        if not name:
+            variants.pop(field, None)
+            continue
+        if not force and (variants.get(field) or {}).get("source") == name:
+            continue
+        try:
+            variants[field] = build_variants(field, name)
+            done.append(field)
+        except Exception:
+            logger.exception("image variants failed for course %s (%s)", course_id, field)
+    if variants != (course.image_variants or {}):
+        Course.objects.filter(pk=course_id).update(image_variants=variants)
+        purge_courses([course_id], listings=True)  # image_srcset des cartes et du détail
+    return done
+
+
+def srcset_map(variants: dict, sources: dict, url) -> dict:
+    """
+    {"thumbnail": {"webp": "<url> 320w, <url> 640w", "jpeg": "..."}, "hero_banner": {...}}
+    Déclinaisons d'une ancienne image (source ≠ fichier actuel) ignorées ; `url` : chemin → URL.
+    """
+    out = {}
+    for field, source in sources.items():
+        v = (variants or {}).get(field)
+        if not source or not v or v.get("source") != source:
+            continue
+        out[field] = {fmt: ", ".join(f"{url(path)} {w}w" for w, path in v[fmt].items())
+                      for fmt in IMAGE_FORMATS if v.get(fmt)}
+    return out
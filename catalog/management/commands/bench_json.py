@@ -0,0 +1,66 @@
+# catalog/management/commands/bench_json.py
+import io
+import json
+import timeit
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from catalog.views import CourseViewSet, home_rails
+from formaflix.renderers import ORJSONParser, ORJSONRenderer, orjson
+from learning.models import Enrollment
+from learning.views import MyLibraryView
+
+
+class Command(BaseCommand):
+    help = ("Compare JSONRenderer/JSONParser (stdlib) et ORJSONRenderer/ORJSONParser "
+            "sur les payloads réels : catalogue, home-rails, my-library.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--user", help="Email du compte pour my-library (défaut : dernier inscrit).")
+
+    def _payloads(self, user_email):
+        factory = APIRequestFactory()
+        payloads = [
+            ("catalog/courses", CourseViewSet.as_view({"get": "list"})(factory.get("/api/catalog/courses/")).data),
+            ("catalog/home-rails", home_rails(factory.get("/api/catalog/home-rails/")).data),
+        ]
+        if user_email:
+            user = User.objects.filter(email__iexact=user_email).first()
+            if not user:
+                raise CommandError(f"utilisateur introuvable : {user_email}")
+        else:
+            enrollment = Enrollment.objects.select_related("user").order_by("-purchased_at").first()
+            user = enrollment.user if enrollment else None
+        if user:
+            request = factory.get("/api/learning/my-library/")
+            force_authenticate(request, user=user)
+            payloads.append(("learning/my-library", MyLibraryView.as_view()(request).data))
+        return payloads
+
+    def handle(self, *args, **opts):
+        if orjson is None:
+            raise CommandError("orjson n'est pas installé (pip install orjson).")
+        n = opts["iterations"]
+        std_r, fast_r = JSONRenderer(), ORJSONRenderer()
+        std_p, fast_p = JSONParser(), ORJSONParser()
+
+        self.stdout.write(f"{'payload':<22}{'taille':>10}{'render stdlib':>16}{'orjson':>10}{'x':>7}"
+                          f"{'parse stdlib':>15}{'orjson':>10}{'x':>7}")
+        for name, data in self._payloads(opts["user"]):
+            body = std_r.render(data)
+            fast_body = fast_r.render(data)
+            if json.loads(body) != json.loads(fast_body):
+                self.stderr.write(self.style.WARNING(f"{name} : sorties différentes entre stdlib et orjson"))
+
+            t_std = timeit.timeit(lambda: std_r.render(data), number=n) / n * 1000
+            t_fast = timeit.timeit(lambda: fast_r.render(data), number=n) / n * 1000
+            p_std = timeit.timeit(lambda: std_p.parse(io.BytesIO(body)), number=n) / n * 1000
+            p_fast = timeit.timeit(lambda: fast_p.parse(io.BytesIO(body)), number=n) / n * 1000
+            self.stdout.write(f"{name:<22}{len(body) / 1024:>8.1f}Ko{t_std:>14.3f}ms{t_fast:>8.3f}ms"
+                              f"{t_std / max(t_fast, 1e-9):>6.1f}x{p_std:>13.3f}ms{p_fast:>8.3f}ms"
+                              f"{p_std / max(p_fast, 1e-9):>6.1f}x")
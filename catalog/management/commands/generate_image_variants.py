@@ -0,0 +1,54 @@
+# catalog/management/commands/generate_image_variants.py
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from catalog.images import generate_course_variants
+from catalog.models import Course
+
+
+def _init_worker():
+    # process « spawn » / « forkserver » : Django à initialiser ; sans effet après un fork
+    django.setup()
+
+
+def _generate(course_id: int, force: bool) -> tuple[int, list[str]]:
+    return course_id, generate_course_variants(course_id, force=force)
+
+
+class Command(BaseCommand):
+    help = "Génère les déclinaisons WebP/JPEG (vignette, bannière) des cours existants, en parallèle."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Régénère aussi les déclinaisons à jour.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+        parser.add_argument("--course", type=int, action="append", help="Limite à ces cours (répétable).")
+
+    def handle(self, *args, **opts):
+        qs = Course.objects.exclude(Q(thumbnail="") & Q(hero_banner=""))
+        if opts["course"]:
+            qs = qs.filter(pk__in=opts["course"])
+        ids = list(qs.values_list("pk", flat=True))
+        if not ids:
+            self.stdout.write("Aucun cours avec image.")
+            return
+
+        # décodage / redimensionnement = CPU : un process par cœur ; pas de connexion héritée du parent
+        connections.close_all()
+        done = 0
+        with ProcessPoolExecutor(max_workers=max(1, opts["workers"]), initializer=_init_worker) as pool:
+            futures = [pool.submit(_generate, pk, opts["force"]) for pk in ids]
+            for fut in as_completed(futures):
+                try:
+                    course_id, fields = fut.result()
+                except Exception as e:
+                    self.stderr.write(self.style.ERROR(f"échec : {e}"))
+                    continue
+                if fields:
+                    done += 1
+                    self.stdout.write(f"cours {course_id} : {', '.join(fields)}")
+        self.stdout.write(self.style.SUCCESS(f"{done}/{len(ids)} cours mis à jour."))
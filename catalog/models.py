@@ -14,6 +14,8 @@ class Course(models.Model):
     description = models.TextField(blank=True)
     thumbnail = models.ImageField(upload_to="thumbnails/", blank=True)
     hero_banner = models.ImageField(upload_to="banners/", blank=True)
+    # déclinaisons WebP/JPEG par largeur (catalog.images), générées en tâche après upload
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     # Trailers
     trailer_url = models.URLField(blank=True)
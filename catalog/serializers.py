@@ -1,12 +1,15 @@
 from rest_framework import serializers
 
+from formaflix.sparse_fields import SparseFieldsetMixin
+from formaflix.timing import TimedSerializerMixin
 from integrations.cloudflare_stream import sign_playback_token, playback_hls_url
 from learning.models import Lesson, Document
 from learning.services.cloudflare_stream import build_hls_url
+from .fast_serializers import course_srcset
 from .models import Course, Rating
 
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     video_src = serializers.SerializerMethodField()
 
     def get_video_src(self, obj):
@@ -40,7 +43,7 @@ class LessonSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "order", "duration_seconds", "is_free_preview", "video_src"]
 
 
-class DocumentSerializer(serializers.ModelSerializer):
+class DocumentSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     open_url = serializers.SerializerMethodField()
 
     def get_open_url(self, obj):
@@ -53,11 +56,12 @@ class DocumentSerializer(serializers.ModelSerializer):
         fields = ["id", "title", "file", "open_url"]  # <-- NE PLUS renvoyer "file" au front
 
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseListSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     categories = serializers.SlugRelatedField(slug_field="slug", many=True, read_only=True)
     trailer_src = serializers.SerializerMethodField()
     thumbnail = serializers.SerializerMethodField()  # ✅ absolu
     hero_banner = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()  # déclinaisons WebP/JPEG (catalog.images)
 
     # (Optionnel) Si tu veux afficher un badge "% ont adoré" directement sur les cards,
     # dé-commente les 3 lignes ci-dessous et ajoute-les aussi dans Meta.fields :
@@ -81,6 +85,9 @@ class CourseListSerializer(serializers.ModelSerializer):
         url = obj.hero_banner.url
         return r.build_absolute_uri(url) if r else url
 
+    def get_image_srcset(self, obj):
+        return course_srcset(obj, self.context.get("request"))
+
     def get_trailer_src(self, obj):
         from learning.services.cloudflare_stream import build_hls_url
         # Stream d'abord
@@ -96,19 +103,20 @@ class CourseListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = [
-            "id", "title", "slug", "synopsis", "thumbnail", "hero_banner", "trailer_src",
+            "id", "title", "slug", "synopsis", "thumbnail", "hero_banner", "image_srcset", "trailer_src",
             "price_cents", "currency", "categories",
             # "love_percent",  # ← dé-commente si tu actives le badge en liste
         ]
 
 
-class CourseDetailSerializer(serializers.ModelSerializer):
+class CourseDetailSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     categories = serializers.SlugRelatedField(slug_field="slug", many=True, read_only=True)
     lessons = LessonSerializer(many=True, read_only=True)
     documents = DocumentSerializer(many=True, read_only=True)
     trailer_src = serializers.SerializerMethodField()
     thumbnail = serializers.SerializerMethodField()
     hero_banner = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     # --- Champs d’évaluation pour l’écran détail ---
     love_count = serializers.SerializerMethodField()
@@ -126,6 +134,9 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         r = self.context.get("request")
         return r.build_absolute_uri(obj.hero_banner.url) if r else obj.hero_banner.url
 
+    def get_image_srcset(self, obj):
+        return course_srcset(obj, self.context.get("request"))
+
     def get_trailer_src(self, obj):
         from learning.services.cloudflare_stream import build_hls_url
         # Stream d'abord
@@ -161,7 +172,7 @@ class CourseDetailSerializer(serializers.ModelSerializer):
         model = Course
         fields = [
             "id", "title", "slug", "synopsis", "description", "thumbnail", "hero_banner",
-            "trailer_src", "price_cents", "currency", "categories", "lessons", "documents",
+            "image_srcset", "trailer_src", "price_cents", "currency", "categories", "lessons", "documents",
             # --- Stats & note utilisateur ---
             "love_count", "ratings_total", "love_percent", "user_rating",
         ]
\ No newline at end of file
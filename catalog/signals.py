@@ -0,0 +1,33 @@
+# catalog/signals.py
+# Purge CDN des réponses publiques du catalogue (catalog.cdn) sur modification des données affichées.
+# Les écritures par update() / bulk_update() (état Stream, déclinaisons d'images) purgent elles-mêmes.
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from learning.models import Document, Lesson
+from .cdn import CATALOG_KEY, purge, purge_courses
+from .models import Category, Course, Rating
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def purge_course(sender, instance, **kwargs):
+    purge_courses([instance.pk], listings=True)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+# love_count / love_percent du détail (rate_course n'enregistre que les notes qui changent)
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def purge_course_detail(sender, instance, **kwargs):
+    purge_courses([instance.course_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_catalog(sender, instance, **kwargs):
+    # slugs de catégories présents partout
+    purge(CATALOG_KEY)
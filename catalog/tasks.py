@@ -0,0 +1,14 @@
+# catalog/tasks.py
+from jobs.registry import task
+from .cdn import get_backend
+from .images import generate_course_variants
+
+
+@task(unique=True)
+def generate_image_variants(course_id: int):
+    generate_course_variants(course_id)
+
+
+@task(unique=True, backoff_seconds=10)
+def purge_cdn_keys(keys: list[str]):
+    get_backend().purge(keys)
@@ -1,3 +1,173 @@
+# catalog/tests.py
+# Chemins rapides (catalog/learning fast_serializers) : sortie identique aux serializers DRF
+# qu'ils remplacent, avec ou sans requête, et avec ?fields= / ?omit=. Purge CDN sur les notes.
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from learning.fast_serializers import continue_watching_items, favorite_items, library_items
+from learning.models import Enrollment, Favorite
+from learning.serializers import (
+    ContinueWatchingItemSerializer, FavoriteSerializer, MyLibraryItemSerializer,
+)
+from .fast_serializers import course_cards
+from .models import Category, Course, Rating
+from .serializers import CourseListSerializer
+
+factory = APIRequestFactory()
+
+SPARSE_QUERIES = (
+    {"fields": "id,title,thumbnail"},
+    {"fields": "id,categories,image_srcset"},
+    {"omit": "trailer_src,image_srcset"},
+    {"fields": "id,course.title,course.trailer_src"},
+    {"fields": "course"},
+    {"omit": "course.categories,created_at,purchased_at"},
+    {"fields": "percent,resume_lesson_id"},
+)
+
+
+def _request(params=None, secure=False):
+    return Request(factory.get("/api/", params or {}, secure=secure))
+
+
+def _json(data):
+    # même comparaison que le rendu : OrderedDict / ReturnList / dict confondus
+    return json.loads(json.dumps(data))
+
+
+# signature RS256 désactivée : URL HLS stable d'un appel à l'autre
+@mock.patch("learning.services.cloudflare_stream.CF_SIGN_KID", "")
+class FastSerializerParityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        drama = Category.objects.create(name="Drame", slug="drame")
+        design = Category.objects.create(name="Design", slug="design")
+
+        def course(slug, **kwargs):
+            return Course.objects.create(title=slug.title(), slug=slug, synopsis="s", description="d",
+                                         price_cents=1990, is_active=True, **kwargs)
+
+        cls.stream = course("stream", trailer_cf_playback_id="pb123", trailer_cf_ready=True,
+                            trailer_url="https://example.com/ignored.mp4")
+        cls.local = course("local", trailer_file="trailers/bande annonce é.mp4",
+                           thumbnail="thumbnails/café été.jpg", hero_banner="banners/hero.png",
+                           image_variants={
+                               "thumbnail": {
+                                   "source": "thumbnails/café été.jpg",
+                                   "webp": {"320": "variants/thumbnail/ab-320.webp",
+                                            "640": "variants/thumbnail/ab-640.webp"},
+                                   "jpeg": {"320": "variants/thumbnail/ab-320.jpeg"},
+                               },
+                               # déclinaisons d'une ancienne image : ignorées
+                               "hero_banner": {"source": "banners/old.png",
+                                               "webp": {"640": "variants/hero_banner/cd-640.webp"}},
+                           })
+        cls.external = course("external", trailer_url="https://cdn.example.com/t.mp4",
+                              trailer_cf_playback_id="pending", trailer_cf_ready=False)
+        cls.bare = course("bare")
+        cls.stream.categories.set([drama, design])
+        cls.local.categories.set([design])
+
+        cls.user = get_user_model().objects.create_user(username="viewer", email="v@example.com",
+                                                        password="x")
+        for c in (cls.stream, cls.local, cls.external):
+            Enrollment.objects.create(user=cls.user, course=c)
+        for c in (cls.local, cls.bare):
+            Favorite.objects.create(user=cls.user, course=c)
+
+    def _variants(self):
+        yield None
+        yield _request()
+        yield _request(secure=True)
+        for params in SPARSE_QUERIES:
+            yield _request(params)
+
+    def _assert_same(self, fast, slow):
+        for request in self._variants():
+            with self.subTest(query=request and request.query_params.urlencode()):
+                # requêtes distinctes : ?fields= analysé une fois par requête (get_sparse)
+                other = Request(request._request) if request else None
+                self.assertEqual(_json(fast(request)), _json(slow(other)))
+
+    def test_course_cards(self):
+        qs = Course.objects.order_by("id")
+        self._assert_same(
+            lambda r: course_cards(qs, r),
+            lambda r: CourseListSerializer(qs, many=True, context={"request": r}).data,
+        )
+
+    def test_library_items(self):
+        qs = Enrollment.objects.filter(user=self.user).order_by("id")
+        self._assert_same(
+            lambda r: library_items(qs, r),
+            lambda r: MyLibraryItemSerializer(qs, many=True, context={"request": r}).data,
+        )
+
+    def test_favorite_items(self):
+        qs = Favorite.objects.filter(user=self.user).order_by("id")
+        self._assert_same(
+            lambda r: favorite_items(qs, r),
+            lambda r: FavoriteSerializer(qs, many=True, context={"request": r}).data,
+        )
+
+    def test_continue_watching_items(self):
+        rows = [
+            {"course_id": self.local.id, "percent": 40, "resume_lesson_id": 7, "resume_position_seconds": 95},
+            {"course_id": self.stream.id, "percent": 0, "resume_lesson_id": None, "resume_position_seconds": 3},
+        ]
+        courses = Course.objects.in_bulk([r["course_id"] for r in rows])
+        instances = [{**{k: v for k, v in r.items() if k != "course_id"}, "course": courses[r["course_id"]]}
+                     for r in rows]
+        self._assert_same(
+            lambda r: continue_watching_items(rows, r),
+            lambda r: ContinueWatchingItemSerializer(instances, many=True, context={"request": r}).data,
+        )
+
+    def test_course_cards_queries(self):
+        request = _request()
+        with self.assertNumQueries(2):
+            course_cards(Course.objects.all(), request)
+        # catégories non demandées : une seule requête
+        with self.assertNumQueries(1):
+            course_cards(Course.objects.all(), _request({"omit": "categories"}))
+
+
+@mock.patch("catalog.signals.purge_courses")
+class RatingPurgeTests(TestCase):
+    # purge CDN du détail : note créée, modifiée ou supprimée ; pas de purge pour une note identique
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(title="Noté", slug="note", synopsis="s", description="d",
+                                           price_cents=100, is_active=True)
+        cls.user = get_user_model().objects.create_user(username="rater", email="r@example.com",
+                                                        password="x")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _rate(self, value):
+        r = self.client.post("/api/catalog/rate/", {"course_id": self.course.pk, "value": value},
+                             format="json", secure=True)
+        self.assertEqual(r.status_code, 200)
+        return r.json()
+
+    def test_purges_only_on_change(self, purge_courses):
+        self._rate(2)
+        self.assertEqual(purge_courses.call_count, 1)
+        self.assertEqual(self._rate(2)["love_count"], 1)
+        self.assertEqual(purge_courses.call_count, 1)
+        self._rate(1)
+        self.assertEqual(purge_courses.call_count, 2)
+        purge_courses.assert_called_with([self.course.pk])
 
-# Create your tests here.
+    def test_delete_purges(self, purge_courses):
+        rating = Rating.objects.create(course=self.course, user=self.user, value=2)
+        purge_courses.reset_mock()
+        rating.delete()
+        purge_courses.assert_called_once_with([self.course.pk])
@@ -1,20 +1,43 @@
 from rest_framework import viewsets, permissions
+from .cdn import HOME_KEY, LIST_KEY, course_key, edge_cache
 from .models import Course, Rating
+from .fast_serializers import course_cards
 from .serializers import CourseListSerializer, CourseDetailSerializer
 from datetime import timedelta
 from django.utils import timezone
 from django.db.models import Count, Q
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from formaflix.sparse_fields import wants
+from formaflix.throttling import TokenBucketThrottle
+
 class CourseViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Course.objects.filter(is_active=True).order_by("-created_at")
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "retrieve":
+            # relations parcourues par CourseDetailSerializer, seulement si demandées (?fields= / ?omit=)
+            qs = qs.prefetch_related(*[name for name in ("categories", "lessons", "documents")
+                                       if wants(self.request, (), name)])
+        return qs
+
     def get_serializer_class(self):
         return CourseDetailSerializer if self.action == "retrieve" else CourseListSerializer
 
+    def list(self, request, *args, **kwargs):
+        # même forme que CourseListSerializer, construite depuis .values()
+        return Response(course_cards(self.filter_queryset(self.get_queryset()), request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # en-têtes CDN sur toutes les réponses, erreurs comprises (404 jamais mis en cache public)
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = LIST_KEY if self.action == "list" else course_key(self.kwargs.get(self.lookup_field))
+        return edge_cache(request, response, key)
+
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
@@ -30,8 +53,8 @@ def home_rails(request):
     packs = base.filter(is_full_pack=True).order_by("-pack_weight", "-created_at")[:20]
 
     # Top 10 : manuel si des rangs sont posés, sinon auto par ventes récentes
-    manual_top = list(base.exclude(top10_rank__isnull=True).order_by("top10_rank")[:10])
-    if manual_top:
+    manual_top = base.exclude(top10_rank__isnull=True).order_by("top10_rank")[:10]
+    if manual_top.exists():
         top10 = manual_top
     else:
         top10 = (base
@@ -43,17 +66,22 @@ def home_rails(request):
                    .annotate(sales=Count("enrollments"))
                    .order_by("-sales", "-created_at"))[:20]
 
-    ser = lambda qs: CourseListSerializer(qs, many=True, context={"request": request}).data
-    return Response({
+    ser = lambda qs: course_cards(qs, request)
+    return edge_cache(request, Response({
         "editor_picks": ser(editor),
         "top10": ser(top10),
         "packs": ser(packs),
         "bestsellers": ser(bestsellers),
-    })
+    }), HOME_KEY)
+
+
+class RatingThrottle(TokenBucketThrottle):
+    scope = "rating"
 
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([RatingThrottle])
 def rate_course(request):
     course_id = request.data.get("course_id")
     value = request.data.get("value")
@@ -69,9 +97,12 @@ def rate_course(request):
     except Course.DoesNotExist:
         return Response({"detail": "Cours introuvable"}, status=404)
 
-    r, _created = Rating.objects.update_or_create(
-        course=course, user=request.user, defaults={"value": value}
-    )
+    # même note : pas d'écriture, donc pas de purge CDN du détail (signals.purge_course_detail)
+    r = Rating.objects.filter(course=course, user=request.user).first()
+    if r is None or r.value != value:
+        r, _created = Rating.objects.update_or_create(
+            course=course, user=request.user, defaults={"value": value}
+        )
 
     love_count = course.ratings.filter(value=2).count()
     ratings_total = course.ratings.exclude(value=0).count()
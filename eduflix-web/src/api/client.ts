@@ -6,6 +6,14 @@ export const API_BASE = import.meta.env.VITE_API_BASE ?? "https://sbeautyflix.co
 
 console.log("API_BASE =", API_BASE);   // 🔍 TEMPORAIRE
 
+// WebSocket de progression du Player (serveur ASGI) ; absent en WSGI → repli sur le PATCH
+export const PROGRESS_WS_URL =
+  import.meta.env.VITE_PROGRESS_WS_URL ??
+  API_BASE.replace(/^http/, "ws").replace(/\/api\/?$/, "") + "/ws/learning/progress/";
+
+// API servie en ASGI (SERVER_MODE=asgi / ASYNC_VIEWS) : long-poll du statut de commande disponible
+export const ASYNC_API = import.meta.env.VITE_ASYNC_API === "1";
+
 const client = axios.create({
   baseURL: API_BASE,
 });
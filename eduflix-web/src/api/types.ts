@@ -13,8 +13,12 @@ export type CourseLite = {
   currency?: string;
   categories?: string[];
   hero_banner?: string;
+  // déclinaisons responsive : { thumbnail: { webp: "url 320w, …", jpeg: "…" }, hero_banner: {…} }
+  image_srcset?: Partial<Record<"thumbnail" | "hero_banner", ImageSrcset>>;
 };
 
+export type ImageSrcset = { webp?: string; jpeg?: string };
+
 export type Lesson = {
   id: number;
   title: number;
@@ -159,6 +159,9 @@ export default function CourseCard({
 
   // Visuels
   const thumbnail = (course as any).thumbnail || "";
+  const thumbSrcset = (course as any).image_srcset?.thumbnail as
+    | { webp?: string; jpeg?: string }
+    | undefined;
   const percent = resume?.percent ?? 0;
   const showProgress = owned && percent > 0;
 
@@ -221,7 +224,17 @@ export default function CourseCard({
       onClick={handleTap}
     >
       {/* Poster */}
-      <img src={thumbnail} alt={course.title} loading="lazy" className="w-full h-full object-cover" />
+      <picture>
+        {thumbSrcset?.webp && <source type="image/webp" srcSet={thumbSrcset.webp} sizes="260px" />}
+        <img
+          src={thumbnail}
+          srcSet={thumbSrcset?.jpeg || undefined}
+          sizes="260px"
+          alt={course.title}
+          loading="lazy"
+          className="w-full h-full object-cover"
+        />
+      </picture>
 
       {/* Aperçu vidéo – desktop only */}
       {enablePreview && (hover || videoSrc) ? (
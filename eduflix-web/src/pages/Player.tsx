@@ -1,7 +1,7 @@
 // src/pages/Player.tsx
 import { useEffect, useRef, useState, useMemo } from "react";
 import { Link, useParams, useNavigate } from "react-router-dom";
-import client from "../api/client";
+import client, { PROGRESS_WS_URL } from "../api/client";
 import type { CourseDetail, Lesson } from "../api/types";
 import Navbar from "../components/Navbar";
 import { useTranslation } from "react-i18next";
@@ -318,11 +318,49 @@ const downloadDoc = async (doc: DocLite) => {
     const v = videoRef.current;
     if (!v || !current || !id) return;
 
+    // WebSocket : une auth par session de lecture, puis des trames de position compactes
+    let ws: WebSocket | null = null;
+    let wsReady = false;
+    try {
+      ws = new WebSocket(PROGRESS_WS_URL);
+      ws.onopen = () =>
+        ws?.send(JSON.stringify({ t: "auth", token: localStorage.getItem("eduflix_token") || "" }));
+      ws.onmessage = (e) => {
+        let msg: { t?: string; quiz?: boolean };
+        try {
+          msg = JSON.parse(e.data);
+        } catch {
+          return;
+        }
+        if (msg.t === "ready") {
+          ws?.send(JSON.stringify({ t: "lesson", course: Number(id), lesson: current.id }));
+        } else if (msg.t === "resume") {
+          wsReady = true;
+        } else if (msg.t === "state" && msg.quiz) {
+          setHasQuiz(true);
+        }
+      };
+      ws.onclose = () => {
+        wsReady = false;
+      };
+    } catch {
+      ws = null;
+    }
+
     const sendProgress = async (payload: {
       position_seconds: number;
       duration_seconds: number;
       completed?: boolean;
+      flush?: boolean;
     }) => {
+      if (ws && wsReady && ws.readyState === WebSocket.OPEN) {
+        const pos = payload.position_seconds;
+        const dur = payload.duration_seconds;
+        if (payload.completed) ws.send(JSON.stringify({ t: "done", pos, dur }));
+        else if (payload.flush) ws.send(JSON.stringify({ t: "flush", pos, dur }));
+        else ws.send(String(pos));
+        return;
+      }
       try {
         await client.patch("/learning/progress/", {
           course_id: Number(id),
@@ -332,13 +370,13 @@ const downloadDoc = async (doc: DocLite) => {
       } catch {}
     };
 
-    const sendNow = () => {
+    const sendNow = (flush = false) => {
       const vv = videoRef.current;
       if (!vv) return;
       const pos = Math.max(0, Math.floor(vv.currentTime || 0));
-      const rawDur = Number.isFinite(vv.duration) ? Math.floor(vv.duration) : 0;
-      const dur = Math.max(rawDur, pos, 1);
-      void sendProgress({ position_seconds: pos, duration_seconds: dur });
+      // durée réelle ou 0 (métadonnées pas encore lues / flux sans fin) : le serveur ignore 0
+      const dur = Number.isFinite(vv.duration) ? Math.floor(vv.duration) : 0;
+      void sendProgress({ position_seconds: pos, duration_seconds: dur, flush });
     };
 
     const onTimeUpdate = () => {
@@ -349,15 +387,16 @@ const downloadDoc = async (doc: DocLite) => {
     };
 
     const onEnded = () => {
-      const dur = Math.floor(v.duration || 0);
+      const dur = Number.isFinite(v.duration) ? Math.floor(v.duration) : 0;
       void sendProgress({ position_seconds: dur, duration_seconds: dur, completed: true });
     };
 
-    const onPause = () => sendNow();
+    // pause / sortie : écriture immédiate (pas de coalescence côté serveur)
+    const onPause = () => sendNow(true);
     const onVisibility = () => {
-      if (document.hidden) sendNow();
+      if (document.hidden) sendNow(true);
     };
-    const onBeforeUnload = () => sendNow();
+    const onBeforeUnload = () => sendNow(true);
 
     if (intervalRef.current) clearInterval(intervalRef.current);
     intervalRef.current = window.setInterval(() => {
@@ -380,6 +419,7 @@ const downloadDoc = async (doc: DocLite) => {
       v.removeEventListener("pause", onPause);
       document.removeEventListener("visibilitychange", onVisibility);
       window.removeEventListener("beforeunload", onBeforeUnload);
+      ws?.close();
       if (intervalRef.current) {
         clearInterval(intervalRef.current);
         intervalRef.current = null;
@@ -1,7 +1,7 @@
 import { useEffect } from "react";
 import { useNavigate, useSearchParams, Link } from "react-router-dom";
 import Navbar from "../components/Navbar";
-import client from "../api/client";
+import client, { ASYNC_API } from "../api/client";
 
 export default function Success() {
   const [params] = useSearchParams();
@@ -12,22 +12,43 @@ export default function Success() {
   useEffect(() => {
     let cancelled = false;
 
+    const sleep = (ms: number) => new Promise(r => setTimeout(r, ms));
+
+    // Un pas d'attente : long-poll en ASGI (le serveur répond dès que le webhook a marqué
+    // la commande "paid", ~25 s max), sinon lecture simple (WSGI : pas de worker bloqué)
+    async function fetchStatus() {
+      if (ASYNC_API) {
+        const { data } = await client.get("/payments/session-status/wait/", {
+          params: { session_id: sessionId, status: "pending", timeout: 25 },
+          timeout: 30000,
+        });
+        return data;
+      }
+      const { data } = await client.get("/payments/session-status/", { params: { session_id: sessionId } });
+      return data;
+    }
+
     async function go() {
       let courseId = courseIdFromUrl;
+      const deadline = Date.now() + 60000;
+      let delay = 1000;  // short-poll : 1 s, 2 s, 4 s… (max 8 s)
 
-      // On poll le backend quelques secondes pour laisser le webhook marquer la commande "paid"
-      for (let i = 0; i < 8; i++) { // ~8 * 1s = 8s
+      while (!cancelled && Date.now() < deadline) {
         try {
-          const { data } = await client.get("/payments/session-status/", {
-            params: { session_id: sessionId },
-          });
+          const data = await fetchStatus();
           courseId = courseId || String(data.course_id || "");
           if (data.status === "paid" && courseId && !cancelled) {
             nav(`/player/${courseId}`, { replace: true });
             return;
           }
-        } catch { /* ignore et ré-essaie */ }
-        await new Promise(r => setTimeout(r, 1000));
+          if (data.status !== "pending") break;
+          if (!ASYNC_API) {
+            await sleep(delay);
+            delay = Math.min(delay * 2, 8000);
+          }
+        } catch {
+          await sleep(1000); // ignore et ré-essaie
+        }
       }
       // Fallback : si pas prêt, on envoie vers la bibliothèque
       if (!cancelled) nav("/library", { replace: true });
@@ -13,4 +13,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'formaflix.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# après get_asgi_application() : les apps doivent être chargées
+from learning.progress_socket import PATH as PROGRESS_SOCKET_PATH, progress_socket  # noqa: E402
+
+# WebSockets servis sans passer par Django (pas de support WebSocket natif)
+WEBSOCKET_ROUTES = {
+    PROGRESS_SOCKET_PATH: progress_socket,
+}
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        handler = WEBSOCKET_ROUTES.get(scope["path"])
+        if handler is None:
+            # refus avant accept → 403 côté client
+            await send({"type": "websocket.close", "code": 1000})
+            return
+        return await handler(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,75 @@
+# formaflix/renderers.py
+# Renderer / parser JSON basés sur orjson (catalogue, home-rails, my-library : encodage = CPU).
+# orjson absent → comportement DRF standard (json de la stdlib).
+import math
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+# datetime / date / time / UUID natifs (UTC en "Z" comme DRF) ; clés int autorisées comme json.dumps
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+# Decimal, chaînes lazy (gettext_lazy), timedelta, QuerySet, générateurs… : encodeur DRF
+_drf_default = JSONEncoder().default
+
+
+def _has_non_finite(data) -> bool:
+    """NaN / ±Infinity quelque part dans data (dicts, listes, tuples imbriqués)."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer de DRF, sérialisation orjson. Repli sur la stdlib pour l'indentation
+    (API navigable, ?indent), pour ce qu'orjson refuse (entiers > 64 bits…) et pour
+    NaN / Infinity, qu'orjson écrit null : DRF lève alors ValueError (STRICT_JSON).
+    """
+
+    @timed("render")
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # un float non fini ne peut sortir qu'en null : parcours seulement dans ce cas
+        if b"null" in ret and _has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        # comme DRF : U+2028 / U+2029 échappés (JSON inclus tel quel dans du JavaScript)
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser de DRF, décodage orjson (UTF-8 ; NaN / Infinity refusés comme en mode strict)."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
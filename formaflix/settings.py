@@ -47,12 +47,15 @@ INSTALLED_APPS = [
     "payments",
     "quizzes",
     "certificates",
+    "jobs",
 ]
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # ← AJOUT
+    # Server-Timing (staff / jeton) + ligne de log JSON par requête ; après WhiteNoise : statiques non mesurés
+    "formaflix.timing.ServerTimingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -95,7 +98,21 @@ CSRF_TRUSTED_ORIGINS = [
 ROOT_URLCONF = "formaflix.urls"
 WSGI_APPLICATION = "formaflix.wsgi.application"
 
-DATABASES = {"default": dj_database_url.config(conn_max_age=300, ssl_require=True)}
+# ---- Mode de service : "wsgi" (gunicorn sync) ou "asgi" (gunicorn + workers uvicorn), voir gunicorn.conf.py ----
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+# vues async (checkout, statut de session, mot de passe oublié, heartbeat, webhook Stream)
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "1" if SERVER_MODE == "asgi" else "0") == "1"
+
+# En ASGI, chaque appel ORM passe par un thread de sync_to_async : pas de connexions persistantes
+DATABASES = {"default": dj_database_url.config(conn_max_age=0 if SERVER_MODE == "asgi" else 300, ssl_require=True)}
+
+# Cache partagé entre workers (JWT, coalescence de la progression, throttles) ; sans REDIS_URL,
+# cache mémoire propre à chaque process (l'auth JWT relit alors l'utilisateur en base)
+if os.getenv("REDIS_URL"):
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache",
+                          "LOCATION": os.getenv("REDIS_URL")}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 AUTH_USER_MODEL = "accounts.User"
 TIME_ZONE = "Europe/Paris"
@@ -129,8 +146,65 @@ MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", "/data/media"))
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # User chargé depuis le cache (TTL court) ; les endpoints heartbeat / lecture
+        # utilisent accounts.authentication.StatelessJWTAuthentication (aucune requête)
+        "accounts.authentication.CachedJWTAuthentication",
+    ),
+    # orjson (formaflix.renderers) ; repli stdlib si le paquet manque
+    "DEFAULT_RENDERER_CLASSES": (
+        "formaflix.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
     ),
+    "DEFAULT_PARSER_CLASSES": (
+        "formaflix.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+}
+
+# Seaux à jetons par scope (formaflix.throttling.TokenBucketThrottle, athrottle en async) : rafale max,
+# jetons rechargés / s
+TOKEN_BUCKETS = {
+    # heartbeat toutes les 5 s + pause / seek ; au-delà, coalescé (throttle_soft)
+    "progress": {"burst": 10, "refill": 1 / 4},
+    "rating": {"burst": 10, "refill": 1 / 6},
+    "doc_tracking": {"burst": 10, "refill": 1 / 10},
+    "my_list": {"burst": 20, "refill": 1 / 3},
+    # appels Stripe / emails : quelques essais, puis un par minute (mot de passe oublié : par IP)
+    "checkout": {"burst": 5, "refill": 1 / 12},
+    "password_reset": {"burst": 3, "refill": 1 / 60},
+    # long-poll du statut de paiement (une connexion tenue jusqu'à LONGPOLL_TIMEOUT)
+    "checkout_status": {"burst": 10, "refill": 1 / 5},
+}
+
+# Cache CDN des réponses publiques du catalogue (catalog.cdn) ; purge par Surrogate-Key
+# backends : catalog.cdn.FastlyPurgeBackend / CloudflarePurgeBackend / RecordingPurgeBackend (tests)
+CDN_CACHE = {
+    "BACKEND": os.getenv("CDN_PURGE_BACKEND", "catalog.cdn.NullPurgeBackend"),
+    "OPTIONS": {
+        "api_token": os.getenv("CDN_API_TOKEN", ""),
+        "service_id": os.getenv("FASTLY_SERVICE_ID", ""),
+        "zone_id": os.getenv("CF_ZONE_ID", ""),
+    },
+    "BROWSER_TTL": 60,
+    # < TTL des jetons Stream signés (1 h) présents dans trailer_src / video_src
+    "EDGE_TTL": int(os.getenv("CDN_EDGE_TTL", "600")),
+    "STALE_TTL": 300,
+}
+
+# Server-Timing visible hors staff avec l'en-tête X-Server-Timing-Token (vide = désactivé)
+SERVER_TIMING_TOKEN = os.getenv("SERVER_TIMING_TOKEN", "")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"bare": {"format": "%(message)s"}},
+    "handlers": {"stdout": {"class": "logging.StreamHandler", "formatter": "bare"}},
+    "loggers": {
+        # une ligne JSON par requête (durée totale, SQL, sérialisation, HTTP sortant, signatures)
+        "formaflix.timing": {"handlers": ["stdout"], "level": os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+                             "propagate": False},
+    },
 }
 
 SIMPLE_JWT = {
@@ -160,6 +234,10 @@ CF_STREAM_API_TOKEN    = os.environ.get("CF_STREAM_API_TOKEN", "")
 CF_STREAM_SIGNING_KID  = os.environ.get("CF_STREAM_SIGNING_KID", "")
 CF_STREAM_SIGNING_KEY  = os.environ.get("CF_STREAM_SIGNING_KEY", "")
 CF_STREAM_WEBHOOK_SECRET = os.getenv("CF_STREAM_WEBHOOK_SECRET", "")
+# secret renvoyé par Cloudflare à la création du webhook (en-tête Webhook-Signature)
+CF_STREAM_WEBHOOK_SIGNING_SECRET = os.getenv("CF_STREAM_WEBHOOK_SIGNING_SECRET", "")
+# Racine de l'API Stream (par défaut Cloudflare ; ex: http://127.0.0.1:8787/client/v4 pour le serveur factice)
+CF_STREAM_API_BASE = os.getenv("CF_STREAM_API_BASE", "https://api.cloudflare.com/client/v4")
 
 
 # ---- Email ----
@@ -0,0 +1,98 @@
+# formaflix/sparse_fields.py
+# Champs à la demande : ?fields=id,title,course.thumbnail  /  ?omit=trailer_src,lessons.video_src
+# Notation pointée pour les objets imbriqués ; un champ écarté n'est jamais calculé.
+from typing import Iterable
+
+_ALL = None  # nœud sans restriction (fields) / champ retiré en entier (omit)
+
+
+def _parse(raw: str) -> dict:
+    tree: dict = {}
+    for item in raw.split(","):
+        parts = [p for p in item.strip().split(".") if p]
+        node = tree
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = _ALL  # "course" l'emporte sur "course.title"
+            else:
+                child = node.get(part)
+                if child is _ALL and part in node:
+                    break  # "course" déjà demandé en entier
+                node = node.setdefault(part, {})
+    return tree
+
+
+class SparseFieldset:
+    def __init__(self, fields: str = "", omit: str = ""):
+        self.only = _parse(fields) if fields else _ALL
+        self.omit = _parse(omit) if omit else {}
+
+    def _only_at(self, path):
+        node = self.only
+        for part in path:
+            if node is _ALL:
+                return _ALL
+            node = node.get(part, _ALL)
+        return node
+
+    def _omit_at(self, path):
+        node = self.omit
+        for part in path:
+            node = node.get(part) or {}
+        return node
+
+    def wants(self, path: tuple, name: str) -> bool:
+        only, omit = self._only_at(path), self._omit_at(path)
+        if only is not _ALL and name not in only:
+            return False
+        return not (name in omit and omit[name] is _ALL)
+
+    def allowed(self, path: tuple, names: Iterable[str]) -> list[str]:
+        """Noms conservés à ce niveau, dans l'ordre déclaré."""
+        return [n for n in names if self.wants(path, n)]
+
+
+def get_sparse(request) -> SparseFieldset | None:
+    """?fields= / ?omit= de la requête (analysés une fois par requête) ; None si absents."""
+    if request is None:
+        return None
+    cached = getattr(request, "_sparse_fieldset", False)
+    if cached is not False:
+        return cached
+    params = getattr(request, "query_params", None) or request.GET
+    fields, omit = params.get("fields", "").strip(), params.get("omit", "").strip()
+    sparse = SparseFieldset(fields, omit) if (fields or omit) else None
+    request._sparse_fieldset = sparse
+    return sparse
+
+
+def wants(request, path: tuple, name: str) -> bool:
+    sparse = get_sparse(request)
+    return sparse is None or sparse.wants(path, name)
+
+
+class SparseFieldsetMixin:
+    """
+    À placer avant (Model)Serializer. Les champs écartés sont retirés avant le binding :
+    SerializerMethodField non appelés, serializers imbriqués non parcourus.
+    Le chemin d'un serializer imbriqué (ex. "course", "lessons") vient de sa position dans l'arbre.
+    """
+
+    def _sparse_path(self) -> tuple:
+        path, node = [], self
+        while getattr(node, "parent", None) is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return tuple(reversed(path))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse = get_sparse(self.context.get("request"))
+        if sparse is None:
+            return fields
+        path = self._sparse_path()
+        for name in list(fields):
+            if not sparse.wants(path, name):
+                del fields[name]
+        return fields
@@ -0,0 +1,124 @@
+# formaflix/throttling.py
+# Throttle « seau à jetons » par utilisateur et par endpoint (heartbeat, notes, suivi de documents…).
+# État dans le cache partagé (Redis si REDIS_URL) ; si le cache est injoignable, seaux en mémoire du process.
+import logging
+import math
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+LOCAL_MAX_KEYS = 10_000
+
+
+class TokenBucket:
+    """
+    `burst` jetons au plus, rechargés à `refill` jetons par seconde ; une requête consomme un jeton.
+    Lecture puis écriture sans verrou : deux requêtes simultanées peuvent prendre le même jeton,
+    écart toléré (c'est une protection de charge, pas un quota).
+    """
+
+    _local: dict[str, tuple[float, float]] = {}
+    _local_lock = threading.Lock()
+    _degraded = False  # cache en panne : un seul warning jusqu'au retour
+
+    def __init__(self, scope: str, burst: float, refill: float):
+        self.scope = scope
+        self.burst = float(burst)
+        self.refill = float(refill)
+        # au-delà, le seau est plein : l'état n'a plus besoin d'être gardé
+        self.ttl = math.ceil(self.burst / self.refill) + 1
+
+    def _take(self, state, now: float) -> tuple[float, tuple[float, float]]:
+        tokens, updated = state or (self.burst, now)
+        tokens = min(self.burst, tokens + max(0.0, now - updated) * self.refill)
+        if tokens >= 1:
+            return 0.0, (tokens - 1, now)
+        return (1 - tokens) / self.refill, (tokens, now)
+
+    def consume(self, ident) -> float:
+        """0 si un jeton a été pris ; sinon le délai (s) avant le prochain jeton."""
+        key = f"throttle:{self.scope}:{ident}"
+        now = time.time()
+        try:
+            wait, state = self._take(cache.get(key), now)
+            cache.set(key, state, self.ttl)
+            TokenBucket._degraded = False
+            return wait
+        except Exception:
+            if not TokenBucket._degraded:
+                TokenBucket._degraded = True
+                logger.warning("throttle cache unavailable, falling back to in-memory buckets")
+        with self._local_lock:
+            if len(self._local) > LOCAL_MAX_KEYS:
+                self._local.clear()
+            wait, self._local[key] = self._take(self._local.get(key), now)
+        return wait
+
+
+def user_ident(user_id) -> str:
+    return f"u{user_id}"
+
+
+def get_bucket(scope: str) -> TokenBucket:
+    conf = settings.TOKEN_BUCKETS[scope]
+    return TokenBucket(scope, conf["burst"], conf["refill"])
+
+
+def ip_ident(request) -> str:
+    # même clé que DRF (X-Forwarded-For borné par NUM_PROXIES, sinon REMOTE_ADDR)
+    return f"ip{BaseThrottle().get_ident(request)}"
+
+
+async def athrottle(request, scope: str, user_id=None) -> JsonResponse | None:
+    """
+    Équivalent de TokenBucketThrottle pour les vues async (ASYNC_VIEWS) : None si un jeton a été pris,
+    sinon la réponse 429 de DRF (même détail, Retry-After). `user_id` absent → seau par IP.
+    """
+    ident = user_ident(user_id) if user_id else ip_ident(request)
+    wait = await sync_to_async(get_bucket(scope).consume, thread_sensitive=False)(ident)
+    if not wait:
+        return None
+    exc = Throttled(wait)
+    return JsonResponse({"detail": str(exc.detail)}, status=exc.status_code,
+                        headers={"Retry-After": "%d" % exc.wait})
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Attributs lus sur la vue (ou sur la sous-classe pour une vue fonction) :
+    - throttle_scope : clé de settings.TOKEN_BUCKETS (burst / refill) ;
+    - throttle_methods : méthodes comptées (défaut : écritures) ;
+    - throttle_soft : au lieu d'un 429, la requête passe avec request.throttle_exceeded = True,
+      à la vue de coalescer ou d'ignorer l'écriture (heartbeats).
+    """
+    scope = None
+    methods = WRITE_METHODS
+    soft = False
+
+    def allow_request(self, request, view):
+        self._wait = 0.0
+        scope = getattr(view, "throttle_scope", None) or self.scope
+        methods = getattr(view, "throttle_methods", None) or self.methods
+        if not scope or request.method not in methods:
+            return True
+        user_id = getattr(request.user, "id", None) if request.user and request.user.is_authenticated else None
+        ident = user_ident(user_id) if user_id else ip_ident(request)
+        self._wait = get_bucket(scope).consume(ident)
+        if not self._wait:
+            return True
+        if getattr(view, "throttle_soft", self.soft):
+            request.throttle_exceeded = True
+            return True
+        return False
+
+    def wait(self):
+        return self._wait
@@ -0,0 +1,218 @@
+# formaflix/timing.py
+# Instrumentation par requête : SQL (durée + nombre), sérialisation, rendu JSON, HTTP sortant
+# (Stripe, Stream, Brevo), signatures RS256. En-tête Server-Timing pour le staff / jeton de debug,
+# ligne de log JSON (logger "formaflix.timing") pour toutes les requêtes.
+# Les durées se recouvrent : une requête SQL lancée pendant la sérialisation compte dans les deux.
+import hmac
+import json
+import logging
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_cache_control
+from django.utils.functional import SimpleLazyObject, empty
+
+logger = logging.getLogger(__name__)
+
+TOKEN_HEADER = "HTTP_X_SERVER_TIMING_TOKEN"
+# directives de cache CDN prioritaires sur Cache-Control
+EDGE_HEADERS = ("Surrogate-Control", "CDN-Cache-Control")
+# ordre et libellés de l'en-tête (ASCII : valeurs d'en-tête latin-1)
+METRICS = {
+    "db": "SQL",
+    "serialize": "serializers",
+    "render": "JSON render",
+    "stripe": "Stripe",
+    "stream": "Cloudflare Stream",
+    "brevo": "Brevo",
+    "sign": "RS256 signing",
+}
+
+
+class RequestMetrics:
+    __slots__ = ("start", "durations", "counts", "active")
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.durations: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.active: set[str] = set()
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+class timed:
+    """
+    `with timed("stripe"): ...` ou `@timed("stream")` ; sans effet hors d'une requête instrumentée.
+    Blocs imbriqués sous le même nom (serializer dans un serializer) : seul l'extérieur compte.
+    """
+    __slots__ = ("name", "_metrics", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._metrics = None
+
+    def __enter__(self):
+        metrics = _current.get()
+        if metrics is not None and self.name not in metrics.active:
+            metrics.active.add(self.name)
+            self._metrics, self._start = metrics, perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        metrics, self._metrics = self._metrics, None
+        if metrics is not None:
+            metrics.active.discard(self.name)
+            metrics.add(self.name, perf_counter() - self._start)
+
+    def __call__(self, fn):
+        name = self.name
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class TimedSerializerMixin:
+    """À placer avant le (Model)Serializer : to_representation compté dans "serialize"."""
+
+    def to_representation(self, instance):
+        with timed("serialize"):
+            return super().to_representation(instance)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add("db", perf_counter() - start)
+
+
+def _install_sql_wrapper(connection):
+    # posé une fois par connexion (et par thread) : un simple ContextVar.get() hors requête
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_sql_wrapper(connection)
+
+
+connection_created.connect(_on_connection_created)
+
+
+def _resolved_user(request):
+    """
+    Utilisateur déjà résolu par la vue (JWT posé par DRF, session lue par l'admin), sinon None.
+    L'utilisateur de session encore paresseux n'est jamais évalué ici : requête SQL en plus,
+    et SynchronousOnlyOperation dans __acall__ (vues async, webhooks, 404 avec cookie de session).
+    """
+    user = getattr(request, "user", None)
+    if isinstance(user, SimpleLazyObject):
+        if user._wrapped is empty:
+            return None
+        user = user._wrapped
+    return user if user is not None and user.is_authenticated else None
+
+
+def _can_see_header(request) -> bool:
+    if settings.DEBUG:
+        return True
+    token = getattr(settings, "SERVER_TIMING_TOKEN", "")
+    if token and hmac.compare_digest(request.META.get(TOKEN_HEADER, ""), token):
+        return True
+    user = _resolved_user(request)
+    return bool(user is not None and user.is_staff)
+
+
+def server_timing_header(metrics: RequestMetrics, total: float) -> str:
+    parts = []
+    for name, label in METRICS.items():
+        if name in metrics.durations:
+            if name == "db":
+                label = f"{metrics.counts['db']} queries"
+            parts.append(f'{name};dur={metrics.durations[name] * 1000:.1f};desc="{label}"')
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def log_line(request, response, metrics: RequestMetrics, total: float) -> str:
+    user = _resolved_user(request)
+    match = getattr(request, "resolver_match", None)
+    line = {
+        "event": "request",
+        "method": request.method,
+        "route": match.route if match else None,
+        "path": request.path,
+        "status": response.status_code,
+        # str : même forme pour User et TokenUser (claim)
+        "user": str(user.pk) if user is not None else None,
+        "dur_ms": round(total * 1000, 1),
+        "db_queries": metrics.counts.get("db", 0),
+    }
+    for name in METRICS:
+        if name in metrics.durations:
+            line[f"{name}_ms"] = round(metrics.durations[name] * 1000, 1)
+    return json.dumps(line, separators=(",", ":"))
+
+
+class ServerTimingMiddleware:
+    """Après WhiteNoise (fichiers statiques non mesurés). Vues sync et async."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        for connection in connections.all(initialized_only=True):
+            _install_sql_wrapper(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    def _finish(self, request, response, metrics: RequestMetrics):
+        total = perf_counter() - metrics.start
+        if _can_see_header(request):
+            response["Server-Timing"] = server_timing_header(metrics, total)
+            # jamais partagé par un cache (réponses publiques du catalogue, cf. catalog.cdn)
+            patch_cache_control(response, private=True)
+            for header in EDGE_HEADERS:
+                if header in response:
+                    del response[header]
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(log_line(request, response, metrics, total))
+        return response
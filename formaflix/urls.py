@@ -26,6 +26,14 @@ from django.conf.urls.static import static
 
 from quizzes.views import QuizDetailView, QuizSubmitView
 
+progress_view = ProgressUpsertView.as_view()
+if settings.ASYNC_VIEWS:
+    # mode ASGI : mêmes routes, vues Django async (I/O externes sans bloquer de worker)
+    from learning.async_views import cf_stream_webhook, progress_upsert as progress_view  # noqa: F811
+    from payments.async_views import (  # noqa: F811
+        create_checkout_session, checkout_session_status, checkout_session_status_wait,
+    )
+
 router = DefaultRouter()
 router.register(r"catalog/courses", CourseViewSet, basename="course")
 
@@ -47,7 +55,7 @@ urlpatterns = [
 # Learning
     path("api/learning/my-library/", MyLibraryView.as_view()),
     path("api/learning/my-list/", MyListView.as_view()),
-    path("api/learning/progress/", ProgressUpsertView.as_view()),
+    path("api/learning/progress/", progress_view),
     path("api/learning/continue-watching/", ContinueWatchingView.as_view()),
     path("api/catalog/rate/", rate_course),
     path("api/stream/webhook/", cf_stream_webhook),
@@ -65,6 +73,11 @@ urlpatterns = [
 
 ]
 
+# Long-poll du statut de commande : ASGI seulement (en WSGI, une attente de 25 s bloquerait
+# un worker sync entier, webhook Stripe compris) → le front fait du short-poll sur session-status/
+if settings.ASYNC_VIEWS:
+    urlpatterns.append(path("api/payments/session-status/wait/", checkout_session_status_wait))
+
 from django.conf import settings
 from django.views.static import serve as media_serve
 from django.urls import re_path
@@ -0,0 +1,25 @@
+# gunicorn.conf.py — lu automatiquement par gunicorn (Procfile : web)
+# SERVER_MODE=wsgi (défaut) : workers sync classiques.
+# SERVER_MODE=asgi : workers uvicorn, vues async (ASYNC_VIEWS) pour les appels Stripe / Brevo / Cloudflare.
+import os
+
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+if SERVER_MODE == "asgi":
+    wsgi_app = "formaflix.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+else:
+    wsgi_app = "formaflix.wsgi:application"
+    workers = int(os.getenv("WEB_CONCURRENCY", "3"))
+
+timeout = 30
+
+
+def worker_exit(server, worker):
+    # téléchargements de documents encore en mémoire (écrits par lots) : pas de perte au redémarrage
+    # (non appelé sur SIGKILL : voir la fenêtre de perte dans learning/services/document_downloads.py)
+    from learning.services.document_downloads import flush_downloads
+    flush_downloads()
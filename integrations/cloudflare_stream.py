@@ -5,7 +5,9 @@ import requests
 import jwt
 from django.conf import settings
 
-CF_API = "https://api.cloudflare.com/client/v4"
+from formaflix.timing import timed
+
+CF_API = getattr(settings, "CF_STREAM_API_BASE", "https://api.cloudflare.com/client/v4").rstrip("/")
 ACCOUNT_ID = settings.CF_STREAM_ACCOUNT_ID
 TOKEN = settings.CF_STREAM_API_TOKEN
 
@@ -19,6 +21,7 @@ def _require_signed_default() -> bool:
     except Exception:
         return True
 
+@timed("stream")
 def create_video_from_url(source_url: str, *, require_signed: bool | None = None, meta: dict | None = None):
     """
     Crée une vidéo dans Stream en copiant depuis une URL.
@@ -91,7 +94,8 @@ def sign_playback_token(subject_uid: str, *, expire_s: int = 3600) -> str:
     }
     headers = {"kid": kid}
 
-    token = jwt.encode(payload, private_pem, algorithm="RS256", headers=headers)
+    with timed("sign"):
+        token = jwt.encode(payload, private_pem, algorithm="RS256", headers=headers)
     return token if isinstance(token, str) else token.decode("utf-8")
 
 def playback_hls_url(playback_id: str, token: str | None = None) -> str:
@@ -110,6 +114,7 @@ def playback_hls_url(playback_id: str, token: str | None = None) -> str:
 #  Optionnel: changer requireSignedURLs d'une vidéo existante
 # ---------------------------
 
+@timed("stream")
 def update_video_require_signed(uid: str, require_signed: bool) -> dict:
     """
     Permet de modifier requireSignedURLs d'un asset existant.
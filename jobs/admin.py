@@ -0,0 +1,44 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from .models import Job, PeriodicJob
+from .queue import enqueue
+from .registry import REGISTRY
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "priority", "attempts", "run_at", "locked_by", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "last_error")
+    readonly_fields = ("name", "args", "kwargs", "unique_key", "attempts", "locked_by", "locked_at",
+                       "last_error", "created_at", "finished_at")
+    actions = ["retry_jobs", "cancel_jobs"]
+
+    @admin.action(description="Relancer maintenant")
+    def retry_jobs(self, request, queryset):
+        n = 0
+        for job in queryset.filter(status__in=("failed", "cancelled", "done")):
+            task = REGISTRY.get(job.name)
+            if task:
+                enqueue(task, job.args, job.kwargs)
+                n += 1
+        n += queryset.filter(status="queued").update(run_at=timezone.now())
+        messages.success(request, f"{n} job(s) remis en file.")
+
+    @admin.action(description="Annuler")
+    def cancel_jobs(self, request, queryset):
+        n = queryset.filter(status="queued").update(status="cancelled", finished_at=timezone.now())
+        messages.success(request, f"{n} job(s) annulé(s).")
+
+
+@admin.register(PeriodicJob)
+class PeriodicJobAdmin(admin.ModelAdmin):
+    list_display = ("name", "interval_seconds", "enabled", "next_run_at", "last_enqueued_at")
+    list_editable = ("enabled",)
+    actions = ["run_now"]
+
+    @admin.action(description="Planifier maintenant")
+    def run_now(self, request, queryset):
+        n = queryset.update(next_run_at=timezone.now())
+        messages.success(request, f"{n} tâche(s) planifiée(s).")
@@ -0,0 +1,73 @@
+# jobs/management/commands/run_workers.py
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.queue import claim_next, requeue_stale_jobs, run_job, schedule_due_periodic_jobs, sync_periodic_jobs
+
+logger = logging.getLogger("jobs.worker")
+
+
+class Command(BaseCommand):
+    help = "Exécute les jobs en file (threads), planifie les tâches périodiques."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOBS_CONCURRENCY", "4")))
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Attente (s) quand la file est vide.")
+        parser.add_argument("--no-scheduler", action="store_true",
+                            help="Ne planifie pas les tâches périodiques (autre worker dédié).")
+
+    def handle(self, *args, **opts):
+        stop = threading.Event()
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        def _stop(signum, frame):
+            self.stdout.write("Arrêt demandé, fin des jobs en cours…")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+        def work(worker_id):
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    job = claim_next(worker_id)
+                    if job:
+                        run_job(job)
+                        continue
+                except Exception:
+                    logger.exception("[%s] erreur de boucle, on continue", worker_id)
+                # petite gigue : les workers ne se réveillent pas tous ensemble
+                stop.wait(opts["poll_interval"] * random.uniform(0.8, 1.2))
+            close_old_connections()
+
+        def schedule():
+            sync_periodic_jobs()
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    schedule_due_periodic_jobs()
+                    requeue_stale_jobs()
+                except Exception:
+                    logger.exception("[scheduler] erreur, on continue")
+                stop.wait(5)
+            close_old_connections()
+
+        threads = [threading.Thread(target=work, args=(f"{prefix}:{i}",), name=f"job-worker-{i}")
+                   for i in range(opts["concurrency"])]
+        if not opts["no_scheduler"]:
+            threads.append(threading.Thread(target=schedule, name="job-scheduler"))
+        for t in threads:
+            t.start()
+        self.stdout.write(self.style.SUCCESS(f"{opts['concurrency']} worker(s) démarré(s) ({prefix})"))
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=1)
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:56
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def cancel_duplicate_running(apps, schema_editor):
+    # doublons déjà en cours (même tâche unique) : seul le plus récemment réclamé est gardé
+    Job = apps.get_model("jobs", "Job")
+    seen = set()
+    running = Job.objects.filter(status="running").exclude(unique_key="").order_by("-locked_at", "-pk")
+    for pk, key in running.values_list("pk", "unique_key"):
+        if key in seen:
+            Job.objects.filter(pk=pk).update(status="cancelled", finished_at=timezone.now())
+        seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_running, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'running'), models.Q(('unique_key', ''), _negated=True)), fields=('unique_key',), name='job_unique_running_key'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# jobs/models.py
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Tâche en file ; réclamée par run_workers via SELECT ... FOR UPDATE SKIP LOCKED."""
+    STATUS = [
+        ("queued", "queued"),
+        ("running", "running"),
+        ("done", "done"),
+        ("failed", "failed"),
+        ("cancelled", "cancelled"),
+    ]
+
+    name = models.CharField(max_length=200)  # nom de la @task
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)  # plus grand = plus urgent
+    status = models.CharField(max_length=10, choices=STATUS, default="queued")
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # tâches unique=True : au plus un job 'queued' et un job 'running' par clé (les doublons
+    # sont absorbés ; un job en file attend la fin de celui qui tourne)
+    unique_key = models.CharField(max_length=255, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)  # réclamation, puis battement de cœur
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_at", "priority"], name="job_due_idx")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["unique_key"],
+                condition=Q(status="queued") & ~Q(unique_key=""),
+                name="job_unique_queued_key",
+            ),
+            models.UniqueConstraint(
+                fields=["unique_key"],
+                condition=Q(status="running") & ~Q(unique_key=""),
+                name="job_unique_running_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class PeriodicJob(models.Model):
+    """Planification d'une @task(every=...) ; next_run_at avancé par le worker qui l'a mise en file."""
+    name = models.CharField(max_length=200, unique=True)
+    interval_seconds = models.PositiveIntegerField()
+    enabled = models.BooleanField(default=True)
+    next_run_at = models.DateTimeField(default=timezone.now)
+    last_enqueued_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} / {self.interval_seconds}s"
@@ -0,0 +1,178 @@
+# jobs/queue.py
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, PeriodicJob
+from .registry import REGISTRY, Task
+
+logger = logging.getLogger(__name__)
+
+# locked_at rafraîchi pendant l'exécution ; sans battement depuis JOB_STALE_MINUTES = worker mort
+# → remis en file (quelle que soit la durée du job)
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_MINUTES = 5
+BACKOFF_MAX_SECONDS = 3600
+
+
+def enqueue(task: Task, args=(), kwargs=None) -> Job | None:
+    """
+    Insère le job. Pour une tâche unique, un job déjà en attente avec la même clé est réutilisé.
+    """
+    kwargs = dict(kwargs or {})
+    delay = kwargs.pop("_delay", None)
+    priority = kwargs.pop("_priority", task.priority)
+    key = task.unique_key(args, kwargs)
+    if key:
+        existing = Job.objects.filter(unique_key=key, status="queued").first()
+        if existing:
+            return existing
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                name=task.name, args=list(args), kwargs=kwargs, priority=priority,
+                max_attempts=task.max_attempts, unique_key=key,
+                run_at=timezone.now() + (delay or timedelta(0)),
+            )
+    except IntegrityError:
+        # course avec un autre enqueue de la même tâche unique
+        return Job.objects.filter(unique_key=key, status="queued").first()
+
+
+def claim_next(worker_id: str) -> Job | None:
+    """
+    Réclame le job dû le plus prioritaire. SKIP LOCKED : les workers concurrents
+    passent aux lignes suivantes au lieu d'attendre (ignoré par SQLite, d'où l'UPDATE conditionnel).
+    Tâche unique déjà en cours (même clé) : le job en file attend qu'elle se termine.
+    """
+    now = timezone.now()
+    running = Job.objects.filter(status="running").exclude(unique_key="").values("unique_key")
+    try:
+        with transaction.atomic():
+            job = (Job.objects
+                   .select_for_update(skip_locked=True)
+                   .filter(status="queued", run_at__lte=now)
+                   .exclude(unique_key__in=running)
+                   .order_by("-priority", "run_at", "pk")
+                   .first())
+            if not job:
+                return None
+            claimed = Job.objects.filter(pk=job.pk, status="queued").update(
+                status="running", attempts=F("attempts") + 1, locked_by=worker_id, locked_at=now
+            )
+    except IntegrityError:
+        return None  # même clé réclamée au même instant par un autre worker
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+@contextmanager
+def _heartbeat(job_id: int):
+    """Rafraîchit locked_at toutes les JOB_HEARTBEAT_SECONDS tant que le job tourne (thread dédié)."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(JOB_HEARTBEAT_SECONDS):
+                Job.objects.filter(pk=job_id, status="running").update(locked_at=timezone.now())
+        except Exception:
+            logger.exception("heartbeat du job #%s interrompu", job_id)
+        finally:
+            connection.close()  # connexion propre à ce thread
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job: Job) -> bool:
+    """Exécute un job réclamé ; échec → nouvel essai avec backoff exponentiel, puis 'failed'."""
+    task = REGISTRY.get(job.name)
+    try:
+        if task is None:
+            raise LookupError(f"tâche inconnue: {job.name}")
+        with _heartbeat(job.pk):
+            task.fn(*job.args, **job.kwargs)
+    except Exception as e:
+        logger.exception("job %s #%s failed", job.name, job.pk)
+        retry = task is not None and job.attempts < job.max_attempts
+        fields = {"last_error": str(e)[:2000], "locked_by": "", "locked_at": None}
+        if retry:
+            delay = min(task.backoff_seconds * 2 ** (job.attempts - 1), BACKOFF_MAX_SECONDS)
+            fields.update(status="queued", run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            fields.update(status="failed", finished_at=timezone.now())
+        try:
+            with transaction.atomic():
+                Job.objects.filter(pk=job.pk).update(**fields)
+        except IntegrityError:
+            # un job identique (tâche unique) est déjà en attente : celui-ci est absorbé
+            Job.objects.filter(pk=job.pk).update(status="cancelled", finished_at=timezone.now(),
+                                                 last_error=fields["last_error"])
+        return False
+    Job.objects.filter(pk=job.pk).update(status="done", finished_at=timezone.now(), last_error="",
+                                         locked_by="", locked_at=None)
+    return True
+
+
+def sync_periodic_jobs():
+    """Crée / met à jour les planifications des @task(every=...) connues du registre."""
+    for t in REGISTRY.values():
+        if t.every:
+            PeriodicJob.objects.update_or_create(
+                name=t.name, defaults={"interval_seconds": int(t.every.total_seconds())}
+            )
+
+
+def schedule_due_periodic_jobs() -> int:
+    """Met en file les tâches périodiques échues ; SKIP LOCKED évite les doublons entre workers."""
+    now = timezone.now()
+    n = 0
+    with transaction.atomic():
+        due = (PeriodicJob.objects
+               .select_for_update(skip_locked=True)
+               .filter(enabled=True, next_run_at__lte=now))
+        for p in due:
+            task = REGISTRY.get(p.name)
+            if task is None:
+                continue
+            enqueue(task)
+            p.next_run_at = now + timedelta(seconds=p.interval_seconds)
+            p.last_enqueued_at = now
+            p.save(update_fields=["next_run_at", "last_enqueued_at"])
+            n += 1
+    return n
+
+
+def requeue_stale_jobs() -> int:
+    limit = timezone.now() - timedelta(minutes=JOB_STALE_MINUTES)
+    n = 0
+    for job in Job.objects.filter(status="running", locked_at__lt=limit):
+        try:
+            with transaction.atomic():
+                n += Job.objects.filter(pk=job.pk, status="running").update(status="queued", locked_by="")
+        except IntegrityError:
+            Job.objects.filter(pk=job.pk).update(status="cancelled", finished_at=timezone.now())
+    return n
+
+
+def run_pending(worker_id: str = "inline", limit: int = 100) -> int:
+    """Exécute les jobs dus dans le thread courant (tests, shell, admin)."""
+    done = 0
+    for _ in range(limit):
+        job = claim_next(worker_id)
+        if not job:
+            break
+        done += run_job(job)
+    return done
@@ -0,0 +1,55 @@
+# jobs/registry.py
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Callable
+from datetime import timedelta
+
+REGISTRY: dict[str, "Task"] = {}
+
+
+@dataclass
+class Task:
+    fn: Callable
+    name: str
+    priority: int = 0
+    max_attempts: int = 5
+    backoff_seconds: int = 30
+    unique: bool = False
+    every: timedelta | None = None
+
+    def __call__(self, *args, **kwargs):
+        return self.fn(*args, **kwargs)
+
+    def unique_key(self, args, kwargs) -> str:
+        if not self.unique:
+            return ""
+        raw = json.dumps([self.name, list(args), kwargs], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def enqueue(self, *args, **kwargs):
+        """Met la tâche en file (arguments JSON-sérialisables) ; options : _delay, _priority."""
+        from .queue import enqueue
+        return enqueue(self, args, kwargs)
+
+
+def task(name: str | None = None, *, priority: int = 0, max_attempts: int = 5,
+         backoff_seconds: int = 30, unique: bool = False, every: timedelta | None = None):
+    """
+    Déclare une tâche exécutable par run_workers.
+
+        @task(unique=True)
+        def process_pending_events(): ...
+
+        process_pending_events.enqueue()
+
+    unique=True : un seul job en attente par (tâche, arguments).
+    every=timedelta(...) : tâche périodique (sans arguments), planifiée par les workers.
+    """
+    def deco(fn):
+        t = Task(fn=fn, name=name or f"{fn.__module__}.{fn.__name__}", priority=priority,
+                 max_attempts=max_attempts, backoff_seconds=backoff_seconds,
+                 unique=unique or every is not None, every=every)
+        REGISTRY[t.name] = t
+        return t
+    return deco
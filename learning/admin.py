@@ -1,10 +1,21 @@
+import json
+
 from django.conf import settings
 from django.contrib import admin, messages
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.views.decorators.http import require_POST
 
+from catalog.models import Course
 from certificates.models import Certificate
-from .models import Lesson, Document, Enrollment, Progress, Favorite
-from .services.cloudflare_stream import create_direct_upload, create_from_url, get_asset, extract_playback_id, \
-    upload_file_to_direct_upload, upload_local_file_smart
+from .models import Lesson, Document, Enrollment, Progress, Favorite, StreamWebhookEvent, StreamUpload
+from .services.cloudflare_stream import create_direct_upload, create_from_url, create_tus_direct_upload, \
+    CF_DIRECT_UPLOAD_MAX_MB
+from .services.stream_ingest import enqueue_lesson_upload
+from .services.stream_sync import reconcile_stream_assets, sync_local_durations
+from .tasks import confirm_stream_asset, process_stream_uploads
 
 
 def _abs_media_url(request, f):
@@ -21,6 +32,86 @@ class LessonAdmin(admin.ModelAdmin):
     list_filter = ("course", "is_free_preview", "cf_ready")
     ordering = ("course", "order")
     actions = ["make_stream_upload_link", "send_to_cloudflare_from_url", "upload_local_file_to_stream", "refresh_stream_status"]
+    readonly_fields = ("stream_direct_upload",)
+
+    class Media:
+        js = ("learning/admin/stream_direct_upload.js",)
+
+    # --- ENVOI DIRECT NAVIGATEUR → STREAM (le fichier ne transite pas par Django) ---
+
+    @admin.display(description="Envoi direct vers Stream")
+    def stream_direct_upload(self, obj):
+        complete_url = ""
+        if obj and obj.pk:
+            complete_url = reverse("admin:learning_lesson_stream_direct_complete", args=[obj.pk])
+        return format_html(
+            '<div class="cf-direct-upload" data-start-url="{}" data-complete-url="{}" data-lesson-id="{}">'
+            '<input type="file" accept="video/*"> '
+            '<button type="button" class="button">Envoyer vers Stream</button> '
+            '<progress max="100" value="0" style="display:none"></progress> '
+            '<span class="cf-direct-upload-status"></span></div>',
+            reverse("admin:learning_lesson_stream_direct_start"), complete_url, getattr(obj, "pk", "") or "",
+        )
+
+    def get_urls(self):
+        urls = [
+            path("stream-direct-upload/",
+                 self.admin_site.admin_view(require_POST(self.stream_direct_start)),
+                 name="learning_lesson_stream_direct_start"),
+            path("<int:object_id>/stream-direct-upload/complete/",
+                 self.admin_site.admin_view(require_POST(self.stream_direct_complete)),
+                 name="learning_lesson_stream_direct_complete"),
+        ]
+        return urls + super().get_urls()
+
+    def stream_direct_start(self, request):
+        """
+        Délivre une URL d'upload à usage unique : POST simple (≤ seuil) ou TUS (au-delà).
+        body: {"size": <octets>, "name": "...", "lesson_id": <id|null>}
+        """
+        if not self.has_change_permission(request) and not self.has_add_permission(request):
+            return JsonResponse({"detail": "forbidden"}, status=403)
+        try:
+            body = json.loads(request.body or b"{}")
+            size = int(body.get("size") or 0)
+        except (ValueError, TypeError):
+            return JsonResponse({"detail": "invalid body"}, status=400)
+        if size <= 0:
+            return JsonResponse({"detail": "size required"}, status=400)
+
+        meta = {"kind": "lesson", "title": (body.get("name") or "")[:200]}
+        lesson_id = body.get("lesson_id")
+        if lesson_id:
+            meta["lesson_id"] = lesson_id
+        try:
+            if size <= CF_DIRECT_UPLOAD_MAX_MB * 1024 * 1024:
+                res = create_direct_upload(meta=meta, require_signed=True)
+                protocol = "post"
+            else:
+                res = create_tus_direct_upload(size, meta=meta, require_signed=True)
+                protocol = "tus"
+        except Exception as e:
+            return JsonResponse({"detail": str(e)}, status=502)
+
+        # on mémorise l'UID délivré pour n'accepter que lui à la complétion
+        issued = request.session.get("cf_direct_uploads", [])
+        request.session["cf_direct_uploads"] = (issued + [res["uid"]])[-20:]
+        return JsonResponse({"protocol": protocol, "uploadURL": res["uploadURL"], "uid": res["uid"]})
+
+    def stream_direct_complete(self, request, object_id):
+        lesson = get_object_or_404(Lesson, pk=object_id)
+        if not self.has_change_permission(request, lesson):
+            return JsonResponse({"detail": "forbidden"}, status=403)
+        try:
+            uid = json.loads(request.body or b"{}").get("uid") or ""
+        except ValueError:
+            uid = ""
+        if uid not in request.session.get("cf_direct_uploads", []):
+            return JsonResponse({"detail": "unknown upload"}, status=400)
+        Lesson.objects.filter(pk=lesson.pk).update(cf_uid=uid, cf_ready=False)
+        # webhook arrivé avant ce rattachement : ignoré (uid inconnu) → état relu chez Cloudflare
+        confirm_stream_asset.enqueue(uid)
+        return JsonResponse({"ok": True, "uid": uid})
 
     # --- ACTIONS ---
 
@@ -65,9 +156,9 @@ class LessonAdmin(admin.ModelAdmin):
         if ok:
             messages.success(request, f"Ingestion démarrée pour {ok} leçon(s).")
 
-    @admin.action(description="Uploader le fichier local → Cloudflare Stream (auto: Direct ou TUS)")
+    @admin.action(description="Uploader le fichier local → Cloudflare Stream (file d'attente TUS)")
     def upload_local_file_to_stream(self, request, queryset):
-        sent = 0
+        queued = 0
         for lesson in queryset:
             try:
                 if not lesson.video_file:
@@ -76,44 +167,32 @@ class LessonAdmin(admin.ModelAdmin):
                 if lesson.cf_uid:
                     messages.warning(request, f"[{lesson}] déjà envoyé (uid={lesson.cf_uid}).")
                     continue
-
-                meta = {"kind": "lesson", "lesson_id": lesson.id, "course_id": lesson.course_id, "title": lesson.title}
-                uid = upload_local_file_smart(lesson.video_file.path, meta=meta, require_signed=True)
-
-                lesson.cf_uid = uid
-                lesson.cf_ready = False
-                lesson.save(update_fields=["cf_uid", "cf_ready"])
-                messages.success(request, f"[{lesson}] envoyé vers Stream (UID={uid}).")
-                sent += 1
+                enqueue_lesson_upload(lesson)
+                queued += 1
             except Exception as e:
-                messages.error(request, f"[{lesson}] envoi échoué: {e}")
-        if sent:
+                messages.error(request, f"[{lesson}] mise en file échouée: {e}")
+        if queued:
+            # les envois tournent hors requête (manage.py run_workers), avec reprise sur offset
+            process_stream_uploads.enqueue()
             messages.success(request,
-                             f"{sent} fichier(s) envoyés. Utilise 'Rafraîchir statut' lorsque l'encodage est terminé.")
+                             f"{queued} envoi(s) en file. Suis la progression dans 'Stream uploads'.")
 
     @admin.action(description="Rafraîchir statut Cloudflare")
     def refresh_stream_status(self, request, queryset):
-        ok = 0
-        for lesson in queryset:
-            try:
-                if not lesson.cf_uid:
-                    continue
-                asset = get_asset(lesson.cf_uid)
-                pid = extract_playback_id(asset)
-                ready = (asset.get("status", {}).get("state") == "ready")
-                Lesson.objects.filter(pk=lesson.pk).update(
-                    cf_playback_id=pid or lesson.cf_playback_id,
-                    cf_ready=ready
-                )
-                ok += 1
-            except Exception as e:
-                messages.error(request, f"[{lesson}] refresh échec: {e}")
-        if ok:
-            messages.success(request, f"Statut mis à jour pour {ok} leçon(s).")
+        # petite sélection : un GET par asset ; sinon liste bornée à la sélection ; un bulk_update
+        try:
+            stats = reconcile_stream_assets(lessons=queryset, courses=Course.objects.none())
+        except Exception as e:
+            messages.error(request, f"refresh échec: {e}")
+            return
+        messages.success(request, f"Statut mis à jour pour {stats['lessons_updated']} leçon(s) "
+                                  f"({stats['matched']} asset(s) trouvés sur Stream).")
 
     # Auto-trigger existant : on le garde tel quel
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
+        if "video_file" in form.changed_data and obj.video_file:
+            sync_local_durations(Lesson.objects.filter(pk=obj.pk), force=True)
         if not obj.cf_uid and ("video_url" in form.changed_data or "video_file" in form.changed_data):
             src = obj.video_url or (obj.video_file and _abs_media_url(request, obj.video_file)) or ""
             if not src:
@@ -131,7 +210,8 @@ class LessonAdmin(admin.ModelAdmin):
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
-    list_display = ("course", "title", "file")
+    list_display = ("course", "title", "file", "download_count")
+    readonly_fields = ("download_count",)
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
@@ -147,6 +227,37 @@ class FavoriteAdmin(admin.ModelAdmin):
     list_display = ("user","course","created_at")
     search_fields = ("user__username","course__title")
 
+@admin.register(StreamUpload)
+class StreamUploadAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "status", "progress", "size_bytes", "attempts", "cf_uid", "updated_at")
+    list_filter = ("status",)
+    readonly_fields = ("tus_url", "cf_uid", "offset_bytes", "size_bytes", "attempts", "error")
+    actions = ["retry_uploads"]
+
+    @admin.display(description="Progression")
+    def progress(self, obj):
+        return f"{obj.progress_percent}%"
+
+    @admin.action(description="Relancer les envois en échec (reprise depuis l'offset)")
+    def retry_uploads(self, request, queryset):
+        # 'uploading' : déjà entre les mains d'un worker (repris par la file si périmé)
+        n = queryset.filter(status="failed").update(status="queued", attempts=0, error="")
+        process_stream_uploads.enqueue()
+        messages.success(request, f"{n} envoi(s) relancé(s).")
+
+    def changelist_view(self, request, extra_context=None):
+        resp = super().changelist_view(request, extra_context)
+        # rafraîchit la liste tant que des envois sont en cours (progression en direct)
+        if StreamUpload.objects.filter(status__in=("queued", "uploading")).exists():
+            resp["Refresh"] = "5"
+        return resp
+
+@admin.register(StreamWebhookEvent)
+class StreamWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("cf_uid", "ready", "received_at", "confirmed_at")
+    list_filter = ("ready",)
+    search_fields = ("cf_uid",)
+
 @admin.register(Certificate)
 class CertificateAdmin(admin.ModelAdmin):
     list_display = ("user","course","filename","created_at")
@@ -0,0 +1,55 @@
+# learning/async_views.py
+# Variantes async (ASYNC_VIEWS, mode ASGI) du heartbeat de progression et du webhook Stream.
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, HttpResponseNotAllowed, JsonResponse
+
+from accounts.authentication import async_jwt_required
+from formaflix.throttling import get_bucket, user_ident
+from .progress import LESSON_NOT_FOUND, NOT_ENROLLED, arecord_progress
+from .serializers import ProgressUpsertSerializer
+from .services.stream_sync import InvalidWebhookPayload, handle_stream_webhook, webhook_authorized
+from .tasks import confirm_stream_asset
+
+
+@async_jwt_required(("PATCH",), stateless=True)
+async def progress_upsert(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "invalid json"}, status=400)
+    ser = ProgressUpsertSerializer(data=data)
+    if not ser.is_valid():
+        return JsonResponse(ser.errors, status=400)
+    v = ser.validated_data
+
+    # même seau que ProgressUpsertView : au-delà, le heartbeat est coalescé (flush ignoré)
+    wait = await sync_to_async(get_bucket("progress").consume, thread_sensitive=False)(
+        user_ident(request.user.id))
+    refused = await arecord_progress(request.user.id, v["course_id"], v["lesson_id"],
+                                     v["position_seconds"], v.get("completed", False),
+                                     v.get("flush", False) and not wait, v.get("duration_seconds"))
+    if refused == NOT_ENROLLED:
+        return JsonResponse({"detail": NOT_ENROLLED}, status=403)
+    if refused == LESSON_NOT_FOUND:
+        return JsonResponse({"detail": LESSON_NOT_FOUND}, status=404)
+    return JsonResponse({"ok": True})
+
+
+async def cf_stream_webhook(request, secret=None):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    if not webhook_authorized(request, secret):  # HMAC, sans I/O
+        return HttpResponseForbidden("bad signature")
+    try:
+        body, confirm_uid, event_id = await sync_to_async(handle_stream_webhook)(request.body)
+    except InvalidWebhookPayload:
+        return HttpResponseBadRequest("invalid json")
+
+    if confirm_uid:
+        await sync_to_async(confirm_stream_asset.enqueue)(confirm_uid, event_id)
+    return JsonResponse(body)
+
+
+cf_stream_webhook.csrf_exempt = True
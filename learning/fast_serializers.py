@@ -0,0 +1,43 @@
+# learning/fast_serializers.py
+# Chemin rapide des listes « ma bibliothèque », « ma liste » et « reprendre » :
+# mêmes formes JSON que MyLibraryItemSerializer / FavoriteSerializer / ContinueWatchingItemSerializer.
+# ?fields= / ?omit= appliqués comme sur les serializers (cours imbriqué : "course.<champ>").
+from rest_framework import serializers
+
+from catalog.fast_serializers import course_cards_by_id
+from formaflix.sparse_fields import get_sparse
+from formaflix.timing import timed
+
+# représentation DRF des dates (fuseau courant, "Z" en UTC), sans champ lié à un serializer
+_datetime = serializers.DateTimeField()
+
+
+@timed("serialize")
+def _items(rows: list[dict], names: tuple, request, build: dict) -> list[dict]:
+    sparse = get_sparse(request)
+    if sparse:
+        names = sparse.allowed((), names)
+    # cours non demandé : pas de requête sur les cartes
+    cards = course_cards_by_id([r["course_id"] for r in rows], request) if "course" in names else {}
+    build = {**build, "course": lambda r: cards[r["course_id"]]}
+    return [{n: build[n](r) if n in build else r[n] for n in names}
+            for r in rows if "course" not in names or r["course_id"] in cards]
+
+
+def library_items(enrollments, request=None) -> list[dict]:
+    rows = list(enrollments.values("id", "purchased_at", "course_id"))
+    return _items(rows, ("id", "purchased_at", "course"), request, {
+        "purchased_at": lambda r: _datetime.to_representation(r["purchased_at"]),
+    })
+
+
+def favorite_items(favorites, request=None) -> list[dict]:
+    rows = list(favorites.values("id", "course_id", "created_at"))
+    return _items(rows, ("id", "course", "created_at"), request, {
+        "created_at": lambda r: _datetime.to_representation(r["created_at"]),
+    })
+
+
+def continue_watching_items(items: list[dict], request=None) -> list[dict]:
+    """items : {"course_id", "percent", "resume_lesson_id", "resume_position_seconds"}."""
+    return _items(items, ("course", "percent", "resume_lesson_id", "resume_position_seconds"), request, {})
@@ -0,0 +1,47 @@
+# learning/management/commands/fake_stream_server.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from learning.services.fake_stream import FakeStreamServer
+
+
+class Command(BaseCommand):
+    help = "Lance un serveur Cloudflare Stream factice (tests / benchmarks hors ligne)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8787)
+        parser.add_argument("--account-id", default="fake-account")
+        parser.add_argument("--latency-ms", default="0:0", help="Latence injectée min:max (ms).")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Part de réponses 503 (0..1).")
+        parser.add_argument("--encode-seconds", type=float, default=2.0, help="Délai avant 'ready'.")
+        parser.add_argument("--webhook-url", default=None, help="URL appelée quand un asset devient prêt.")
+        parser.add_argument("--webhook-secret", default=None,
+                            help="Clé de signature des webhooks (défaut : CF_STREAM_WEBHOOK_SIGNING_SECRET).")
+        parser.add_argument("--seed", type=int, default=0, help="Nombre d'assets 'ready' pré-créés.")
+
+    def handle(self, *args, **opts):
+        try:
+            lo, hi = (int(x) for x in opts["latency_ms"].split(":"))
+        except ValueError:
+            raise CommandError("--latency-ms attend min:max, ex: 20:80")
+
+        server = FakeStreamServer(
+            host=opts["host"], port=opts["port"], account_id=opts["account_id"],
+            latency_ms=(lo, hi), failure_rate=opts["failure_rate"],
+            encode_seconds=opts["encode_seconds"], webhook_url=opts["webhook_url"],
+            webhook_secret=opts["webhook_secret"] or settings.CF_STREAM_WEBHOOK_SIGNING_SECRET or None,
+        ).start()
+        if opts["seed"]:
+            server.seed_assets(opts["seed"])
+
+        self.stdout.write(self.style.SUCCESS(f"Fake Stream sur {server.origin}"))
+        self.stdout.write(f"  export CF_STREAM_API_BASE={server.api_root}")
+        self.stdout.write(f"  export CF_STREAM_ACCOUNT_ID={server.account_id}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
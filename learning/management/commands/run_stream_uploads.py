@@ -0,0 +1,24 @@
+# learning/management/commands/run_stream_uploads.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from learning.services.stream_ingest import process_upload_queue, CF_UPLOAD_CONCURRENCY
+
+
+class Command(BaseCommand):
+    help = "Traite la file d'envois vers Cloudflare Stream (TUS, reprise sur offset, en parallèle)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=CF_UPLOAD_CONCURRENCY)
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Pause entre deux passes (--loop).")
+
+    def handle(self, *args, **opts):
+        while True:
+            done = process_upload_queue(concurrency=opts["concurrency"])
+            if done:
+                self.stdout.write(self.style.SUCCESS(f"{done} upload(s) terminé(s)"))
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
@@ -0,0 +1,19 @@
+# learning/management/commands/sync_lesson_durations.py
+from django.core.management.base import BaseCommand
+
+from learning.services.stream_sync import reconcile_stream_assets, sync_local_durations
+
+
+class Command(BaseCommand):
+    help = "Renseigne Lesson.duration_seconds depuis Stream (métadonnées des assets) et les fichiers locaux."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--local-only", action="store_true", help="Ne sonde que les video_file locaux.")
+        parser.add_argument("--force", action="store_true", help="Re-sonde aussi les durées déjà connues.")
+
+    def handle(self, *args, **opts):
+        if not opts["local_only"]:
+            stats = reconcile_stream_assets()
+            self.stdout.write(f"Stream : {stats['lessons_updated']} leçon(s) mises à jour")
+        n = sync_local_durations(force=opts["force"])
+        self.stdout.write(self.style.SUCCESS(f"Fichiers locaux : {n} durée(s) renseignée(s)"))
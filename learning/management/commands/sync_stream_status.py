@@ -0,0 +1,23 @@
+# learning/management/commands/sync_stream_status.py
+from django.core.management.base import BaseCommand
+
+from learning.services.stream_sync import reconcile_stream_assets
+
+
+class Command(BaseCommand):
+    help = "Réconcilie cf_ready / cf_playback_id / durées avec l'API de liste Cloudflare Stream."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--status", default=None,
+                            help="Filtre Cloudflare: pendingupload, queued, inprogress, ready, error…")
+        parser.add_argument("--since", default=None,
+                            help="Seulement les assets créés après cette date (ISO 8601).")
+        parser.add_argument("--dry-run", action="store_true", help="N'écrit rien en base.")
+
+    def handle(self, *args, **opts):
+        stats = reconcile_stream_assets(status=opts["status"], since=opts["since"], dry_run=opts["dry_run"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['assets']} asset(s) parcourus, {stats['matched']} associés, "
+            f"{stats['lessons_updated']} leçon(s) et {stats['courses_updated']} bande(s)-annonce mises à jour"
+            + (" (dry-run)" if opts["dry_run"] else "")
+        ))
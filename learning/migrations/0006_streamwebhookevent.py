@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0005_lesson_cf_playback_id_lesson_cf_ready_lesson_cf_uid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamWebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_key', models.CharField(max_length=64, unique=True)),
+                ('cf_uid', models.CharField(db_index=True, max_length=64)),
+                ('ready', models.BooleanField(default=False)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0006_streamwebhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=500)),
+                ('size_bytes', models.PositiveBigIntegerField(default=0)),
+                ('offset_bytes', models.PositiveBigIntegerField(default=0)),
+                ('tus_url', models.URLField(blank=True, max_length=500)),
+                ('cf_uid', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'queued'), ('uploading', 'uploading'), ('done', 'done'), ('failed', 'failed')], db_index=True, default='queued', max_length=20)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stream_uploads', to='learning.lesson')),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
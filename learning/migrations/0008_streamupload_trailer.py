@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_course_trailer_cf_playback_id_and_more'),
+        ('learning', '0007_streamupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='streamupload',
+            name='course',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trailer_uploads', to='catalog.course'),
+        ),
+        migrations.AlterField(
+            model_name='streamupload',
+            name='lesson',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stream_uploads', to='learning.lesson'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:24
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_download_count(apps, schema_editor):
+    # compteur initial = lignes existantes (avant dédoublonnage, comme l'historique l'a enregistré)
+    Document = apps.get_model("learning", "Document")
+    DocumentDownload = apps.get_model("learning", "DocumentDownload")
+    for row in DocumentDownload.objects.values("document_id").annotate(n=Count("id")):
+        Document.objects.filter(pk=row["document_id"]).update(download_count=row["n"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0008_streamupload_trailer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='documentdownload',
+            name='downloaded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='documentdownload',
+            index=models.Index(fields=['enrollment', 'downloaded_at'], name='docdl_enrollment_at_idx'),
+        ),
+        migrations.RunPython(backfill_download_count, migrations.RunPython.noop),
+    ]
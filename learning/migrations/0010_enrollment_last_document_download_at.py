@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learning', '0009_document_download_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_document_download_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
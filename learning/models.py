@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from catalog.models import Course
 
 class Lesson(models.Model):
@@ -27,16 +28,18 @@ class Lesson(models.Model):
         return f"{self.course.title} - {self.order}. {self.title}"
 
     def clean(self):
-        # au moins un des deux doit être renseigné
-        if not self.video_file and not self.video_url:
+        # au moins une source : fichier, URL, ou asset Stream (envoi direct navigateur)
+        if not self.video_file and not self.video_url and not self.cf_uid:
             from django.core.exceptions import ValidationError
-            raise ValidationError("Fournis soit 'video_file' soit 'video_url'.")
+            raise ValidationError("Fournis soit 'video_file' soit 'video_url' (ou un envoi direct Stream).")
 
 
 class Document(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="documents")
     title = models.CharField(max_length=200)
     file = models.FileField(upload_to="docs/")  # supports, PDF, etc.
+    # téléchargements dédoublonnés (1 par inscription et par fenêtre), incrémenté par lots
+    download_count = models.PositiveIntegerField(default=0, editable=False)
 
 
 class Enrollment(models.Model):
@@ -44,6 +47,8 @@ class Enrollment(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="enrollments")
     purchased_at = models.DateTimeField(auto_now_add=True)
     access_expires_at = models.DateTimeField(null=True, blank=True)
+    # dernier clic sur un document, y compris ceux dédoublonnés (débloque le repassage du quiz)
+    last_document_download_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ("user", "course")
@@ -71,7 +76,56 @@ class Favorite(models.Model):
 class DocumentDownload(models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name="document_downloads")
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="downloads")
-    downloaded_at = models.DateTimeField(auto_now_add=True)
+    downloaded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # quiz : « téléchargement après le dernier échec » pour une inscription
+        indexes = [models.Index(fields=["enrollment", "downloaded_at"], name="docdl_enrollment_at_idx")]
+
+    def __str__(self):
+        return f"{self.enrollment.user} -> {self.document.title} @ {self.downloaded_at}"
+
+class StreamWebhookEvent(models.Model):
+    """Journal des webhooks Cloudflare Stream (clé = hash du corps → redeliveries ignorées)."""
+    event_key = models.CharField(max_length=64, unique=True)
+    cf_uid = models.CharField(max_length=64, db_index=True)
+    ready = models.BooleanField(default=False)
+    received_at = models.DateTimeField(auto_now_add=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.cf_uid} ready={self.ready} @ {self.received_at}"
+
+
+class StreamUpload(models.Model):
+    """Job d'envoi d'un fichier local vers Cloudflare Stream (TUS, reprise sur offset).
+    Cible : une leçon (video_file) ou la bande-annonce d'un cours (trailer_file)."""
+    STATUS = [("queued", "queued"), ("uploading", "uploading"), ("done", "done"), ("failed", "failed")]
+
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name="stream_uploads",
+                               null=True, blank=True)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="trailer_uploads",
+                               null=True, blank=True)
+    file_path = models.CharField(max_length=500)
+    size_bytes = models.PositiveBigIntegerField(default=0)
+    offset_bytes = models.PositiveBigIntegerField(default=0)
+    tus_url = models.URLField(max_length=500, blank=True)  # Location TUS → reprise
+    cf_uid = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default="queued", db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["created_at"]
 
     def __str__(self):
-        return f"{self.enrollment.user} -> {self.document.title} @ {self.downloaded_at}"
\ No newline at end of file
+        target = self.lesson or f"Bande-annonce {self.course}"
+        return f"{target} [{self.status}] {self.progress_percent}%"
+
+    @property
+    def progress_percent(self) -> int:
+        if not self.size_bytes:
+            return 100 if self.status == "done" else 0
+        return min(100, int(100 * self.offset_bytes / self.size_bytes))
@@ -0,0 +1,152 @@
+# learning/progress.py
+# Chemin d'écriture unique de la progression (vue DRF, vue async, WebSocket du Player).
+import os
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from catalog.cdn import purge_courses
+from .models import Enrollment, Lesson, Progress
+
+NOT_ENROLLED = "not enrolled"
+LESSON_NOT_FOUND = "lesson not found"
+# issues d'un heartbeat accepté
+WRITTEN = "written"
+COALESCED = "coalesced"
+
+# au plus une écriture par (inscription, leçon) sur cet intervalle ; entre deux,
+# seule la position max est gardée en cache et reprise à l'écriture suivante
+PROGRESS_WRITE_INTERVAL = int(os.getenv("PROGRESS_WRITE_INTERVAL", "15"))
+# (user, cours, leçon) déjà vérifiés → id d'inscription, sans requête
+TARGET_TTL = 600
+# durée annoncée par le Player au-delà de laquelle on ne la croit pas (12 h)
+MAX_REPORTED_DURATION = 12 * 3600
+
+REFUSALS = (NOT_ENROLLED, LESSON_NOT_FOUND)
+
+
+def _target_key(user_id, course_id, lesson_id) -> str:
+    return f"progress:target:{user_id}:{course_id}:{lesson_id}"
+
+
+def _gate_key(enrollment_id, lesson_id) -> str:
+    return f"progress:gate:{enrollment_id}:{lesson_id}"
+
+
+def _pending_key(enrollment_id, lesson_id) -> str:
+    return f"progress:pending:{enrollment_id}:{lesson_id}"
+
+
+def _duration_key(lesson_id) -> str:
+    return f"progress:duration:{lesson_id}"
+
+
+def _unknown_remote_duration(lesson_id):
+    # seules les leçons servies par video_url n'ont aucune source serveur (ni Stream, ni fichier)
+    return (Lesson.objects.filter(pk=lesson_id, duration_seconds=0, cf_ready=False, video_file="")
+            .exclude(video_url=""))
+
+
+def _plausible(duration, position: int) -> bool:
+    return bool(duration) and position <= duration <= MAX_REPORTED_DURATION
+
+
+def report_duration(course_id: int, lesson_id: int, duration: int | None, position: int = 0):
+    """
+    Durée vue par le Player, retenue une seule fois pour une leçon video_url encore à 0.
+    Au plus un UPDATE par leçon et par TARGET_TTL (marqueur en cache), quel que soit le trafic.
+    """
+    if not _plausible(duration, position) or not cache.add(_duration_key(lesson_id), 1, TARGET_TTL):
+        return
+    if _unknown_remote_duration(lesson_id).update(duration_seconds=duration):
+        purge_courses([course_id])
+
+
+async def areport_duration(course_id: int, lesson_id: int, duration: int | None, position: int = 0):
+    if not _plausible(duration, position) or not await cache.aadd(_duration_key(lesson_id), 1, TARGET_TTL):
+        return
+    if await _unknown_remote_duration(lesson_id).aupdate(duration_seconds=duration):
+        await sync_to_async(purge_courses)([course_id])
+
+
+def _apply(prog: Progress, position: int, completed: bool):
+    # la durée d'une leçon vient de Stream (webhook / réconciliation) ou du fichier local ;
+    # celle du Player ne sert qu'une fois, pour les leçons video_url (report_duration)
+    prog.position_seconds = max(prog.position_seconds or 0, position)
+    if completed:
+        prog.completed = True
+
+
+def resolve_enrollment(user_id: int, course_id: int, lesson_id: int) -> int | str:
+    """Id d'inscription pour (user, cours, leçon), ou le motif de refus."""
+    key = _target_key(user_id, course_id, lesson_id)
+    enrollment_id = cache.get(key)
+    if enrollment_id:
+        return enrollment_id
+    enrollment_id = (Enrollment.objects.filter(user_id=user_id, course_id=course_id)
+                     .values_list("id", flat=True).first())
+    if not enrollment_id:
+        return NOT_ENROLLED
+    if not Lesson.objects.filter(pk=lesson_id, course_id=course_id).exists():
+        return LESSON_NOT_FOUND
+    cache.set(key, enrollment_id, TARGET_TTL)
+    return enrollment_id
+
+
+def record_progress(user_id: int, course_id: int, lesson_id: int, position: int,
+                    completed: bool = False, flush: bool = False, duration: int | None = None) -> str:
+    """
+    Enregistre un heartbeat. Retourne WRITTEN, COALESCED, ou le motif de refus
+    (NOT_ENROLLED / LESSON_NOT_FOUND).
+    Hors completion et `flush` (pause, fermeture), un heartbeat arrivant moins de
+    PROGRESS_WRITE_INTERVAL s après la dernière écriture ne touche pas la base.
+    `duration` : durée vue par le Player (cf. report_duration), lue sur les seules écritures.
+    """
+    enrollment_id = resolve_enrollment(user_id, course_id, lesson_id)
+    if enrollment_id in REFUSALS:
+        return enrollment_id
+    position = max(0, position)
+    pending_key = _pending_key(enrollment_id, lesson_id)
+    if not (completed or flush) and not cache.add(_gate_key(enrollment_id, lesson_id), 1,
+                                                  PROGRESS_WRITE_INTERVAL):
+        if position > (cache.get(pending_key) or 0):
+            cache.set(pending_key, position, PROGRESS_WRITE_INTERVAL * 4)
+        return COALESCED
+    position = max(position, cache.get(pending_key) or 0)
+    cache.delete(pending_key)
+    report_duration(course_id, lesson_id, duration, position)
+
+    prog, _ = Progress.objects.get_or_create(enrollment_id=enrollment_id, lesson_id=lesson_id)
+    _apply(prog, position, completed)
+    prog.save()  # toujours : updated_at désigne la leçon en cours (reprise)
+    return WRITTEN
+
+
+async def arecord_progress(user_id: int, course_id: int, lesson_id: int, position: int,
+                           completed: bool = False, flush: bool = False, duration: int | None = None) -> str:
+    """Version async (ORM et cache async) de record_progress."""
+    key = _target_key(user_id, course_id, lesson_id)
+    enrollment_id = await cache.aget(key)
+    if not enrollment_id:
+        enrollment_id = await (Enrollment.objects.filter(user_id=user_id, course_id=course_id)
+                               .values_list("id", flat=True).afirst())
+        if not enrollment_id:
+            return NOT_ENROLLED
+        if not await Lesson.objects.filter(pk=lesson_id, course_id=course_id).aexists():
+            return LESSON_NOT_FOUND
+        await cache.aset(key, enrollment_id, TARGET_TTL)
+    position = max(0, position)
+    pending_key = _pending_key(enrollment_id, lesson_id)
+    if not (completed or flush) and not await cache.aadd(_gate_key(enrollment_id, lesson_id), 1,
+                                                         PROGRESS_WRITE_INTERVAL):
+        if position > (await cache.aget(pending_key) or 0):
+            await cache.aset(pending_key, position, PROGRESS_WRITE_INTERVAL * 4)
+        return COALESCED
+    position = max(position, await cache.aget(pending_key) or 0)
+    await cache.adelete(pending_key)
+    await areport_duration(course_id, lesson_id, duration, position)
+
+    prog, _ = await Progress.objects.aget_or_create(enrollment_id=enrollment_id, lesson_id=lesson_id)
+    _apply(prog, position, completed)
+    await prog.asave()
+    return WRITTEN
@@ -0,0 +1,215 @@
+# learning/progress_socket.py
+# WebSocket du Player (mode ASGI) : une authentification par session de lecture, puis des trames
+# de position compactes au lieu d'un PATCH /api/learning/progress/ toutes les 5 s.
+#
+# client → serveur
+#   {"t":"auth","token":"<access JWT>"}            1re trame, obligatoire
+#   {"t":"lesson","course":12,"lesson":34}         leçon en cours (répond "resume")
+#   "125"                                          position en secondes (heartbeat)
+#   {"t":"flush","pos":125,"dur":600}              pause / onglet masqué : écriture immédiate
+#   {"t":"done","pos":600,"dur":600}               fin de la leçon ("dur" : durée vue par le Player)
+# serveur → client
+#   {"t":"ready"} · {"t":"resume","lesson":34,"pos":120,"done":false}
+#   {"t":"ack","pos":125}                          point de reprise écrit en base
+#   {"t":"state","lesson":34,"done":true,"percent":80,"quiz":true}
+#   {"t":"error","detail":"..."}
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from accounts.authentication import aauthenticate_token
+from formaflix.throttling import get_bucket, user_ident
+from quizzes.models import Quiz
+from quizzes.utils import retake_block
+from .models import Enrollment, Progress
+from .progress import REFUSALS, WRITTEN, record_progress, resolve_enrollment
+from .utils import compute_enrollment_percent
+
+logger = logging.getLogger(__name__)
+
+PATH = "/ws/learning/progress/"
+AUTH_TIMEOUT = 10
+MAX_FRAME = 512
+# fermetures applicatives (plage 4000-4999)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+
+
+def _db(fn):
+    # hors cycle requête/réponse, Django ne ferme jamais les connexions : on le fait à chaque appel
+    def inner(*args, **kwargs):
+        close_old_connections()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(inner)
+
+
+def _resume_point(user_id: int, course_id: int, lesson_id: int) -> dict | str:
+    enrollment_id = resolve_enrollment(user_id, course_id, lesson_id)
+    if enrollment_id in REFUSALS:
+        return enrollment_id
+    prog = (Progress.objects.filter(enrollment_id=enrollment_id, lesson_id=lesson_id)
+            .values("position_seconds", "completed").first()) or {}
+    return {"enrollment_id": enrollment_id, "pos": prog.get("position_seconds") or 0,
+            "done": bool(prog.get("completed"))}
+
+
+def _course_state(enrollment_id: int) -> dict:
+    enrollment = Enrollment.objects.select_related("course").get(pk=enrollment_id)
+    percent = compute_enrollment_percent(enrollment)
+    quiz = Quiz.objects.filter(course_id=enrollment.course_id).first()
+    return {"percent": percent,
+            "quiz": bool(quiz) and retake_block(enrollment, quiz, percent) is None}
+
+
+_record = _db(record_progress)
+_consume = sync_to_async(lambda ident: get_bucket("progress").consume(ident), thread_sensitive=False)
+_resume = _db(_resume_point)
+_state = _db(_course_state)
+
+
+def _parse(text: str):
+    text = text.strip()
+    if text.isdigit():
+        return {"t": "p", "pos": int(text)}
+    try:
+        frame = json.loads(text)
+    except ValueError:
+        return None
+    return frame if isinstance(frame, dict) else None
+
+
+def _int(value) -> int | None:
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class ProgressSession:
+    def __init__(self, send):
+        self.send_raw = send
+        self.user_id = None
+        self.course_id = None
+        self.lesson_id = None
+        self.enrollment_id = None
+        self.last_pos = 0
+        self.unsaved = False
+
+    async def send(self, **frame):
+        await self.send_raw({"type": "websocket.send",
+                             "text": json.dumps(frame, separators=(",", ":"))})
+
+    async def close(self, code: int = 1000):
+        await self.send_raw({"type": "websocket.close", "code": code})
+
+    async def write(self, pos: int, completed: bool = False, flush: bool = False, dur: int | None = None):
+        self.last_pos = max(self.last_pos, pos)
+        result = await _record(self.user_id, self.course_id, self.lesson_id, pos, completed, flush, dur)
+        if result in REFUSALS:
+            await self.send(t="error", detail=result)
+            return
+        self.unsaved = result != WRITTEN
+        if result == WRITTEN:
+            await self.send(t="ack", pos=self.last_pos)
+
+    async def flush(self):
+        # changement de leçon / déconnexion : dernière position coalescée écrite en base
+        if self.lesson_id and self.unsaved:
+            await _record(self.user_id, self.course_id, self.lesson_id, self.last_pos, False, True)
+            self.unsaved = False
+
+    async def on_lesson(self, frame):
+        course_id, lesson_id = _int(frame.get("course")), _int(frame.get("lesson"))
+        if not course_id or not lesson_id:
+            await self.send(t="error", detail="course and lesson required")
+            return
+        await self.flush()
+        point = await _resume(self.user_id, course_id, lesson_id)
+        if point in REFUSALS:
+            self.lesson_id = None
+            await self.send(t="error", detail=point)
+            return
+        self.course_id, self.lesson_id = course_id, lesson_id
+        self.enrollment_id = point["enrollment_id"]
+        self.last_pos, self.unsaved = point["pos"], False
+        await self.send(t="resume", lesson=lesson_id, pos=point["pos"], done=point["done"])
+
+    async def on_frame(self, frame):
+        kind = frame.get("t")
+        if kind == "lesson":
+            return await self.on_lesson(frame)
+        if not self.lesson_id:
+            return await self.send(t="error", detail="no lesson")
+        pos = _int(frame.get("pos"))
+        if pos is None:
+            return await self.send(t="error", detail="pos required")
+        if kind == "p":
+            return await self.write(pos)
+        dur = _int(frame.get("dur"))
+        if kind == "flush":
+            # flush = écriture immédiate : même seau que le heartbeat HTTP, sinon simple position
+            return await self.write(pos, flush=not await _consume(user_ident(self.user_id)), dur=dur)
+        if kind == "done":
+            await self.write(pos, completed=True, dur=dur)
+            state = await _state(self.enrollment_id)
+            return await self.send(t="state", lesson=self.lesson_id, done=True, **state)
+        await self.send(t="error", detail="unknown frame")
+
+
+async def _receive_text(receive, timeout=None):
+    """Prochaine trame texte ; None à la déconnexion."""
+    while True:
+        message = await asyncio.wait_for(receive(), timeout) if timeout else await receive()
+        if message["type"] == "websocket.disconnect":
+            return None
+        if message["type"] == "websocket.receive":
+            text = message.get("text")
+            if text is None and message.get("bytes") is not None:
+                text = message["bytes"].decode("utf-8", "replace")
+            return (text or "")[:MAX_FRAME]
+
+
+async def progress_socket(scope, receive, send):
+    """Application ASGI (scope "websocket") montée sur PATH par formaflix/asgi.py."""
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    await send({"type": "websocket.accept"})
+    session = ProgressSession(send)
+
+    # token dans la 1re trame plutôt que dans l'URL (pas de JWT dans les logs d'accès)
+    try:
+        text = await _receive_text(receive, AUTH_TIMEOUT)
+    except asyncio.TimeoutError:
+        return await session.close(CLOSE_UNAUTHORIZED)
+    if text is None:
+        return
+    frame = _parse(text) or {}
+    user = await aauthenticate_token(frame.get("token") or "", stateless=True) \
+        if frame.get("t") == "auth" else None
+    if user is None:
+        return await session.close(CLOSE_UNAUTHORIZED)
+    session.user_id = user.id
+    await session.send(t="ready")
+
+    try:
+        while True:
+            text = await _receive_text(receive)
+            if text is None:
+                break
+            frame = _parse(text)
+            if frame is None:
+                await session.send(t="error", detail="bad frame")
+                continue
+            await session.on_frame(frame)
+    finally:
+        try:
+            await session.flush()
+        except Exception:
+            logger.exception("progress flush failed (user %s, lesson %s)", session.user_id, session.lesson_id)
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from .models import Enrollment, Favorite
 from catalog.serializers import CourseListSerializer
+from formaflix.sparse_fields import SparseFieldsetMixin
+from formaflix.timing import TimedSerializerMixin
 
-class MyLibraryItemSerializer(serializers.ModelSerializer):
+class MyLibraryItemSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     course = CourseListSerializer(read_only=True)
     class Meta:
         model = Enrollment
@@ -10,7 +12,7 @@ class MyLibraryItemSerializer(serializers.ModelSerializer):
 
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     course = CourseListSerializer(read_only=True)
     class Meta:
         model = Favorite
@@ -22,8 +24,10 @@ class ProgressUpsertSerializer(serializers.Serializer):
     position_seconds = serializers.IntegerField(min_value=0)
     duration_seconds = serializers.IntegerField(min_value=0, required=False)
     completed = serializers.BooleanField(required=False, default=False)
+    # pause / fermeture d'onglet : écrit tout de suite, sans coalescence
+    flush = serializers.BooleanField(required=False, default=False)
 
-class ContinueWatchingItemSerializer(serializers.Serializer):
+class ContinueWatchingItemSerializer(TimedSerializerMixin, SparseFieldsetMixin, serializers.Serializer):
     course = CourseListSerializer()
     percent = serializers.IntegerField()
     resume_lesson_id = serializers.IntegerField(allow_null=True)
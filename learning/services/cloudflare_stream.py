@@ -4,6 +4,8 @@ import requests
 import jwt
 from tusclient import client as tus_client
 
+from formaflix.timing import timed
+
 CF_ACCOUNT_ID = os.getenv("CF_STREAM_ACCOUNT_ID", "")
 CF_API_TOKEN  = os.getenv("CF_STREAM_API_TOKEN", "")
 
@@ -15,7 +17,19 @@ CF_REQUIRE_SIGNED = (os.getenv("CF_STREAM_REQUIRE_SIGNED", "0").lower() in ("1",
 CF_DIRECT_UPLOAD_MAX_MB = int(os.getenv("CF_STREAM_DIRECT_UPLOAD_MAX_MB", "180"))  # seuil pour POST direct
 CF_TUS_CHUNK_MB = int(os.getenv("CF_STREAM_TUS_CHUNK_MB", "50"))                   # 50 Mo par chunk
 
-API_BASE = f"https://api.cloudflare.com/client/v4/accounts/{CF_ACCOUNT_ID}/stream"
+# Racine de l'API configurable (ex: serveur Stream factice local pour tests / benchmarks)
+CF_API_ROOT = os.getenv("CF_STREAM_API_BASE", "https://api.cloudflare.com/client/v4").rstrip("/")
+API_BASE = f"{CF_API_ROOT}/accounts/{CF_ACCOUNT_ID}/stream"
+
+def configure_api_base(api_root: str, account_id: str | None = None) -> str:
+    """
+    Redirige les appels Stream de ce module vers une autre racine d'API
+    (utile en process : FakeStreamServer). Retourne le nouvel API_BASE.
+    """
+    global CF_API_ROOT, API_BASE
+    CF_API_ROOT = api_root.rstrip("/")
+    API_BASE = f"{CF_API_ROOT}/accounts/{account_id or CF_ACCOUNT_ID}/stream"
+    return API_BASE
 
 def _headers():
     return {
@@ -35,6 +49,7 @@ def _norm_meta(meta: dict | None) -> dict | None:
     return out
 
 
+@timed("stream")
 def create_direct_upload(meta: dict | None = None, require_signed: bool = False) -> dict:
     """
     NOTE: require_signed=False par défaut (aligne l'admin sur ton test shell).
@@ -61,6 +76,39 @@ def create_direct_upload(meta: dict | None = None, require_signed: bool = False)
     return {"uploadURL": res["uploadURL"], "uid": res["uid"]}
 
 
+@timed("stream")
+def create_tus_direct_upload(upload_length: int, meta: dict | None = None, require_signed: bool = True) -> dict:
+    """
+    URL TUS à usage unique pour un envoi direct depuis le navigateur (gros fichiers).
+    Cloudflare répond 201 + Location (URL d'upload) + stream-media-id (UID).
+    """
+    meta = meta or {}
+    pairs = {
+        "name": meta.get("title") or "video",
+        "maxDurationSeconds": str(CF_MAX_DUR or 14400),
+    }
+    tus_meta = [f"{k} {_b64(v)}" for k, v in pairs.items()]
+    if require_signed:
+        tus_meta.append("requiresignedurls")
+
+    r = requests.post(
+        API_BASE,
+        params={"direct_user": "true"},
+        headers={
+            "Authorization": f"Bearer {CF_API_TOKEN}",
+            "Tus-Resumable": "1.0.0",
+            "Upload-Length": str(int(upload_length)),
+            "Upload-Metadata": ",".join(tus_meta),
+        },
+        timeout=60,
+    )
+    if r.status_code != 201:
+        raise RuntimeError(f"CF tus direct upload failed {r.status_code}: {r.text}")
+    location = r.headers.get("Location", "")
+    uid = r.headers.get("stream-media-id") or tus_uid_from_url(location)
+    return {"uploadURL": location, "uid": uid}
+
+
 def build_hls_url(playback_id: str, sign: bool = True, ttl_seconds: int = 3600) -> str:
     """
     Retourne l'URL HLS (m3u8). Si la signature est dispo, on ajoute ?token=...
@@ -80,21 +128,65 @@ def build_hls_url(playback_id: str, sign: bool = True, ttl_seconds: int = 3600)
         "accessRules": [ {"type": "any"} ]  # tu pourras raffiner (IP, pays, etc.)
     }
     headers = { "kid": CF_SIGN_KID }
-    token = jwt.encode(payload, pem, algorithm="RS256", headers=headers)
+    with timed("sign"):
+        token = jwt.encode(payload, pem, algorithm="RS256", headers=headers)
 
     return f"{base}?token={token}"
 
+@timed("stream")
 def get_asset(uid: str) -> dict:
     """
     Récupère les infos d'un asset Stream par UID.
     """
-    r = requests.get(f"{API_BASE}/{uid}", headers=_headers())
+    r = requests.get(f"{API_BASE}/{uid}", headers=_headers(), timeout=60)
     r.raise_for_status()
     return r.json()["result"]
 
+def list_assets(status: str | None = None, start: str | None = None, end: str | None = None,
+                page_size: int = 1000):
+    """
+    Parcourt l'API de liste Stream (tri par date de création croissante).
+    Pagination : on relance avec start = date 'created' du dernier asset reçu,
+    en ignorant les UID déjà vus (les bornes sont inclusives côté Cloudflare).
+    Génère les assets un par un.
+    """
+    params = {"asc": "true", "limit": str(page_size)}
+    if status:
+        params["status"] = status
+    if end:
+        params["end"] = end
+    cursor = start
+    seen = set()
+    while True:
+        if cursor:
+            params["start"] = cursor
+        with timed("stream"):  # générateur : page par page
+            r = requests.get(API_BASE, headers=_headers(), params=params, timeout=60)
+        r.raise_for_status()
+        batch = r.json().get("result") or []
+        fresh = [a for a in batch if a.get("uid") not in seen]
+        for asset in fresh:
+            seen.add(asset.get("uid"))
+            yield asset
+        if not fresh or len(batch) < page_size:
+            return
+        cursor = fresh[-1].get("created") or cursor
+
+def asset_duration_seconds(asset: dict) -> int:
+    """
+    Cloudflare renvoie duration = -1 tant que l'encodage n'est pas terminé.
+    """
+    try:
+        dur = float(asset.get("duration") or 0)
+    except (TypeError, ValueError):
+        return 0
+    return int(round(dur)) if dur > 0 else 0
+
+@timed("stream")
 def delete_asset(uid: str) -> None:
     requests.delete(f"{API_BASE}/{uid}", headers=_headers()).raise_for_status()
 
+@timed("stream")
 def create_from_url(source_url: str, meta: dict | None = None, require_signed: bool = False) -> dict:
     payload = {
         "url": source_url,
@@ -114,6 +206,7 @@ def create_from_url(source_url: str, meta: dict | None = None, require_signed: b
         raise RuntimeError(f"CF copy failed {r.status_code}: {r.text}")
     return {"uid": r.json()["result"]["uid"]}
 
+@timed("stream")
 def upload_file_to_direct_upload(upload_url: str, file_path: str) -> None:
     import os, mimetypes
     mime = mimetypes.guess_type(file_path)[0] or "video/mp4"
@@ -150,11 +243,7 @@ def extract_playback_id(asset: dict) -> str | None:
 def _b64(s: str) -> str:
     return base64.b64encode(str(s).encode("utf-8")).decode("ascii")
 
-def tus_upload_file(file_path: str, meta: dict | None = None, require_signed: bool = True) -> str:
-    """
-    Lance un upload TUS (recommandé >200 Mo).
-    Retourne un 'uid' Cloudflare déduit de l'URL d'upload.
-    """
+def _tus_metadata(file_path: str, meta: dict | None, require_signed: bool) -> dict:
     meta = meta or {}
     # tuspy encode les valeurs de metadata en base64 pour nous.
     tus_metadata = {
@@ -163,24 +252,43 @@ def tus_upload_file(file_path: str, meta: dict | None = None, require_signed: bo
     }
     if require_signed:
         tus_metadata["requireSignedURLs"] = "true"
+    return tus_metadata
 
+def open_tus_upload(file_path: str, meta: dict | None = None, require_signed: bool = True,
+                    url: str | None = None):
+    """
+    Prépare un uploader TUS. Avec `url` (Location d'un upload déjà créé), tuspy
+    interroge l'offset courant (HEAD) → reprise là où l'upload s'était arrêté.
+    """
     # Endpoint de création TUS = API_BASE (sans /direct_upload)
     headers = {"Authorization": f"Bearer {CF_API_TOKEN}"}
     client = tus_client.TusClient(API_BASE, headers=headers)
-
-    uploader = client.uploader(
+    return client.uploader(
         file_path=file_path,
+        url=url,
         chunk_size=CF_TUS_CHUNK_MB * 1024 * 1024,
-        metadata=tus_metadata,
+        metadata=_tus_metadata(file_path, meta, require_signed),
         retries=5,
         retry_delay=5,
     )
+
+def tus_uid_from_url(location: str | None) -> str:
+    """
+    uploader.url est l'URL 'Location' renvoyée par Cloudflare (tus)
+    Son dernier segment correspond généralement à l'UID de la vidéo.
+    """
+    loc = (location or "").split("?", 1)[0].rstrip("/")
+    return loc.split("/")[-1] if loc else ""
+
+def tus_upload_file(file_path: str, meta: dict | None = None, require_signed: bool = True) -> str:
+    """
+    Lance un upload TUS (recommandé >200 Mo).
+    Retourne un 'uid' Cloudflare déduit de l'URL d'upload.
+    """
+    uploader = open_tus_upload(file_path, meta=meta, require_signed=require_signed)
     uploader.upload()  # envoie les chunks jusqu'au bout
 
-    # uploader.url est l'URL 'Location' renvoyée par Cloudflare (tus)
-    # Son dernier segment correspond généralement à l'UID de la vidéo.
-    loc = (uploader.url or "").rstrip("/")
-    uid = loc.split("/")[-1] if loc else ""
+    uid = tus_uid_from_url(uploader.url)
     if not uid:
         raise RuntimeError("TUS upload terminé mais impossible de déduire l'UID depuis l'URL de location.")
     return uid
@@ -0,0 +1,141 @@
+# learning/services/document_downloads.py
+# Suivi des téléchargements de documents : dédoublonné par (inscription, document) sur une fenêtre,
+# écrit par lots (bulk_create + compteur par document) au lieu d'un INSERT par clic.
+#
+# Fenêtre de perte assumée (historique / compteurs seulement) : le lot en mémoire d'un worker tué
+# sans arrêt propre (SIGKILL, timeout gunicorn) est perdu, soit au plus DOWNLOAD_FLUSH_SECONDS
+# de clics ou DOWNLOAD_BATCH_SIZE événements. worker_exit (gunicorn.conf.py) vide le lot sinon.
+# Enrollment.last_document_download_at (déblocage du quiz) suit le même chemin : chaque clic,
+# dédoublonné ou non, est noté en mémoire et écrit au flush (un UPDATE par inscription et par lot,
+# jamais par clic). Entre le clic et le flush, le quiz lit le marqueur cache (_last_key) ; il est
+# local au process en LocMem, d'où le même délai max DOWNLOAD_FLUSH_SECONDS pour les autres workers.
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from learning.models import Document, DocumentDownload, Enrollment
+
+logger = logging.getLogger(__name__)
+
+# aperçu + téléchargement, Player + fiche mobile : un seul événement par fenêtre
+DOWNLOAD_DEDUPE_SECONDS = int(os.getenv("DOC_DOWNLOAD_DEDUPE_SECONDS", "600"))
+DOWNLOAD_BATCH_SIZE = int(os.getenv("DOC_DOWNLOAD_BATCH_SIZE", "100"))
+# délai max entre un clic et son écriture en base
+DOWNLOAD_FLUSH_SECONDS = float(os.getenv("DOC_DOWNLOAD_FLUSH_SECONDS", "5"))
+# marqueur « dernier téléchargement » lu par le quiz avant l'écriture du lot
+LAST_DOWNLOAD_TTL = 3600
+
+_buffer: list[DocumentDownload] = []
+# inscription → dernier clic (y compris dédoublonné), pour last_document_download_at
+_touched: dict[int, datetime] = {}
+_lock = threading.Lock()
+_timer: threading.Timer | None = None
+
+
+def _seen_key(enrollment_id, document_id) -> str:
+    return f"docdl:seen:{enrollment_id}:{document_id}"
+
+
+def _last_key(enrollment_id) -> str:
+    return f"docdl:last:{enrollment_id}"
+
+
+def last_download_at(enrollment_id: int) -> datetime | None:
+    """Dernier clic connu du cache (peut précéder l'écriture du lot en base)."""
+    ts = cache.get(_last_key(enrollment_id))
+    return datetime.fromtimestamp(ts, tz=dt_timezone.utc) if ts else None
+
+
+def track_download(enrollment_id: int, document_id: int) -> bool:
+    """
+    Enregistre un téléchargement. Retourne False s'il est dédoublonné (déjà vu dans la fenêtre).
+    L'écriture part au plus tard DOWNLOAD_FLUSH_SECONDS après, ou dès DOWNLOAD_BATCH_SIZE événements.
+    """
+    now = timezone.now()
+    cache.set(_last_key(enrollment_id), now.timestamp(), LAST_DOWNLOAD_TTL)
+    # doublon : pas de nouvelle ligne, mais la date compte pour le quiz (re-téléchargement après un échec)
+    fresh = cache.add(_seen_key(enrollment_id, document_id), 1, DOWNLOAD_DEDUPE_SECONDS)
+
+    global _timer
+    with _lock:
+        _touched[enrollment_id] = now
+        if fresh:
+            _buffer.append(DocumentDownload(enrollment_id=enrollment_id, document_id=document_id,
+                                            downloaded_at=now))
+        full = len(_buffer) >= DOWNLOAD_BATCH_SIZE
+        if not full and _timer is None:
+            _timer = threading.Timer(DOWNLOAD_FLUSH_SECONDS, _flush_in_thread)
+            _timer.daemon = True
+            _timer.start()
+    if full:
+        flush_downloads()
+    return fresh
+
+
+def flush_downloads() -> int:
+    """
+    Écrit les événements en attente (un bulk_create + un UPDATE par document et par inscription).
+    Retourne le nombre d'événements écrits.
+    """
+    global _timer
+    with _lock:
+        batch = _buffer[:]
+        touched = dict(_touched)
+        _buffer.clear()
+        _touched.clear()
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+    if not batch and not touched:
+        return 0
+    try:
+        _write(batch, touched)
+        return len(batch)
+    except Exception:
+        logger.warning("document download batch failed (%s events), retrying row by row", len(batch))
+    try:
+        _touch(touched)
+    except Exception:
+        logger.exception("last_document_download_at update failed (%s enrollments)", len(touched))
+    # une ligne invalide (document / inscription supprimé entre-temps) ne doit pas emporter le lot
+    written = 0
+    for download in batch:
+        download.pk = None
+        try:
+            _write([download], {})
+            written += 1
+        except Exception:
+            logger.exception("document download dropped (enrollment %s, document %s)",
+                             download.enrollment_id, download.document_id)
+    return written
+
+
+def _write(batch: list[DocumentDownload], touched: dict[int, datetime]):
+    with transaction.atomic():
+        DocumentDownload.objects.bulk_create(batch, batch_size=DOWNLOAD_BATCH_SIZE)
+        for document_id, n in Counter(d.document_id for d in batch).items():
+            Document.objects.filter(pk=document_id).update(download_count=F("download_count") + n)
+        _touch(touched)
+
+
+def _touch(touched: dict[int, datetime]):
+    # jamais en arrière : un autre worker a pu écrire un clic plus récent
+    for enrollment_id, at in touched.items():
+        Enrollment.objects.filter(
+            Q(last_document_download_at__isnull=True) | Q(last_document_download_at__lt=at), pk=enrollment_id
+        ).update(last_document_download_at=at)
+
+
+def _flush_in_thread():
+    # thread du Timer (éphémère) : sa connexion ne doit pas lui survivre
+    try:
+        flush_downloads()
+    finally:
+        connection.close()
@@ -0,0 +1,351 @@
+# learning/services/fake_stream.py
+"""
+Serveur Cloudflare Stream factice, en process (http.server + threads).
+
+Couvre ce que l'app utilise : direct_upload (+ POST du fichier), copy, TUS (création,
+HEAD, PATCH, direct_user), assets get / list / patch / delete, et l'émission de webhooks
+quand un asset passe "ready" (signés comme Cloudflare si webhook_secret est fourni).
+Latence et pannes injectables pour les tests de charge.
+
+    with FakeStreamServer(latency_ms=(20, 80), failure_rate=0.02) as srv:
+        srv.patch_clients()          # redirige learning/integrations vers le faux serveur
+        srv.seed_assets(300)
+        reconcile_stream_assets()
+"""
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+API_PREFIX = "/client/v4/accounts/"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class FakeStreamServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, account_id: str = "fake-account",
+                 latency_ms: tuple[int, int] = (0, 0), failure_rate: float = 0.0,
+                 encode_seconds: float = 0.5, webhook_url: str | None = None,
+                 webhook_secret: str | None = None):
+        self.account_id = account_id
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.encode_seconds = encode_seconds
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.assets: dict[str, dict] = {}
+        self.uploads: dict[str, dict] = {}  # uid -> {"length", "offset"} (TUS)
+        self.webhook_log: list[tuple[str, int]] = []  # (uid, status HTTP du récepteur)
+        self.request_count = 0
+        self.lock = threading.RLock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    # --- cycle de vie ---
+
+    @property
+    def origin(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_root(self) -> str:
+        return f"{self.origin}/client/v4"
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.api_root}/accounts/{self.account_id}/stream"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name="fake-stream")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def patch_clients(self):
+        """Redirige les deux clients Stream du projet vers ce serveur. Retourne une fonction de restauration."""
+        from integrations import cloudflare_stream as integ
+        from learning.services import cloudflare_stream as svc
+
+        previous = (svc.CF_API_ROOT, svc.API_BASE, integ.CF_API, integ.ACCOUNT_ID)
+        svc.configure_api_base(self.api_root, self.account_id)
+        integ.CF_API, integ.ACCOUNT_ID = self.api_root, self.account_id
+
+        def restore():
+            svc.CF_API_ROOT, svc.API_BASE, integ.CF_API, integ.ACCOUNT_ID = previous
+        return restore
+
+    # --- état des assets ---
+
+    def create_asset(self, state: str = "pendingupload", meta: dict | None = None,
+                     require_signed: bool = False, duration: float | None = None) -> dict:
+        uid = uuid.uuid4().hex
+        now = _now_iso()
+        asset = {
+            "uid": uid,
+            "created": now,
+            "modified": now,
+            "meta": meta or {},
+            "requireSignedURLs": require_signed,
+            "readyToStream": False,
+            "status": {"state": state, "pctComplete": "0"},
+            "duration": -1,
+            "size": 0,
+            "playback": {},
+        }
+        with self.lock:
+            self.assets[uid] = asset
+        if state == "ready":
+            self._mark_ready(uid, duration=duration, emit=False)
+        return asset
+
+    def seed_assets(self, count: int, state: str = "ready") -> list[str]:
+        return [self.create_asset(state=state, duration=random.uniform(60, 3600))["uid"] for _ in range(count)]
+
+    def _schedule_ready(self, uid: str):
+        timer = threading.Timer(self.encode_seconds, self._mark_ready, args=(uid,))
+        timer.daemon = True
+        timer.start()
+
+    def _mark_ready(self, uid: str, duration: float | None = None, emit: bool = True):
+        with self.lock:
+            asset = self.assets.get(uid)
+            if not asset:
+                return
+            asset["status"] = {"state": "ready", "pctComplete": "100.000000"}
+            asset["readyToStream"] = True
+            asset["duration"] = round(duration if duration is not None else random.uniform(60, 3600), 1)
+            asset["modified"] = _now_iso()
+            asset["playback"] = {
+                "hls": f"{self.origin}/{uid}/manifest/video.m3u8",
+                "dash": f"{self.origin}/{uid}/manifest/video.mpd",
+            }
+            payload = dict(asset)
+        if emit and self.webhook_url:
+            threading.Thread(target=self._emit_webhook, args=(payload,), daemon=True).start()
+
+    def _emit_webhook(self, asset: dict):
+        body = json.dumps(asset).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.webhook_secret:
+            # même schéma que Cloudflare : HMAC-SHA256("<time>.<corps>")
+            ts = str(int(time.time()))
+            sig = hmac.new(self.webhook_secret.encode(), f"{ts}.".encode() + body, hashlib.sha256).hexdigest()
+            headers["Webhook-Signature"] = f"time={ts},sig1={sig}"
+        try:
+            status = requests.post(self.webhook_url, data=body, headers=headers, timeout=30).status_code
+        except requests.RequestException:
+            status = 0
+        with self.lock:
+            self.webhook_log.append((asset["uid"], status))
+
+    def _list(self, query: dict) -> list[dict]:
+        status = query.get("status")
+        start, end = query.get("start"), query.get("end")
+        search = (query.get("search") or "").lower()
+        limit = int(query.get("limit") or 1000)
+        asc = (query.get("asc") or "false").lower() == "true"
+        with self.lock:
+            items = [dict(a) for a in self.assets.values()]
+        if status:
+            items = [a for a in items if a["status"]["state"] == status]
+        if start:
+            items = [a for a in items if a["created"] >= start]
+        if end:
+            items = [a for a in items if a["created"] <= end]
+        if search:
+            items = [a for a in items if search in str(a["meta"].get("name", "")).lower()]
+        items.sort(key=lambda a: a["created"], reverse=not asc)
+        return items[:limit]
+
+    # --- HTTP ---
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # silencieux
+                pass
+
+            def _send(self, code: int, body: dict | None = None, headers: dict | None = None):
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(code)
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.send_header("Access-Control-Expose-Headers", "Location, Upload-Offset, Upload-Length, stream-media-id")
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                if body is not None:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if data and self.command != "HEAD":
+                    self.wfile.write(data)
+
+            def _ok(self, result, code: int = 200, headers: dict | None = None):
+                self._send(code, {"result": result, "success": True, "errors": [], "messages": []}, headers)
+
+            def _error(self, code: int, message: str):
+                self._send(code, {"result": None, "success": False,
+                                  "errors": [{"code": 10000 + code, "message": message}], "messages": []})
+
+            def _body(self) -> bytes:
+                n = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(n) if n else b""
+
+            def _json(self) -> dict:
+                try:
+                    return json.loads(self._body() or b"{}")
+                except ValueError:
+                    return {}
+
+            def _dispatch(self):
+                with server.lock:
+                    server.request_count += 1
+                lo, hi = server.latency_ms
+                if hi:
+                    time.sleep(random.uniform(lo, hi) / 1000)
+                parts = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                if server.failure_rate and random.random() < server.failure_rate:
+                    self._body()
+                    return self._error(503, "injected failure")
+
+                path = parts.path.rstrip("/")
+                if path.startswith("/upload/"):
+                    return self._direct_upload_file(path.split("/")[-1])
+                if path.startswith("/tus/"):
+                    return self._tus(path.split("/")[-1])
+                if not path.startswith(API_PREFIX):
+                    return self._error(404, "not found")
+                tail = path[len(API_PREFIX):].split("/")  # [account, "stream", ...]
+                if len(tail) < 2 or tail[1] != "stream":
+                    return self._error(404, "not found")
+                rest = tail[2:]
+                if not rest:
+                    if self.command == "GET":
+                        return self._ok(server._list(query))
+                    if self.command == "POST":
+                        return self._tus_create(query)
+                elif rest == ["direct_upload"] and self.command == "POST":
+                    return self._create_direct_upload()
+                elif rest == ["copy"] and self.command == "POST":
+                    return self._copy()
+                elif len(rest) == 1:
+                    return self._asset(rest[0])
+                return self._error(405, "method not allowed")
+
+            # -- endpoints --
+
+            def _create_direct_upload(self):
+                body = self._json()
+                asset = server.create_asset(meta=body.get("meta"), require_signed=bool(body.get("requireSignedURLs")))
+                return self._ok({"uid": asset["uid"], "uploadURL": f"{server.origin}/upload/{asset['uid']}"})
+
+            def _copy(self):
+                body = self._json()
+                if not body.get("url"):
+                    return self._error(400, "url required")
+                asset = server.create_asset(state="downloading", meta=body.get("meta"),
+                                            require_signed=bool(body.get("requireSignedURLs")))
+                server._schedule_ready(asset["uid"])
+                return self._ok(asset)
+
+            def _direct_upload_file(self, uid):
+                size = len(self._body())
+                with server.lock:
+                    asset = server.assets.get(uid)
+                    if not asset or asset["status"]["state"] != "pendingupload":
+                        return self._error(404, "unknown upload")
+                    asset["size"] = size
+                    asset["status"] = {"state": "queued", "pctComplete": "0"}
+                server._schedule_ready(uid)
+                return self._send(200, {})
+
+            def _tus_create(self, query):
+                try:
+                    length = int(self.headers.get("Upload-Length") or 0)
+                except ValueError:
+                    length = 0
+                if length <= 0:
+                    return self._error(400, "Upload-Length required")
+                asset = server.create_asset(require_signed="requiresignedurls" in (self.headers.get("Upload-Metadata") or "").lower())
+                uid = asset["uid"]
+                with server.lock:
+                    server.uploads[uid] = {"length": length, "offset": 0}
+                return self._send(201, None, {"Location": f"{server.origin}/tus/{uid}",
+                                              "stream-media-id": uid, "Tus-Resumable": "1.0.0"})
+
+            def _tus(self, uid):
+                with server.lock:
+                    up = server.uploads.get(uid)
+                if self.command == "OPTIONS":
+                    return self._send(204, None, {"Access-Control-Allow-Methods": "HEAD, PATCH, OPTIONS",
+                                                  "Access-Control-Allow-Headers": "Tus-Resumable, Upload-Offset, Content-Type"})
+                if not up:
+                    return self._error(404, "unknown upload")
+                headers = {"Tus-Resumable": "1.0.0", "Upload-Length": str(up["length"]), "Cache-Control": "no-store"}
+                if self.command == "HEAD":
+                    return self._send(200, None, {**headers, "Upload-Offset": str(up["offset"])})
+                if self.command != "PATCH":
+                    return self._error(405, "method not allowed")
+                chunk = self._body()
+                with server.lock:
+                    if int(self.headers.get("Upload-Offset") or -1) != up["offset"]:
+                        return self._send(409, None, {**headers, "Upload-Offset": str(up["offset"])})
+                    up["offset"] = min(up["length"], up["offset"] + len(chunk))
+                    done = up["offset"] >= up["length"]
+                    if done:
+                        asset = server.assets[uid]
+                        asset["size"] = up["length"]
+                        asset["status"] = {"state": "queued", "pctComplete": "0"}
+                if done:
+                    server._schedule_ready(uid)
+                return self._send(204, None, {**headers, "Upload-Offset": str(up["offset"])})
+
+            def _asset(self, uid):
+                body = self._json() if self.command in ("POST", "PATCH") else {}
+                with server.lock:
+                    asset = server.assets.get(uid)
+                    if asset and self.command == "DELETE":
+                        del server.assets[uid]
+                        server.uploads.pop(uid, None)
+                    elif asset and self.command in ("POST", "PATCH"):
+                        if "requireSignedURLs" in body:
+                            asset["requireSignedURLs"] = bool(body["requireSignedURLs"])
+                        if "meta" in body:
+                            asset["meta"] = {**asset["meta"], **(body["meta"] or {})}
+                        asset["modified"] = _now_iso()
+                    snapshot = dict(asset) if asset else None
+                if snapshot is None:
+                    return self._error(404, "video not found")
+                if self.command == "DELETE":
+                    return self._send(200, {})
+                if self.command in ("GET", "POST", "PATCH"):
+                    return self._ok(snapshot)
+                return self._error(405, "method not allowed")
+
+            do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = _dispatch
+
+        return Handler
@@ -0,0 +1,73 @@
+# learning/services/media_probe.py
+import json
+import shutil
+import struct
+import subprocess
+
+
+def _ffprobe_duration(path: str) -> float:
+    exe = shutil.which("ffprobe")
+    if not exe:
+        return 0.0
+    try:
+        out = subprocess.run(
+            [exe, "-v", "error", "-show_entries", "format=duration", "-of", "json", path],
+            capture_output=True, timeout=30, check=True,
+        ).stdout
+        return float(json.loads(out or b"{}").get("format", {}).get("duration") or 0)
+    except Exception:
+        return 0.0
+
+
+def _iter_boxes(f, start: int, end: int):
+    """Parcourt les boxes ISO-BMFF (MP4/MOV) entre deux offsets : (type, début payload, fin)."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header)
+        payload = pos + 8
+        if size == 1:  # taille 64 bits
+            size = struct.unpack(">Q", f.read(8))[0]
+            payload += 8
+        elif size == 0:  # jusqu'à la fin
+            size = end - pos
+        if size < 8:
+            return
+        yield kind, payload, pos + size
+        pos += size
+
+
+def _mp4_duration(path: str) -> float:
+    """Lit moov/mvhd (timescale + duration) sans charger le fichier."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            file_end = f.tell()
+            for kind, start, end in _iter_boxes(f, 0, file_end):
+                if kind != b"moov":
+                    continue
+                for sub, sub_start, _ in _iter_boxes(f, start, end):
+                    if sub != b"mvhd":
+                        continue
+                    f.seek(sub_start)
+                    version = f.read(4)[0]
+                    if version == 1:
+                        _, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+                    else:
+                        _, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+                    return duration / timescale if timescale else 0.0
+    except (OSError, struct.error, IndexError):
+        pass
+    return 0.0
+
+
+def probe_duration_seconds(path: str) -> int:
+    """
+    Durée (secondes entières) d'un fichier vidéo local.
+    ffprobe si disponible, sinon lecture de l'en-tête MP4/MOV. 0 si inconnue.
+    """
+    dur = _ffprobe_duration(path) or _mp4_duration(path)
+    return int(round(dur)) if dur > 0 else 0
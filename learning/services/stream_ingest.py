@@ -0,0 +1,144 @@
+# learning/services/stream_ingest.py
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from catalog.models import Course
+from learning.models import Lesson, StreamUpload
+from .cloudflare_stream import open_tus_upload, tus_uid_from_url
+
+logger = logging.getLogger(__name__)
+
+CF_UPLOAD_CONCURRENCY = int(os.getenv("CF_STREAM_UPLOAD_CONCURRENCY", "3"))
+CF_UPLOAD_MAX_ATTEMPTS = int(os.getenv("CF_STREAM_UPLOAD_MAX_ATTEMPTS", "5"))
+# un job 'uploading' sans nouvelles depuis ce délai = process mort → on le remet en file
+CF_UPLOAD_STALE_MINUTES = int(os.getenv("CF_STREAM_UPLOAD_STALE_MINUTES", "10"))
+
+
+def enqueue_lesson_upload(lesson: Lesson) -> StreamUpload:
+    """
+    Met en file l'envoi du video_file local d'une leçon.
+    Un job déjà actif (queued / uploading) pour la leçon est réutilisé.
+    """
+    active = lesson.stream_uploads.filter(status__in=("queued", "uploading")).first()
+    if active:
+        return active
+    path = lesson.video_file.path
+    return StreamUpload.objects.create(lesson=lesson, file_path=path, size_bytes=os.path.getsize(path))
+
+
+def enqueue_trailer_upload(course: Course) -> StreamUpload:
+    """
+    Met en file l'envoi du trailer_file local d'un cours.
+    Un job déjà actif (queued / uploading) pour ce même fichier est réutilisé.
+    """
+    path = course.trailer_file.path
+    active = course.trailer_uploads.filter(status__in=("queued", "uploading"), file_path=path).first()
+    if active:
+        return active
+    return StreamUpload.objects.create(course=course, file_path=path, size_bytes=os.path.getsize(path))
+
+
+def supersede_trailer_uploads(course: Course) -> int:
+    """
+    Source de bande-annonce remplacée : les envois actifs de l'ancienne sont abandonnés
+    (run_upload ne rattache plus un job qui n'est plus 'uploading').
+    """
+    return course.trailer_uploads.filter(status__in=("queued", "uploading")).update(
+        status="failed", error="source remplacée", updated_at=timezone.now()
+    )
+
+
+def requeue_stale_uploads() -> int:
+    """Remet en file les jobs interrompus (ils reprendront depuis leur offset TUS)."""
+    limit = timezone.now() - timedelta(minutes=CF_UPLOAD_STALE_MINUTES)
+    return StreamUpload.objects.filter(status="uploading", updated_at__lt=limit).update(status="queued")
+
+
+def _claim(job_id: int) -> bool:
+    # UPDATE conditionnel : un seul worker (thread ou process) gagne le job
+    return StreamUpload.objects.filter(pk=job_id, status="queued").update(
+        status="uploading", attempts=F("attempts") + 1, updated_at=timezone.now()
+    ) == 1
+
+
+def _open_uploader(job: StreamUpload):
+    if job.lesson_id:
+        meta = {"kind": "lesson", "lesson_id": job.lesson_id, "course_id": job.lesson.course_id,
+                "title": job.lesson.title}
+        require_signed = True
+    else:
+        # bandes-annonces : contenu promotionnel public
+        meta = {"kind": "trailer", "course_id": job.course_id, "title": f"Trailer - {job.course.title}"}
+        require_signed = False
+    if job.tus_url:
+        try:
+            return open_tus_upload(job.file_path, meta=meta, require_signed=require_signed, url=job.tus_url)
+        except Exception:
+            # URL TUS expirée / inconnue côté Cloudflare → on repart de zéro
+            logger.warning("TUS resume impossible for upload %s, restarting", job.pk)
+    uploader = open_tus_upload(job.file_path, meta=meta, require_signed=require_signed)
+    job.tus_url = uploader.url
+    job.cf_uid = tus_uid_from_url(uploader.url)
+    StreamUpload.objects.filter(pk=job.pk).update(tus_url=job.tus_url, cf_uid=job.cf_uid, offset_bytes=0)
+    return uploader
+
+
+def run_upload(job_id: int) -> bool:
+    """
+    Exécute un job réclamé : envoi chunk par chunk, offset persisté après chaque chunk.
+    """
+    job = StreamUpload.objects.select_related("lesson", "course").get(pk=job_id)
+    try:
+        uploader = _open_uploader(job)
+        StreamUpload.objects.filter(pk=job.pk).update(offset_bytes=uploader.offset)
+        while uploader.offset < uploader.stop_at:
+            uploader.upload_chunk()
+            StreamUpload.objects.filter(pk=job.pk).update(offset_bytes=uploader.offset, updated_at=timezone.now())
+        if not job.cf_uid:
+            raise RuntimeError("TUS upload terminé mais impossible de déduire l'UID depuis l'URL de location.")
+    except Exception as e:
+        logger.exception("stream upload %s failed", job.pk)
+        retry = job.attempts < CF_UPLOAD_MAX_ATTEMPTS  # attempts déjà incrémenté par _claim
+        StreamUpload.objects.filter(pk=job.pk, status="uploading").update(
+            status="queued" if retry else "failed", error=str(e)[:2000]
+        )
+        return False
+
+    # clôture conditionnelle d'abord : un job abandonné entre-temps (source remplacée) n'est pas rattaché
+    if not StreamUpload.objects.filter(pk=job.pk, status="uploading").update(status="done", error=""):
+        return False
+    if job.lesson_id:
+        Lesson.objects.filter(pk=job.lesson_id).update(cf_uid=job.cf_uid, cf_ready=False)
+    else:
+        Course.objects.filter(pk=job.course_id).update(
+            trailer_cf_uid=job.cf_uid, trailer_cf_playback_id="", trailer_cf_ready=False
+        )
+    return True
+
+
+def _run_claimed(job_id: int) -> bool:
+    close_old_connections()
+    try:
+        return _claim(job_id) and run_upload(job_id)
+    finally:
+        close_old_connections()
+
+
+def process_upload_queue(concurrency: int | None = None) -> int:
+    """
+    Vide la file : les jobs 'queued' sont envoyés par un pool de `concurrency` threads.
+    Retourne le nombre d'uploads terminés.
+    """
+    requeue_stale_uploads()
+    ids = list(StreamUpload.objects.filter(status="queued").values_list("pk", flat=True))
+    if not ids:
+        return 0
+    with ThreadPoolExecutor(max_workers=concurrency or CF_UPLOAD_CONCURRENCY,
+                            thread_name_prefix="stream-upload") as pool:
+        return sum(1 for ok in pool.map(_run_claimed, ids) if ok)
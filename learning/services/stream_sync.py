@@ -0,0 +1,384 @@
+# learning/services/stream_sync.py
+import hashlib
+import hmac
+import json
+import os
+import time
+from datetime import timedelta, timezone as dt_timezone
+
+import requests
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from catalog.cdn import purge_courses
+from catalog.models import Course
+from learning.models import Lesson, StreamUpload, StreamWebhookEvent
+from .cloudflare_stream import get_asset, list_assets, extract_playback_id, asset_duration_seconds
+from .media_probe import probe_duration_seconds
+
+BULK_BATCH_SIZE = 200
+# sélection (admin) d'au plus N assets : un GET par uid plutôt que la pagination de la liste
+RECONCILE_GET_MAX = int(os.getenv("CF_RECONCILE_GET_MAX", "20"))
+RECONCILE_PAGE_SIZE = int(os.getenv("CF_RECONCILE_PAGE_SIZE", "1000"))
+# sélection plus large : liste bornée à la création du plus ancien cours concerné, moins cette marge
+RECONCILE_SINCE_MARGIN = timedelta(hours=1)
+# écart maximal entre l'horodatage signé du webhook et maintenant (rejeu)
+WEBHOOK_TOLERANCE_SECONDS = 300
+
+
+class InvalidWebhookPayload(ValueError):
+    """Corps de webhook inexploitable (UTF-8 / JSON invalide, pas un objet) → 400."""
+
+
+def asset_state(asset: dict) -> tuple[bool, str | None, int]:
+    """
+    Retourne (ready, playback_id, duration_seconds) pour un asset Stream.
+    """
+    ready = (asset.get("status") or {}).get("state") == "ready"
+    return ready, extract_playback_id(asset), asset_duration_seconds(asset)
+
+
+def _extract_playback_id_from_playback(playback):
+    """
+    Cloudflare peut renvoyer:
+      - playback = {"hls": "https://videodelivery.net/<ID>/manifest/video.m3u8", ...}
+      - ou playback = {"id": "<ID>"} / {"uid": "<ID>"} / {"playbackId": "<ID>"}
+    """
+    if not isinstance(playback, dict):
+        return None
+    # hls complet → extraire l'ID
+    hls = playback.get("hls")
+    if isinstance(hls, str) and "/manifest/video.m3u8" in hls:
+        try:
+            return hls.split("/manifest/")[0].rstrip("/").split("/")[-1]
+        except Exception:
+            pass
+    # champs directs
+    return playback.get("id") or playback.get("uid") or playback.get("playbackId")
+
+
+def verify_webhook_signature(raw_body: bytes, header: str, now: float | None = None) -> bool:
+    """
+    En-tête Webhook-Signature de Cloudflare : "time=<ts>,sig1=<hex>",
+    sig1 = HMAC-SHA256(secret du webhook, "<ts>.<corps>") ; horodatage à ±WEBHOOK_TOLERANCE_SECONDS.
+    """
+    key = getattr(settings, "CF_STREAM_WEBHOOK_SIGNING_SECRET", "")
+    if not key or not header:
+        return False
+    parts = dict(p.split("=", 1) for p in header.split(",") if "=" in p)
+    ts, sig = parts.get("time", ""), parts.get("sig1", "")
+    if not ts.isdigit() or not sig:
+        return False
+    if abs((now or time.time()) - int(ts)) > WEBHOOK_TOLERANCE_SECONDS:
+        return False
+    expected = hmac.new(key.encode(), ts.encode() + b"." + raw_body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, sig)
+
+
+def webhook_authorized(request, secret: str | None = None) -> bool:
+    """
+    Webhook Stream authentique : signature Cloudflare valide, ou secret d'URL égal à
+    CF_STREAM_WEBHOOK_SECRET (route /webhooks/cf-stream/<secret>/). Rien de configuré → refus.
+    """
+    if verify_webhook_signature(request.body, request.headers.get("Webhook-Signature", "")):
+        return True
+    expected = getattr(settings, "CF_STREAM_WEBHOOK_SECRET", "")
+    return bool(expected and secret and hmac.compare_digest(secret.encode(), expected.encode()))
+
+
+def _obj(value) -> dict:
+    # sous-objet attendu : tout autre type (liste, chaîne…) est ignoré plutôt que de lever
+    return value if isinstance(value, dict) else {}
+
+def coalesce_webhook_payload(payload):
+    """
+    Normalise le payload pour retourner:
+      uid, ready(bool), playback_id(str|None), duration_sec(int|0), meta(dict)
+    Compatible avec:
+      A) {"uid": "...", "status":{"state":"ready"}, "meta":{...}, "playback":{...}}
+      B) {"type":"video.ready", "video":{ "uid": "...", "playback":{...}, "duration": ... , "meta":{...}}}
+    """
+    uid = None
+    ready = False
+    playback_id = None
+    duration_sec = 0
+    meta = {}
+
+    # Format A (root-level) ; "id" racine accepté comme uid, sauf enveloppe d'événement (format B)
+    status = _obj(payload.get("status"))
+    nested = "video" in payload or "data" in payload
+    if "uid" in payload or ("id" in payload and not nested):
+        uid = payload.get("uid") or payload.get("id")
+        state = status.get("state")
+        ready = (state == "ready")
+        meta = _obj(payload.get("meta"))
+        playback_id = _extract_playback_id_from_playback(payload.get("playback") or {})
+        # Durée éventuelle au root (plus rare)
+        dur = payload.get("duration")
+        if dur:
+            try:
+                duration_sec = int(round(float(dur)))
+            except Exception:
+                pass
+
+    # Format B (event type)
+    if not uid and ("type" in payload or "video" in payload or "data" in payload):
+        evt_type = payload.get("type") or ""
+        v = _obj(payload.get("video")) or _obj(payload.get("data"))  # parfois "data"
+        uid = v.get("uid") or v.get("id") or uid
+        ready = ready or (evt_type == "video.ready")
+        meta = _obj(v.get("meta")) or meta
+        playback_id = playback_id or _extract_playback_id_from_playback(v.get("playback") or {})
+        dur = v.get("duration")
+        if dur and not duration_sec:
+            try:
+                duration_sec = int(round(float(dur)))
+            except Exception:
+                pass
+
+    if not uid:
+        uid = payload.get("id")  # dernier recours, comme l'ancien webhook
+
+    return (uid if isinstance(uid, str) else None), ready, playback_id, duration_sec, meta
+
+
+def _in_flight(uid: str, **target) -> bool:
+    # envoi TUS en cours pour cette cible, uid déjà connu (rattachement fait en fin d'envoi)
+    return StreamUpload.objects.filter(cf_uid=uid, status__in=("queued", "uploading"), **target).exists()
+
+
+def apply_asset_state(uid: str, ready: bool, playback_id: str | None, duration: int = 0,
+                      meta: dict | None = None) -> int:
+    """
+    Applique un état Stream (payload webhook ou asset) à nos lignes, en UPDATE direct.
+    Leçons : par cf_uid, sinon via meta.lesson_id — repli limité à une leçon sans cf_uid dont
+    un envoi en cours (StreamUpload) porte cet uid : jamais de rattachement d'après le seul payload.
+    Bandes-annonces : par trailer_cf_uid, sinon via meta.kind == "trailer" + meta.course_id, même
+    restriction (envoi en cours pour ce cours) : l'asset d'une source remplacée n'est jamais repris.
+    Retourne le nombre de lignes mises à jour.
+    """
+    fields = {"cf_ready": ready}
+    if playback_id:
+        fields["cf_playback_id"] = playback_id
+    if duration:
+        fields["duration_seconds"] = duration
+
+    updated = Lesson.objects.filter(cf_uid=uid).update(**fields)
+    lesson_id = (meta or {}).get("lesson_id")
+    if not updated and lesson_id and str(lesson_id).isdigit() and _in_flight(uid, lesson_id=int(lesson_id)):
+        updated = Lesson.objects.filter(pk=int(lesson_id), cf_uid="").update(cf_uid=uid, **fields)
+
+    trailer_fields = {"trailer_cf_ready": ready}
+    if playback_id:
+        trailer_fields["trailer_cf_playback_id"] = playback_id
+    trailers = Course.objects.filter(trailer_cf_uid=uid).update(**trailer_fields)
+    course_id = (meta or {}).get("course_id")
+    if (not trailers and (meta or {}).get("kind") == "trailer" and course_id and str(course_id).isdigit()
+            and _in_flight(uid, course_id=int(course_id))):
+        trailers = Course.objects.filter(pk=int(course_id), trailer_cf_uid="").update(trailer_cf_uid=uid, **trailer_fields)
+
+    # update() : pas de signal → purge CDN explicite (bande-annonce visible en carte)
+    if updated:
+        purge_courses(Lesson.objects.filter(cf_uid=uid).values_list("course_id", flat=True))
+    if trailers:
+        purge_courses(Course.objects.filter(trailer_cf_uid=uid).values_list("pk", flat=True), listings=True)
+    return updated + trailers
+
+
+def confirm_stream_asset(uid: str, event_id: int | None = None) -> int:
+    """
+    Confirmation différée : un GET de l'asset côté Cloudflare, puis application.
+    Appelé hors requête (voir handle_stream_webhook).
+    """
+    ready, playback_id, duration = asset_state(get_asset(uid))
+    updated = apply_asset_state(uid, ready, playback_id, duration)
+    if event_id:
+        StreamWebhookEvent.objects.filter(pk=event_id).update(confirmed_at=timezone.now())
+    return updated
+
+
+def handle_stream_webhook(raw_body: bytes) -> tuple[dict, str | None, int | None]:
+    """
+    Traitement « payload d'abord » d'un webhook Stream, sans appel à Cloudflare :
+      1) normalise le payload (formats A et B) ;
+      2) journalise l'événement (clé = hash du corps) → une redelivery est ignorée ;
+      3) applique l'état directement depuis le payload.
+    Retourne (réponse JSON, uid à confirmer ou None, id de l'événement).
+    La confirmation (get_asset) n'est demandée que si le payload n'est pas concluant.
+    Lève InvalidWebhookPayload si le corps n'est pas un objet JSON UTF-8.
+    """
+    try:
+        payload = json.loads(raw_body.decode("utf-8") or "{}")
+    except ValueError as e:  # UnicodeDecodeError, JSONDecodeError
+        raise InvalidWebhookPayload(str(e)) from e
+    if not isinstance(payload, dict):
+        raise InvalidWebhookPayload("JSON object expected")
+    uid, ready, playback_id, duration, meta = coalesce_webhook_payload(payload)
+    uid = (uid or "").split("?", 1)[0]
+    if not uid:
+        return {"ok": True, "note": "no uid"}, None, None
+
+    event_key = hashlib.sha256(raw_body).hexdigest()
+    try:
+        with transaction.atomic():
+            event = StreamWebhookEvent.objects.create(event_key=event_key, cf_uid=uid, ready=ready)
+    except IntegrityError:
+        return {"ok": True, "duplicate": True}, None, None
+
+    if ready:
+        updated = apply_asset_state(uid, ready, playback_id, duration, meta)
+        needs_confirm = updated > 0 and not playback_id
+    else:
+        # état non concluant (encodage en cours, erreur, format inconnu) :
+        # on ne rétrograde rien sur la foi du payload, get_asset tranchera
+        updated = 0
+        needs_confirm = (Lesson.objects.filter(cf_uid=uid).exists()
+                         or Course.objects.filter(trailer_cf_uid=uid).exists())
+    return {"ok": True, "updated": updated}, (uid if needs_confirm else None), event.pk
+
+
+def _apply_to_lesson(lesson: Lesson, ready: bool, playback_id: str | None, duration: int) -> bool:
+    changed = False
+    if lesson.cf_ready != ready:
+        lesson.cf_ready = ready
+        changed = True
+    if playback_id and lesson.cf_playback_id != playback_id:
+        lesson.cf_playback_id = playback_id
+        changed = True
+    if duration and lesson.duration_seconds != duration:
+        lesson.duration_seconds = duration
+        changed = True
+    return changed
+
+
+def _apply_to_trailer(course: Course, ready: bool, playback_id: str | None) -> bool:
+    changed = False
+    if course.trailer_cf_ready != ready:
+        course.trailer_cf_ready = ready
+        changed = True
+    if playback_id and course.trailer_cf_playback_id != playback_id:
+        course.trailer_cf_playback_id = playback_id
+        changed = True
+    return changed
+
+
+def _selection_since(lessons, courses) -> str:
+    # un asset de leçon / bande-annonce est créé après son cours
+    course_ids = {l.course_id for l in lessons} | {c.pk for c in courses}
+    first = Course.objects.filter(pk__in=course_ids).aggregate(first=Min("created_at"))["first"]
+    return (first - RECONCILE_SINCE_MARGIN).astimezone(dt_timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _get_assets(uids):
+    for uid in uids:
+        try:
+            yield get_asset(uid)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            # supprimé côté Stream : rien à réconcilier
+
+
+def reconcile_stream_assets(*, lessons=None, courses=None, status: str | None = None,
+                            since: str | None = None, dry_run: bool = False) -> dict:
+    """
+    Réconcilie nos lignes Lesson / Course (bande-annonce) avec la liste des assets Stream.
+
+    - une seule pagination de l'API de liste au lieu d'un GET par asset ;
+    - correspondance par cf_uid / trailer_cf_uid ;
+    - écriture groupée via bulk_update (uniquement les lignes modifiées).
+
+    `lessons` / `courses` permettent de restreindre aux querysets voulus (ex: sélection admin) :
+    jusqu'à RECONCILE_GET_MAX assets, un GET par uid ; au-delà, liste bornée à la création du plus
+    ancien cours concerné, puis un GET pour les quelques uids restés introuvables.
+    `status` / `since` filtrent côté Cloudflare (état, date de création ISO 8601).
+    """
+    lesson_qs = lessons if lessons is not None else Lesson.objects.all()
+    course_qs = courses if courses is not None else Course.objects.all()
+
+    by_lesson_uid = {l.cf_uid: l for l in lesson_qs.exclude(cf_uid="")}
+    by_trailer_uid = {c.trailer_cf_uid: c for c in course_qs.exclude(trailer_cf_uid="")}
+
+    stats = {"assets": 0, "matched": 0, "lessons_updated": 0, "courses_updated": 0}
+    if not by_lesson_uid and not by_trailer_uid:
+        return stats
+
+    uids = by_lesson_uid.keys() | by_trailer_uid.keys()
+    # sélection sans filtre explicite : on choisit nous-mêmes la requête la plus étroite
+    auto = (lessons is not None or courses is not None) and status is None and since is None
+    dirty_lessons, dirty_courses = [], []
+
+    def apply(assets) -> set:
+        matched = set()
+        for asset in assets:
+            stats["assets"] += 1
+            uid = asset.get("uid") or ""
+            lesson = by_lesson_uid.get(uid)
+            course = by_trailer_uid.get(uid)
+            if not lesson and not course:
+                continue
+            stats["matched"] += 1
+            matched.add(uid)
+            ready, playback_id, duration = asset_state(asset)
+            if lesson and _apply_to_lesson(lesson, ready, playback_id, duration):
+                dirty_lessons.append(lesson)
+            if course and _apply_to_trailer(course, ready, playback_id):
+                dirty_courses.append(course)
+        return matched
+
+    if auto and len(uids) <= RECONCILE_GET_MAX:
+        apply(_get_assets(sorted(uids)))
+    else:
+        if auto:
+            since = _selection_since(by_lesson_uid.values(), by_trailer_uid.values())
+        missing = uids - apply(list_assets(status=status, start=since, page_size=RECONCILE_PAGE_SIZE))
+        # borne posée par nous : un asset plus ancien que son cours (uid saisi à la main) est relu seul
+        if auto and len(missing) <= RECONCILE_GET_MAX:
+            apply(_get_assets(sorted(missing)))
+
+    stats["lessons_updated"] = len(dirty_lessons)
+    stats["courses_updated"] = len(dirty_courses)
+    if dry_run:
+        return stats
+
+    with transaction.atomic():
+        if dirty_lessons:
+            Lesson.objects.bulk_update(
+                dirty_lessons, ["cf_ready", "cf_playback_id", "duration_seconds"], batch_size=BULK_BATCH_SIZE
+            )
+        if dirty_courses:
+            Course.objects.bulk_update(
+                dirty_courses, ["trailer_cf_ready", "trailer_cf_playback_id"], batch_size=BULK_BATCH_SIZE
+            )
+        purge_courses([l.course_id for l in dirty_lessons])
+        purge_courses([c.pk for c in dirty_courses], listings=True)
+    return stats
+
+
+def sync_local_durations(lessons=None, force: bool = False) -> int:
+    """
+    Renseigne duration_seconds des leçons servies depuis video_file (pas encore sur Stream)
+    en sondant le fichier local. Par défaut seulement les durées inconnues (0).
+    Les durées Stream (webhook / réconciliation) restent la référence dès qu'elles existent.
+    """
+    qs = lessons if lessons is not None else Lesson.objects.all()
+    qs = qs.exclude(video_file="").filter(cf_ready=False)
+    if not force:
+        qs = qs.filter(duration_seconds=0)
+
+    dirty = []
+    for lesson in qs.only("id", "course_id", "video_file", "duration_seconds"):
+        try:
+            duration = probe_duration_seconds(lesson.video_file.path)
+        except Exception:
+            continue
+        if duration and duration != lesson.duration_seconds:
+            lesson.duration_seconds = duration
+            dirty.append(lesson)
+    if dirty:
+        Lesson.objects.bulk_update(dirty, ["duration_seconds"], batch_size=BULK_BATCH_SIZE)
+        purge_courses([l.course_id for l in dirty])
+    return len(dirty)
@@ -0,0 +1,128 @@
+// Envoi direct navigateur → Cloudflare Stream depuis l'admin Lesson.
+// Django ne fait que délivrer une URL à usage unique : la vidéo ne passe pas par le serveur.
+(function () {
+  "use strict";
+
+  // Cloudflare TUS: chunks multiples de 256 Kio, min 5 Mo → 50 Mo comme côté serveur
+  var TUS_CHUNK = 50 * 1024 * 1024;
+  var TUS_RETRIES = 3;
+
+  function csrfToken() {
+    var el = document.querySelector("input[name=csrfmiddlewaretoken]");
+    return el ? el.value : "";
+  }
+
+  function postJSON(url, body) {
+    return fetch(url, {
+      method: "POST",
+      credentials: "same-origin",
+      headers: { "Content-Type": "application/json", "X-CSRFToken": csrfToken() },
+      body: JSON.stringify(body),
+    }).then(function (r) {
+      return r.json().then(function (data) {
+        if (!r.ok) throw new Error(data.detail || r.status);
+        return data;
+      });
+    });
+  }
+
+  // ≤ seuil : POST multipart simple, avec progression octet par octet
+  function uploadPost(url, file, onProgress) {
+    return new Promise(function (resolve, reject) {
+      var xhr = new XMLHttpRequest();
+      var form = new FormData();
+      form.append("file", file, file.name);
+      xhr.open("POST", url);
+      xhr.upload.onprogress = function (e) {
+        if (e.lengthComputable) onProgress(e.loaded / e.total);
+      };
+      xhr.onload = function () {
+        xhr.status < 400 ? resolve() : reject(new Error("upload " + xhr.status));
+      };
+      xhr.onerror = function () { reject(new Error("network error")); };
+      xhr.send(form);
+    });
+  }
+
+  function tusOffset(url) {
+    return fetch(url, { method: "HEAD", headers: { "Tus-Resumable": "1.0.0" } }).then(function (r) {
+      return parseInt(r.headers.get("Upload-Offset") || "0", 10);
+    });
+  }
+
+  // > seuil : PATCH TUS chunk par chunk ; en cas d'erreur on relit l'offset et on reprend
+  function uploadTus(url, file, onProgress) {
+    var offset = 0;
+    var failures = 0;
+
+    function next() {
+      if (offset >= file.size) return Promise.resolve();
+      return fetch(url, {
+        method: "PATCH",
+        headers: {
+          "Tus-Resumable": "1.0.0",
+          "Upload-Offset": String(offset),
+          "Content-Type": "application/offset+octet-stream",
+        },
+        body: file.slice(offset, offset + TUS_CHUNK),
+      }).then(function (r) {
+        if (!r.ok) throw new Error("tus " + r.status);
+        offset = parseInt(r.headers.get("Upload-Offset") || String(offset + TUS_CHUNK), 10);
+        failures = 0;
+        onProgress(offset / file.size);
+        return next();
+      }).catch(function (err) {
+        if (++failures > TUS_RETRIES) throw err;
+        return tusOffset(url).then(function (o) { offset = o; return next(); });
+      });
+    }
+
+    return next();
+  }
+
+  function init(box) {
+    var input = box.querySelector("input[type=file]");
+    var button = box.querySelector("button");
+    var progress = box.querySelector("progress");
+    var status = box.querySelector(".cf-direct-upload-status");
+
+    function setProgress(ratio) {
+      progress.value = Math.round(ratio * 100);
+      status.textContent = progress.value + " %";
+    }
+
+    button.addEventListener("click", function () {
+      var file = input.files && input.files[0];
+      if (!file) { status.textContent = "Choisis un fichier vidéo."; return; }
+      button.disabled = true;
+      progress.style.display = "";
+      status.textContent = "Préparation…";
+
+      var uid;
+      postJSON(box.dataset.startUrl, { size: file.size, name: file.name, lesson_id: box.dataset.lessonId || null })
+        .then(function (res) {
+          uid = res.uid;
+          return res.protocol === "tus"
+            ? uploadTus(res.uploadURL, file, setProgress)
+            : uploadPost(res.uploadURL, file, setProgress);
+        })
+        .then(function () {
+          if (box.dataset.completeUrl) return postJSON(box.dataset.completeUrl, { uid: uid });
+          // page d'ajout : on renseigne cf_uid, il sera enregistré avec la leçon
+          var field = document.getElementById("id_cf_uid");
+          if (field) field.value = uid;
+        })
+        .then(function () {
+          status.textContent = "Envoyé (UID=" + uid + "). Encodage en cours côté Stream.";
+        })
+        .catch(function (err) {
+          status.textContent = "Échec : " + err.message;
+          button.disabled = false;
+        });
+    });
+  }
+
+  document.addEventListener("DOMContentLoaded", function () {
+    document.querySelectorAll(".cf-direct-upload").forEach(init);
+  });
+})();
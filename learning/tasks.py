@@ -0,0 +1,17 @@
+# learning/tasks.py
+from datetime import timedelta
+
+from jobs.registry import task
+from .services.stream_ingest import process_upload_queue
+from .services import stream_sync
+
+
+@task(every=timedelta(minutes=5), priority=-5)
+def process_stream_uploads():
+    # aussi périodique : reprend les envois interrompus (requeue des jobs 'uploading' périmés)
+    process_upload_queue()
+
+
+@task(unique=True, max_attempts=3)
+def confirm_stream_asset(uid: str, event_id: int | None = None):
+    stream_sync.confirm_stream_asset(uid, event_id)
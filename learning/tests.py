@@ -1,3 +1,387 @@
-from django.test import TestCase
+# learning/tests.py
+# Webhook Stream : corps non signé / signature forgée / secret d'URL faux → 403 sans effet ;
+# repli meta.lesson_id / meta.course_id limité aux envois en cours ; téléchargements de documents par lots ;
+# client Stream et réconciliation contre le faux serveur (learning.services.fake_stream).
+import hashlib
+import hmac
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+import requests
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from catalog.models import Course
+from .models import Document, DocumentDownload, Enrollment, Lesson, StreamUpload, StreamWebhookEvent
+from .services.document_downloads import flush_downloads, track_download
+from .services.stream_ingest import enqueue_trailer_upload, run_upload, supersede_trailer_uploads
+from .services import cloudflare_stream as cf
+from .services.fake_stream import FakeStreamServer
+from .services.stream_sync import (
+    apply_asset_state, handle_stream_webhook, reconcile_stream_assets, verify_webhook_signature,
+)
+
+SIGNING_SECRET = "whsec-test"
+URL_SECRET = "url-secret"
+
+
+def _signature(body: bytes, key: str = SIGNING_SECRET, ts: int | None = None) -> str:
+    ts = int(time.time()) if ts is None else ts
+    sig = hmac.new(key.encode(), f"{ts}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"time={ts},sig1={sig}"
+
+
+@override_settings(CF_STREAM_WEBHOOK_SIGNING_SECRET=SIGNING_SECRET, CF_STREAM_WEBHOOK_SECRET=URL_SECRET)
+class StreamWebhookAuthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(title="C", slug="c", synopsis="s", description="d",
+                                           price_cents=100, is_active=True)
+        cls.lesson = Lesson.objects.create(course=cls.course, title="L", order=1,
+                                           cf_uid="live-uid", cf_playback_id="pb-live", cf_ready=True)
+
+    def _post(self, body: dict, path="/api/stream/webhook/", **headers):
+        raw = json.dumps(body).encode()
+        if headers.pop("signed", False):
+            headers["HTTP_WEBHOOK_SIGNATURE"] = _signature(raw)
+        return self.client.post(path, data=raw, content_type="application/json", secure=True, **headers)
+
+    def _assert_untouched(self):
+        self.lesson.refresh_from_db()
+        self.assertEqual((self.lesson.cf_uid, self.lesson.cf_playback_id, self.lesson.cf_ready),
+                         ("live-uid", "pb-live", True))
+        self.assertFalse(StreamWebhookEvent.objects.exists())
+
+    def test_unsigned_body_is_rejected(self):
+        r = self._post({"uid": "live-uid", "status": {"state": "error"}})
+        self.assertEqual(r.status_code, 403)
+        self._assert_untouched()
+
+    def test_forged_signature_is_rejected(self):
+        body = {"uid": "evil", "status": {"state": "ready"}, "playback": {"id": "pb-evil"},
+                "meta": {"lesson_id": self.lesson.pk}}
+        raw = json.dumps(body).encode()
+        for header in (_signature(raw, key="guess"), _signature(raw, ts=int(time.time()) - 3600),
+                       _signature(b"{}"), "garbage"):
+            with self.subTest(header=header):
+                r = self.client.post("/api/stream/webhook/", data=raw, content_type="application/json",
+                                     secure=True, HTTP_WEBHOOK_SIGNATURE=header)
+                self.assertEqual(r.status_code, 403)
+        self._assert_untouched()
+
+    def test_wrong_url_secret_is_rejected(self):
+        r = self._post({"uid": "live-uid", "status": {"state": "ready"}}, path="/webhooks/cf-stream/nope/")
+        self.assertEqual(r.status_code, 403)
+        self._assert_untouched()
+
+    @override_settings(CF_STREAM_WEBHOOK_SIGNING_SECRET="", CF_STREAM_WEBHOOK_SECRET="")
+    def test_nothing_configured_rejects_everything(self):
+        r = self._post({"uid": "live-uid", "status": {"state": "ready"}}, path="/webhooks/cf-stream/x/")
+        self.assertEqual(r.status_code, 403)
+        self._assert_untouched()
+
+    def test_signed_body_is_applied(self):
+        other = Lesson.objects.create(course=self.course, title="L2", order=2, cf_uid="new-uid")
+        r = self._post({"uid": "new-uid", "status": {"state": "ready"}, "playback": {"id": "pb-new"}},
+                       signed=True)
+        self.assertEqual(r.status_code, 200)
+        other.refresh_from_db()
+        self.assertEqual((other.cf_ready, other.cf_playback_id), (True, "pb-new"))
+
+    def test_url_secret_is_accepted(self):
+        r = self._post({"uid": "unknown", "status": {"state": "ready"}},
+                       path=f"/webhooks/cf-stream/{URL_SECRET}/")
+        self.assertEqual(r.status_code, 200)
+
+    def test_meta_fallback_never_repoints_a_lesson(self):
+        # signé mais uid inconnu : leçon déjà rattachée, aucun envoi en cours → ignoré
+        r = self._post({"uid": "evil", "status": {"state": "ready"}, "playback": {"id": "pb-evil"},
+                        "meta": {"lesson_id": self.lesson.pk}}, signed=True)
+        self.assertEqual(r.status_code, 200)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.cf_uid, "live-uid")
+
+        fresh = Lesson.objects.create(course=self.course, title="L3", order=3)
+        self._post({"uid": "evil", "status": {"state": "ready"}, "playback": {"id": "pb-evil2"},
+                    "meta": {"lesson_id": fresh.pk}}, signed=True)
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.cf_uid, "")
+
+    def test_meta_fallback_adopts_in_flight_upload(self):
+        fresh = Lesson.objects.create(course=self.course, title="L3", order=3)
+        StreamUpload.objects.create(lesson=fresh, file_path="/tmp/x.mp4", cf_uid="tus-uid", status="uploading")
+        self._post({"uid": "tus-uid", "status": {"state": "ready"}, "playback": {"id": "pb-tus"},
+                    "meta": {"lesson_id": fresh.pk}}, signed=True)
+        fresh.refresh_from_db()
+        self.assertEqual((fresh.cf_uid, fresh.cf_ready, fresh.cf_playback_id), ("tus-uid", True, "pb-tus"))
+
+
+class TrailerSourceChangeTests(TestCase):
+    # source remplacée dans l'admin : l'asset de l'ancienne n'est plus repris (webhook tardif, fin d'envoi)
+    def setUp(self):
+        self.course = Course.objects.create(title="T", slug="t", synopsis="s", description="d",
+                                            price_cents=100, is_active=True)
+        self.old = StreamUpload.objects.create(course=self.course, file_path="/tmp/old.mp4",
+                                               cf_uid="old-uid", status="uploading")
+        self.meta = {"kind": "trailer", "course_id": self.course.pk}
+
+    def test_late_ready_for_superseded_upload_is_ignored(self):
+        supersede_trailer_uploads(self.course)
+        self.assertEqual(apply_asset_state("old-uid", True, "pb-old", meta=self.meta), 0)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.trailer_cf_uid, self.course.trailer_cf_ready), ("", False))
+
+    def test_in_flight_upload_is_adopted_once(self):
+        self.assertEqual(apply_asset_state("old-uid", True, "pb-old", meta=self.meta), 1)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.trailer_cf_uid, self.course.trailer_cf_playback_id), ("old-uid", "pb-old"))
+        # un autre uid ne remplace jamais celui déjà rattaché
+        StreamUpload.objects.create(course=self.course, file_path="/tmp/b.mp4", cf_uid="other", status="queued")
+        self.assertEqual(apply_asset_state("other", True, "pb-other", meta=self.meta), 0)
+
+    def test_superseded_upload_is_not_attached_on_completion(self):
+        uploader = mock.Mock(offset=10, stop_at=10)
+
+        def superseded(job):
+            supersede_trailer_uploads(self.course)
+            return uploader
+
+        with mock.patch("learning.services.stream_ingest._open_uploader", side_effect=superseded):
+            self.assertFalse(run_upload(self.old.pk))
+        self.old.refresh_from_db()
+        self.course.refresh_from_db()
+        self.assertEqual((self.old.status, self.course.trailer_cf_uid), ("failed", ""))
+
+    def test_new_file_does_not_reuse_old_job(self):
+        course = mock.Mock(trailer_uploads=StreamUpload.objects.filter(course=self.course))
+        course.trailer_file.path = "/tmp/new.mp4"
+        with mock.patch("learning.services.stream_ingest.os.path.getsize", return_value=5), \
+                mock.patch.object(StreamUpload.objects, "create") as create:
+            enqueue_trailer_upload(course)
+        create.assert_called_once_with(course=course, file_path="/tmp/new.mp4", size_bytes=5)
+
+
+@mock.patch("learning.services.document_downloads.threading.Timer", mock.MagicMock())
+class DocumentDownloadTrackingTests(TestCase):
+    # last_document_download_at écrit au flush pour chaque clic (doublons compris), sans UPDATE par clic
+    def setUp(self):
+        cache.clear()
+        course = Course.objects.create(title="D", slug="d", synopsis="s", description="d",
+                                       price_cents=100, is_active=True)
+        user = get_user_model().objects.create_user(username="dl", email="dl@example.com", password="x")
+        self.enrollment = Enrollment.objects.create(user=user, course=course)
+        self.doc = Document.objects.create(course=course, title="PDF", file="docs/a.pdf")
+
+    def test_clicks_are_written_at_flush(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(track_download(self.enrollment.pk, self.doc.pk))
+            self.assertFalse(track_download(self.enrollment.pk, self.doc.pk))
+        self.enrollment.refresh_from_db()
+        self.assertIsNone(self.enrollment.last_document_download_at)
+
+        self.assertEqual(flush_downloads(), 1)
+        self.enrollment.refresh_from_db()
+        self.doc.refresh_from_db()
+        self.assertIsNotNone(self.enrollment.last_document_download_at)
+        self.assertEqual((self.doc.download_count, DocumentDownload.objects.count()), (1, 1))
+
+    def test_duplicate_alone_still_moves_the_date(self):
+        track_download(self.enrollment.pk, self.doc.pk)
+        flush_downloads()
+        first = Enrollment.objects.get(pk=self.enrollment.pk).last_document_download_at
+        self.assertFalse(track_download(self.enrollment.pk, self.doc.pk))
+        self.assertEqual(flush_downloads(), 0)
+        self.assertGreater(Enrollment.objects.get(pk=self.enrollment.pk).last_document_download_at, first)
+        self.assertEqual(DocumentDownload.objects.count(), 1)
+
+
+class ReconcileStreamAssetsTests(TestCase):
+    # réconciliation contre le faux serveur Stream : GET ciblés, pagination, un seul bulk_update
+    def setUp(self):
+        self.srv = FakeStreamServer().start()
+        self.addCleanup(self.srv.stop)
+        self.addCleanup(self.srv.patch_clients())
+        self.course = Course.objects.create(title="R", slug="r", synopsis="s", description="d",
+                                            price_cents=100, is_active=True)
+
+    def _lessons(self, uids):
+        return [Lesson.objects.create(course=self.course, title=f"L{i}", order=i, cf_uid=uid)
+                for i, uid in enumerate(uids, 1)]
+
+    def _requests(self):
+        with self.srv.lock:
+            return self.srv.request_count
+
+    def test_small_selection_gets_each_uid(self):
+        uids = self.srv.seed_assets(8)
+        self._lessons(uids[:3] + ["deleted-on-stream"])
+        stats = reconcile_stream_assets(lessons=Lesson.objects.all(), courses=Course.objects.none())
+        self.assertEqual(self._requests(), 4)  # pas de pagination de la bibliothèque
+        self.assertEqual((stats["assets"], stats["matched"], stats["lessons_updated"]), (3, 3, 3))
+        self.assertEqual(Lesson.objects.filter(cf_ready=True, duration_seconds__gt=0).count(), 3)
+
+    @mock.patch("learning.services.stream_sync.RECONCILE_PAGE_SIZE", 4)
+    def test_full_library_is_paginated_and_bulk_updated(self):
+        uids = self.srv.seed_assets(10)
+        lessons = self._lessons(uids[::2] + ["unknown-uid"])
+        with mock.patch.object(Lesson.objects, "bulk_update", wraps=Lesson.objects.bulk_update) as bulk:
+            stats = reconcile_stream_assets()
+        self.assertEqual(bulk.call_count, 1)
+        self.assertEqual(self._requests(), 4)  # bornes inclusives : chaque page repart du dernier asset vu
+        self.assertEqual((stats["assets"], stats["matched"], stats["lessons_updated"]), (10, 5, 5))
+        for lesson in lessons:
+            lesson.refresh_from_db()
+            with self.subTest(uid=lesson.cf_uid):
+                self.assertEqual(lesson.cf_ready, lesson.cf_uid != "unknown-uid")
+        # second passage : rien n'a changé, aucune écriture
+        with mock.patch.object(Lesson.objects, "bulk_update") as bulk:
+            self.assertEqual(reconcile_stream_assets()["lessons_updated"], 0)
+        bulk.assert_not_called()
+
+    @mock.patch("learning.services.stream_sync.RECONCILE_GET_MAX", 2)
+    def test_large_selection_lists_from_its_courses_only(self):
+        old = self.srv.seed_assets(20)
+        with self.srv.lock:
+            for uid in old:
+                self.srv.assets[uid]["created"] = "2020-01-01T00:00:00.000000Z"
+        recent = self.srv.seed_assets(3)
+        # uid rattaché à la main à un asset antérieur au cours : relu par un GET ciblé
+        self._lessons(recent + [old[0]])
+        stats = reconcile_stream_assets(lessons=Lesson.objects.all(), courses=Course.objects.none())
+        self.assertEqual((stats["assets"], stats["matched"], stats["lessons_updated"]), (4, 4, 4))
+        self.assertEqual(self._requests(), 2)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("délai dépassé")
+        time.sleep(0.02)
+
+
+class _WebhookReceiver(BaseHTTPRequestHandler):
+    received: list = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.received.append((self.headers.get("Webhook-Signature", ""), body))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@override_settings(CF_STREAM_WEBHOOK_SIGNING_SECRET=SIGNING_SECRET)
+class FakeStreamClientTests(TestCase):
+    # aller-retour de chaque appel de services.cloudflare_stream contre le faux serveur
+    def setUp(self):
+        self.srv = FakeStreamServer(encode_seconds=0.05, webhook_secret=SIGNING_SECRET).start()
+        self.addCleanup(self.srv.stop)
+        self.addCleanup(self.srv.patch_clients())
+        tmp = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+        tmp.write(b"0123456789" * 10)
+        tmp.close()
+        self.addCleanup(os.unlink, tmp.name)
+        self.path = tmp.name
+
+    def _state(self, uid):
+        return cf.get_asset(uid)["status"]["state"]
+
+    def test_direct_upload_round_trip(self):
+        du = cf.create_direct_upload(meta={"kind": "lesson", "lesson_id": 1}, require_signed=True)
+        self.assertEqual(self._state(du["uid"]), "pendingupload")
+        cf.upload_file_to_direct_upload(du["uploadURL"], self.path)
+        _wait_for(lambda: self._state(du["uid"]) == "ready")
+        asset = cf.get_asset(du["uid"])
+        self.assertTrue(asset["requireSignedURLs"])
+        self.assertEqual(asset["meta"], {"kind": "lesson", "lesson_id": "1"})  # valeurs normalisées en str
+        self.assertEqual(cf.extract_playback_id(asset), du["uid"])
+        self.assertGreater(cf.asset_duration_seconds(asset), 0)
+
+    def test_copy_and_delete(self):
+        uid = cf.create_from_url("https://example.com/t.mp4", meta={"kind": "trailer"})["uid"]
+        self.assertEqual(self._state(uid), "downloading")
+        _wait_for(lambda: self._state(uid) == "ready")
+        cf.delete_asset(uid)
+        with self.assertRaises(requests.HTTPError) as ctx:
+            cf.get_asset(uid)
+        self.assertEqual(ctx.exception.response.status_code, 404)
+
+    def test_list_pagination_and_filters(self):
+        ready = set(self.srv.seed_assets(7))
+        pending = self.srv.create_asset()["uid"]
+        listed = [a["uid"] for a in cf.list_assets(page_size=3)]
+        self.assertEqual(sorted(listed), sorted(ready | {pending}))  # chaque asset une seule fois
+        self.assertEqual({a["uid"] for a in cf.list_assets(status="ready", page_size=3)}, ready)
+        self.assertEqual(list(cf.list_assets(start="2999-01-01T00:00:00Z")), [])
+
+    def test_tus_create_patch_and_resume(self):
+        du = cf.create_tus_direct_upload(100, meta={"title": "Leçon"}, require_signed=True)
+        self.assertEqual(cf.tus_uid_from_url(du["uploadURL"]), du["uid"])
+        tus = {"Tus-Resumable": "1.0.0", "Content-Type": "application/offset+octet-stream"}
+        r = requests.patch(du["uploadURL"], data=b"x" * 40, headers={**tus, "Upload-Offset": "0"})
+        self.assertEqual((r.status_code, r.headers["Upload-Offset"]), (204, "40"))
+        # offset périmé : refusé, l'offset réel est renvoyé
+        r = requests.patch(du["uploadURL"], data=b"x" * 10, headers={**tus, "Upload-Offset": "0"})
+        self.assertEqual((r.status_code, r.headers["Upload-Offset"]), (409, "40"))
+
+        # reprise par tuspy depuis la Location (HEAD) : seuls les octets restants partent
+        uploader = cf.open_tus_upload(self.path, url=du["uploadURL"])
+        self.assertEqual(uploader.offset, 40)
+        uploader.upload()
+        _wait_for(lambda: self._state(du["uid"]) == "ready")
+
+    def test_tus_upload_file(self):
+        uid = cf.tus_upload_file(self.path, meta={"title": "T"}, require_signed=False)
+        self.assertEqual(self.srv.uploads[uid], {"length": 100, "offset": 100})
+        _wait_for(lambda: self._state(uid) == "ready")
+
+    def test_webhook_emission_is_signed_and_applied(self):
+        _WebhookReceiver.received = []
+        receiver = ThreadingHTTPServer(("127.0.0.1", 0), _WebhookReceiver)
+        threading.Thread(target=receiver.serve_forever, daemon=True).start()
+        self.addCleanup(receiver.server_close)
+        self.addCleanup(receiver.shutdown)
+        self.srv.webhook_url = "http://127.0.0.1:%d/" % receiver.server_address[1]
+
+        course = Course.objects.create(title="W", slug="w", synopsis="s", description="d",
+                                       price_cents=100, is_active=True)
+        uid = cf.create_from_url("https://example.com/l.mp4")["uid"]
+        lesson = Lesson.objects.create(course=course, title="L", order=1, cf_uid=uid)
+        _wait_for(lambda: self.srv.webhook_log)
+        self.assertEqual(self.srv.webhook_log, [(uid, 200)])
+
+        signature, body = _WebhookReceiver.received[0]
+        self.assertTrue(verify_webhook_signature(body, signature))
+        self.assertFalse(verify_webhook_signature(body + b" ", signature))
+        handle_stream_webhook(body)
+        lesson.refresh_from_db()
+        self.assertEqual((lesson.cf_ready, lesson.cf_playback_id), (True, uid))
+
+    def test_failure_injection(self):
+        self.srv.failure_rate = 1.0
+        with self.assertRaisesMessage(RuntimeError, "CF copy failed 503"):
+            cf.create_from_url("https://example.com/t.mp4")
+        with self.assertRaises(requests.HTTPError) as ctx:
+            list(cf.list_assets())
+        self.assertEqual(ctx.exception.response.status_code, 503)
+
+    def test_management_command(self):
+        out = io.StringIO()
+        with mock.patch("learning.management.commands.fake_stream_server.time.sleep",
+                        side_effect=KeyboardInterrupt):
+            call_command("fake_stream_server", port=0, seed=2, stdout=out)
+        self.assertIn("Fake Stream sur http://127.0.0.1:", out.getvalue())
+        self.assertIn("CF_STREAM_API_BASE=", out.getvalue())
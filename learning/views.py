@@ -8,82 +8,87 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.http import FileResponse, Http404
 
+from accounts.authentication import StatelessJWTAuthentication
 from catalog.models import Course
-from .models import Enrollment, Favorite, Lesson, Progress, Document, DocumentDownload
-from .serializers import MyLibraryItemSerializer, FavoriteSerializer, ProgressUpsertSerializer, \
-    ContinueWatchingItemSerializer
+from formaflix.throttling import TokenBucketThrottle
+from .models import Enrollment, Favorite, Document
+from .progress import LESSON_NOT_FOUND, NOT_ENROLLED, record_progress
+from .services.document_downloads import track_download
+from .fast_serializers import continue_watching_items, favorite_items, library_items
+from .serializers import MyLibraryItemSerializer, ProgressUpsertSerializer
 from .utils import last_progress, compute_enrollment_percent
 
 
 class MyLibraryView(generics.ListAPIView):
     serializer_class = MyLibraryItemSerializer
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Enrollment.objects.filter(user=self.request.user).select_related("course")
+        return Enrollment.objects.filter(user_id=self.request.user.id).select_related("course")
+
+    def list(self, request, *args, **kwargs):
+        # même forme que MyLibraryItemSerializer, construite depuis .values()
+        return Response(library_items(Enrollment.objects.filter(user_id=request.user.id), request))
 
 class MyListView(APIView):
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "my_list"
+    throttle_methods = ("POST",)
 
     def get(self, request):
-        favs = Favorite.objects.filter(user=request.user).select_related("course").order_by("-created_at")
-        data = FavoriteSerializer(favs, many=True, context={"request": request}).data
-        return Response(data)
+        favs = Favorite.objects.filter(user_id=request.user.id).order_by("-created_at")
+        return Response(favorite_items(favs, request))
 
     def post(self, request):
         course_id = request.data.get("course_id")
         course = get_object_or_404(Course, pk=course_id, is_active=True)
-        Favorite.objects.get_or_create(user=request.user, course=course)
+        Favorite.objects.get_or_create(user_id=request.user.id, course=course)
         return Response({"ok": True}, status=status.HTTP_201_CREATED)
 
     def delete(self, request):
         course_id = request.data.get("course_id")
         if not course_id:
             return Response({"detail": "course_id required"}, status=400)
-        Favorite.objects.filter(user=request.user, course_id=course_id).delete()
+        Favorite.objects.filter(user_id=request.user.id, course_id=course_id).delete()
         return Response({"ok": True})
 
 class ProgressUpsertView(APIView):
+    # heartbeat toutes les 5 s : aucun chargement du User, l'id du token suffit
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    # onglet dupliqué / Player en boucle : heartbeats en trop coalescés plutôt que refusés
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "progress"
+    throttle_soft = True
 
     def patch(self, request):
         ser = ProgressUpsertSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         course_id = ser.validated_data["course_id"]
         lesson_id = ser.validated_data["lesson_id"]
-        pos = ser.validated_data["position_seconds"]
-        duration = ser.validated_data.get("duration_seconds")
         completed = ser.validated_data.get("completed", False)
-
-        # doit être inscrit
-        enrollment = Enrollment.objects.filter(user=request.user, course_id=course_id).first()
-        if not enrollment:
-            return Response({"detail": "not enrolled"}, status=403)
-
-        lesson = get_object_or_404(Lesson, pk=lesson_id, course_id=course_id)
-
-        pos = max(0, ser.validated_data["position_seconds"])
-        duration = ser.validated_data.get("duration_seconds")
-        if duration is None or duration < 1:
-            duration = max(pos, 1)  # fallback propre
-
-        if duration is not None and (lesson.duration_seconds or 0) < duration:
-            lesson.duration_seconds = duration
-            lesson.save(update_fields=["duration_seconds"])
-
-        prog, _ = Progress.objects.get_or_create(enrollment=enrollment, lesson=lesson)
-        prog.position_seconds = max(prog.position_seconds or 0, pos)
-        if completed:
-            prog.completed = True
-        prog.save()
+        flush = ser.validated_data.get("flush", False) and not getattr(request, "throttle_exceeded", False)
+
+        # inscription et appartenance de la leçon au cours vérifiées par record_progress
+        refused = record_progress(request.user.id, course_id, lesson_id,
+                                  ser.validated_data["position_seconds"], completed, flush,
+                                  ser.validated_data.get("duration_seconds"))
+        if refused == NOT_ENROLLED:
+            return Response({"detail": NOT_ENROLLED}, status=403)
+        if refused == LESSON_NOT_FOUND:
+            raise Http404(LESSON_NOT_FOUND)
         return Response({"ok": True})
 
 class ContinueWatchingView(APIView):
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         enrolls = (Enrollment.objects
-                   .filter(user=request.user)
+                   .filter(user_id=request.user.id)
                    .select_related("course"))
         items = []
         for e in enrolls:
@@ -98,24 +103,29 @@ class ContinueWatchingView(APIView):
                 continue
 
             items.append({
-                "course": e.course,
+                "course_id": e.course_id,
                 "percent": int(percent or 0),  # autorise 0–99
                 "resume_lesson_id": getattr(p_last.lesson, "id", None),
                 "resume_position_seconds": int(p_last.position_seconds or 0),
             })
 
-        data = ContinueWatchingItemSerializer(items, many=True, context={"request": request}).data
-        return Response(data)
+        return Response(continue_watching_items(items, request))
 
 
 class TrackDocumentDownloadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "doc_tracking"
     def post(self, request, doc_id: int):
-        doc = get_object_or_404(Document, pk=doc_id)
-        enrollment = Enrollment.objects.filter(user=request.user, course=doc.course).first()
-        if not enrollment:
+        course_id = Document.objects.filter(pk=doc_id).values_list("course_id", flat=True).first()
+        if not course_id:
+            raise Http404
+        enrollment_id = (Enrollment.objects.filter(user_id=request.user.id, course_id=course_id)
+                         .values_list("id", flat=True).first())
+        if not enrollment_id:
             return Response({"detail": "not enrolled"}, status=403)
-        DocumentDownload.objects.create(enrollment=enrollment, document=doc)
+        # dédoublonné sur une fenêtre, écrit par lots (voir services.document_downloads)
+        track_download(enrollment_id, doc_id)
         return Response({"ok": True})
 
 
@@ -7,9 +7,10 @@ class OrderItemInline(admin.TabularInline):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "status", "total_cents", "currency", "created_at")
+    list_display = ("id", "user", "course", "status", "total_cents", "currency", "created_at")
     list_filter = ("status", "currency", "created_at")
     search_fields = ("id", "user__username", "user__email", "stripe_session_id")
+    readonly_fields = ("stripe_session_url", "stripe_session_expires_at")
     inlines = [OrderItemInline]
 
 @admin.register(OrderItem)
@@ -0,0 +1,16 @@
+# orders/management/commands/expire_pending_orders.py
+from django.core.management.base import BaseCommand
+
+from orders.services import expire_pending_orders
+
+
+class Command(BaseCommand):
+    help = "Expire les commandes 'pending' abandonnées et supprime les anciennes commandes expirées."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retention-days", type=int, default=30,
+                            help="Suppression des commandes expirées plus anciennes (0 = ne rien supprimer).")
+
+    def handle(self, *args, **opts):
+        expired, deleted = expire_pending_orders(retention_days=opts["retention_days"])
+        self.stdout.write(self.style.SUCCESS(f"{expired} commande(s) expirée(s), {deleted} supprimée(s)"))
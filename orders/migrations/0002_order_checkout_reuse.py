@@ -0,0 +1,58 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_order_course(apps, schema_editor):
+    # commandes existantes : cours = première ligne de la commande
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+    first_items = (OrderItem.objects
+                   .filter(order__course__isnull=True)
+                   .order_by("order_id", "id")
+                   .values_list("order_id", "course_id"))
+    seen = set()
+    for order_id, course_id in first_items.iterator():
+        if order_id in seen:
+            continue
+        seen.add(order_id)
+        Order.objects.filter(pk=order_id).update(course_id=course_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_course_trailer_cf_playback_id_and_more'),
+        ('orders', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='course',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='catalog.course'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='stripe_session_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='stripe_session_url',
+            field=models.URLField(blank=True, max_length=1000),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('pending', 'pending'), ('paid', 'paid'), ('failed', 'failed'), ('expired', 'expired')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'course', 'status', 'created_at'], name='order_reuse_idx'),
+        ),
+        migrations.RunPython(backfill_order_course, migrations.RunPython.noop),
+    ]
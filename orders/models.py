@@ -4,17 +4,26 @@ from django.db import models
 from catalog.models import Course
 
 class Order(models.Model):
-    STATUS = [("pending", "pending"), ("paid", "paid"), ("failed", "failed")]
+    STATUS = [("pending", "pending"), ("paid", "paid"), ("failed", "failed"), ("expired", "expired")]
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="orders"
     )
+    # cours principal (achat unitaire) : permet de retrouver une session ouverte sans passer par les items
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True, related_name="orders")
     total_cents = models.PositiveIntegerField()
     currency = models.CharField(max_length=10, default="eur")
     stripe_session_id = models.CharField(max_length=255, blank=True, db_index=True)
+    stripe_session_url = models.URLField(max_length=1000, blank=True)
+    stripe_session_expires_at = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS, default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "course", "status", "created_at"], name="order_reuse_idx"),
+        ]
+
     def __str__(self):
         return f"Order #{self.pk} - {self.user} - {self.status}"
 
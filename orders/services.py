@@ -0,0 +1,80 @@
+# orders/services.py
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import stripe
+from django.utils import timezone
+
+from formaflix.timing import timed
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# une session dont il reste moins que cette marge n'est plus proposée (le temps de payer)
+SESSION_REUSE_MARGIN = timedelta(minutes=10)
+# durée de vie par défaut d'une session Checkout Stripe
+SESSION_DEFAULT_TTL = timedelta(hours=24)
+
+
+def session_expiry(session) -> datetime:
+    expires_at = getattr(session, "expires_at", None)
+    if expires_at:
+        return datetime.fromtimestamp(int(expires_at), tz=dt_timezone.utc)
+    return timezone.now() + SESSION_DEFAULT_TTL
+
+
+def find_reusable_order(user, course):
+    """
+    Commande 'pending' du même utilisateur pour ce cours, dont la session Stripe est
+    encore ouverte et au même prix. Les commandes obsolètes trouvées en chemin sont expirées.
+    """
+    now = timezone.now()
+    candidates = (Order.objects
+                  .filter(user=user, course=course, status="pending",
+                          created_at__gte=now - SESSION_DEFAULT_TTL)
+                  .order_by("-created_at"))
+    for order in candidates[:5]:
+        valid = (order.stripe_session_url
+                 and order.stripe_session_expires_at
+                 and order.stripe_session_expires_at > now + SESSION_REUSE_MARGIN)
+        if valid and order.total_cents == course.price_cents and order.currency == course.currency:
+            return order
+        expire_order(order)
+    return None
+
+
+def expire_order(order: Order, close_session: bool = True) -> bool:
+    """
+    Passe une commande 'pending' en 'expired' (UPDATE conditionnel : jamais une commande payée).
+    Si sa session Stripe est peut-être encore ouverte, on la ferme pour éviter un double paiement.
+    """
+    updated = Order.objects.filter(pk=order.pk, status="pending").update(status="expired")
+    if not updated:
+        return False
+    still_open = order.stripe_session_expires_at and order.stripe_session_expires_at > timezone.now()
+    if close_session and order.stripe_session_id and still_open:
+        try:
+            with timed("stripe"):
+                stripe.checkout.Session.expire(order.stripe_session_id)
+        except stripe.error.StripeError:
+            # déjà payée / déjà expirée côté Stripe : le webhook fera foi
+            logger.warning("could not expire stripe session %s", order.stripe_session_id)
+    return True
+
+
+def expire_pending_orders(retention_days: int = 30) -> tuple[int, int]:
+    """
+    Tâche périodique :
+      - 'pending' dont la session est expirée (ou sans session depuis plus de 24 h) → 'expired' ;
+      - suppression des commandes 'expired' plus anciennes que `retention_days`.
+    Retourne (expirées, supprimées).
+    """
+    now = timezone.now()
+    expired = (Order.objects.filter(status="pending", stripe_session_expires_at__lte=now).update(status="expired")
+               + Order.objects.filter(status="pending", stripe_session_expires_at__isnull=True,
+                                      created_at__lt=now - SESSION_DEFAULT_TTL).update(status="expired"))
+    deleted = 0
+    if retention_days > 0:
+        old = Order.objects.filter(status="expired", created_at__lt=now - timedelta(days=retention_days))
+        deleted = old.delete()[1].get("orders.Order", 0)
+    return expired, deleted
@@ -0,0 +1,10 @@
+# orders/tasks.py
+from datetime import timedelta
+
+from jobs.registry import task
+from .services import expire_pending_orders as _expire_pending_orders
+
+
+@task(every=timedelta(hours=1), priority=-10)
+def expire_pending_orders():
+    _expire_pending_orders()
@@ -1,3 +1,31 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 
-# Register your models here.
+from .events import process_pending_events
+from .models import StripeEvent, StripeCoursePrice
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ("event_id", "type", "status", "attempts", "received_at", "processed_at")
+    list_filter = ("status", "type")
+    search_fields = ("event_id",)
+    readonly_fields = ("event_id", "type", "payload", "attempts", "last_error", "received_at", "processed_at",
+                       "processing_started_at")
+    actions = ["reprocess"]
+
+    @admin.action(description="Rejouer les événements sélectionnés")
+    def reprocess(self, request, queryset):
+        # déjà traités : jamais rejoués (double inscription / notification) ; en cours : laissés au worker
+        skipped = queryset.filter(status__in=("processed", "processing")).count()
+        queryset.exclude(status__in=("processed", "processing")).update(status="pending")
+        n = process_pending_events()
+        if skipped:
+            messages.warning(request, f"{skipped} événement(s) déjà traité(s) ou en cours ignoré(s).")
+        messages.success(request, f"{n} événement(s) traité(s).")
+
+
+@admin.register(StripeCoursePrice)
+class StripeCoursePriceAdmin(admin.ModelAdmin):
+    list_display = ("course", "product_id", "price_id", "unit_amount_cents", "currency", "synced_at")
+    search_fields = ("course__title", "product_id", "price_id")
+    readonly_fields = ("product_id", "price_id", "unit_amount_cents", "currency", "product_name", "synced_at")
@@ -0,0 +1,111 @@
+# payments/async_views.py
+# Variantes async (ASYNC_VIEWS, mode ASGI) : l'appel Stripe et l'attente du statut
+# ne monopolisent plus un worker.
+import json
+import logging
+
+import httpx
+import stripe
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import JsonResponse
+
+from accounts.authentication import async_jwt_required
+from catalog.models import Course
+from formaflix.throttling import athrottle
+from orders.models import Order, OrderItem
+from orders.services import find_reusable_order
+from . import stripe_async
+from .checkout import create_pending_order, line_item_for, session_params, store_session
+from .order_status import LONGPOLL_TIMEOUT, await_order_status
+
+logger = logging.getLogger(__name__)
+
+
+def _line_item_off_loop(course):
+    # thread de l'exécuteur (pas le thread sync partagé) : ses connexions ORM ne seraient
+    # jamais refermées par close_old_connections, on les ferme ici
+    try:
+        return line_item_for(course)
+    finally:
+        connections.close_all()
+
+
+async def _status_payload(order: dict) -> dict:
+    course_id = order["course_id"]
+    if course_id is None:
+        # commandes antérieures au champ Order.course
+        course_id = await (OrderItem.objects.filter(order_id=order["id"])
+                           .values_list("course_id", flat=True).afirst())
+    return {"status": order["status"], "course_id": course_id}
+
+
+@async_jwt_required(("POST",))
+async def create_checkout_session(request):
+    # même seau que la vue DRF (CheckoutThrottle)
+    throttled = await athrottle(request, "checkout", request.user.id)
+    if throttled:
+        return throttled
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"detail": "invalid json"}, status=400)
+    course_id = data.get("course_id")
+    if not course_id:
+        return JsonResponse({"detail": "course_id is required"}, status=400)
+
+    course = await Course.objects.filter(pk=course_id, is_active=True).afirst()
+    if course is None:
+        return JsonResponse({"detail": "Course not found"}, status=404)
+
+    user = request.user
+    reusable = await sync_to_async(find_reusable_order)(user, course)
+    if reusable:
+        return JsonResponse({"checkout_url": reusable.stripe_session_url})
+
+    order = await sync_to_async(create_pending_order)(user.id, course)
+    # le SDK Stripe est synchrone : synchro du Price dans un thread hors boucle (rare, mis en cache)
+    line_item = await sync_to_async(_line_item_off_loop, thread_sensitive=False)(course)
+    try:
+        session = await stripe_async.create_checkout_session(
+            **session_params(course, order, user.email, line_item)
+        )
+    except (httpx.HTTPError, stripe.error.StripeError) as e:
+        logger.warning("stripe checkout session failed for order %s: %r", order.pk, e)
+        return JsonResponse({"detail": "payment provider unavailable"}, status=502)
+    await sync_to_async(store_session)(order, session)
+    return JsonResponse({"checkout_url": session.url})
+
+
+@async_jwt_required(("GET",), stateless=True)
+async def checkout_session_status(request):
+    session_id = request.GET.get("session_id")
+    if not session_id:
+        return JsonResponse({"detail": "session_id is required"}, status=400)
+    order = await (Order.objects
+                   .filter(stripe_session_id=session_id, user_id=request.user.id)
+                   .values("id", "status", "course_id").afirst())
+    if not order:
+        return JsonResponse({"detail": "not found"}, status=404)
+    return JsonResponse(await _status_payload(order))
+
+
+@async_jwt_required(("GET",), stateless=True)
+async def checkout_session_status_wait(request):
+    session_id = request.GET.get("session_id")
+    if not session_id:
+        return JsonResponse({"detail": "session_id is required"}, status=400)
+    # chaque appel tient une connexion jusqu'à `timeout` : boucle de relance bornée
+    throttled = await athrottle(request, "checkout_status", request.user.id)
+    if throttled:
+        return throttled
+    known_status = request.GET.get("status") or "pending"
+    try:
+        timeout = float(request.GET.get("timeout") or LONGPOLL_TIMEOUT)
+    except ValueError:
+        return JsonResponse({"detail": "timeout must be a number"}, status=400)
+
+    order = await await_order_status(session_id, request.user.id, known_status, timeout)
+    if not order:
+        return JsonResponse({"detail": "not found"}, status=404)
+    return JsonResponse(await _status_payload(order))
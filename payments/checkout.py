@@ -0,0 +1,65 @@
+# payments/checkout.py
+import logging
+import os
+
+import stripe
+
+from orders.models import Order, OrderItem
+from orders.services import session_expiry
+from .stripe_catalog import sync_course_price
+
+logger = logging.getLogger(__name__)
+
+FRONTEND_BASE = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
+
+
+def create_pending_order(user_id: int, course) -> Order:
+    order = Order.objects.create(
+        user_id=user_id,
+        course=course,
+        total_cents=course.price_cents,
+        currency=course.currency,
+        status="pending",
+    )
+    OrderItem.objects.create(
+        order=order, course=course, unit_amount_cents=course.price_cents, quantity=1
+    )
+    return order
+
+
+def line_item_for(course) -> dict:
+    # Price Stripe en cache (synchro seulement si titre / montant / devise ont changé)
+    try:
+        return {"price": sync_course_price(course), "quantity": 1}
+    except stripe.error.StripeError:
+        logger.exception("stripe price sync failed for course %s", course.id)
+        return {
+            "price_data": {
+                "currency": course.currency,
+                "unit_amount": course.price_cents,
+                "product_data": {"name": course.title},
+            },
+            "quantity": 1,
+        }
+
+
+def session_params(course, order: Order, email: str | None, line_item: dict) -> dict:
+    """Paramètres de stripe.checkout.Session.create (partagés par les vues sync et async)."""
+    params = {
+        "mode": "payment",
+        "line_items": [line_item],
+        # ⬇️ redirige directement vers le lecteur du cours
+        "success_url": f"{FRONTEND_BASE}/player/{course.id}?session_id={{CHECKOUT_SESSION_ID}}",
+        "cancel_url": f"{FRONTEND_BASE}/cancel",
+        "metadata": {"order_id": str(order.id), "course_id": str(course.id)},
+    }
+    if email:
+        params["customer_email"] = email
+    return params
+
+
+def store_session(order: Order, session):
+    order.stripe_session_id = session.id
+    order.stripe_session_url = session.url or ""
+    order.stripe_session_expires_at = session_expiry(session)
+    order.save(update_fields=["stripe_session_id", "stripe_session_url", "stripe_session_expires_at"])
@@ -0,0 +1,133 @@
+# payments/events.py
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from catalog.models import Course
+from learning.models import Enrollment
+from orders.models import Order
+from .models import StripeEvent
+from .order_status import notify_order_status
+
+logger = logging.getLogger(__name__)
+
+STRIPE_EVENT_MAX_ATTEMPTS = 5
+# un handler prend quelques dizaines de ms : au-delà, le process qui l'avait pris est mort (kill, timeout)
+STRIPE_EVENT_STALE_MINUTES = 10
+
+# un seul traitement à la fois par process → les événements sont appliqués dans l'ordre de réception
+_process_lock = threading.Lock()
+
+
+def record_event(payload: dict) -> tuple[StripeEvent | None, bool]:
+    """
+    Persiste l'événement (insert unique sur event_id).
+    Retourne (event, created) ; created=False pour un rejeu Stripe déjà connu.
+    """
+    event_id = payload.get("id") or ""
+    if not event_id:
+        return None, False
+    try:
+        with transaction.atomic():
+            ev = StripeEvent.objects.create(event_id=event_id, type=payload.get("type") or "", payload=payload)
+        return ev, True
+    except IntegrityError:
+        return None, False
+
+
+def _fulfill_checkout_session(data: dict):
+    session_id = data.get("id")
+    order = (Order.objects
+             .filter(stripe_session_id=session_id)
+             .select_related("user")
+             .prefetch_related("items")
+             .first())
+    if not order or order.status == "paid":
+        return
+
+    with transaction.atomic():
+        order.status = "paid"
+        order.save(update_fields=["status"])
+        # toutes les lignes de la commande (multi-cours), metadata.course_id en secours
+        course_ids = {item.course_id for item in order.items.all()}
+        if not course_ids:
+            course_id = (data.get("metadata") or {}).get("course_id")
+            if course_id and Course.objects.filter(id=course_id).exists():
+                course_ids = {int(course_id)}
+        for course_id in course_ids:
+            Enrollment.objects.get_or_create(user=order.user, course_id=course_id)
+        notify_order_status(session_id, "paid")
+
+
+def _expire_checkout_session(data: dict):
+    # session abandonnée côté Stripe : la commande ne doit plus être proposée à la réutilisation
+    session_id = data.get("id")
+    if session_id and Order.objects.filter(stripe_session_id=session_id, status="pending").update(status="expired"):
+        notify_order_status(session_id, "expired")
+
+
+HANDLERS = {
+    "checkout.session.completed": _fulfill_checkout_session,
+    "checkout.session.expired": _expire_checkout_session,
+}
+
+
+def process_event(ev: StripeEvent):
+    handler = HANDLERS.get(ev.type)
+    if handler:
+        handler((ev.payload.get("data") or {}).get("object") or {})
+
+
+def _claim(ev_id: int) -> bool:
+    return StripeEvent.objects.filter(pk=ev_id, status="pending").update(
+        status="processing", attempts=F("attempts") + 1, processing_started_at=timezone.now()
+    ) == 1
+
+
+def requeue_stale_events() -> int:
+    """
+    Remet en 'pending' les événements restés 'processing' (worker tué en plein handler),
+    ou 'failed' s'ils ont épuisé leurs tentatives. Sans date de début (lignes antérieures) = périmé.
+    """
+    cutoff = timezone.now() - timedelta(minutes=STRIPE_EVENT_STALE_MINUTES)
+    stale = (StripeEvent.objects.filter(status="processing")
+             .filter(Q(processing_started_at__lt=cutoff) | Q(processing_started_at__isnull=True)))
+    failed = stale.filter(attempts__gte=STRIPE_EVENT_MAX_ATTEMPTS).update(
+        status="failed", last_error="traitement interrompu (worker arrêté)"
+    )
+    requeued = stale.filter(attempts__lt=STRIPE_EVENT_MAX_ATTEMPTS).update(status="pending")
+    if failed or requeued:
+        logger.warning("stripe events: %s requeued, %s failed after an interrupted run", requeued, failed)
+    return requeued
+
+
+def process_pending_events(limit: int = 100) -> int:
+    """
+    Traite les événements en attente, dans l'ordre de réception.
+    Un échec repasse en 'pending' (nouvelle tentative au prochain passage) jusqu'à
+    STRIPE_EVENT_MAX_ATTEMPTS, puis 'failed'. Les 'processing' périmés sont d'abord repris.
+    """
+    done = 0
+    with _process_lock:
+        requeue_stale_events()
+        for ev_id in StripeEvent.objects.filter(status="pending").values_list("pk", flat=True)[:limit]:
+            if not _claim(ev_id):
+                continue
+            ev = StripeEvent.objects.get(pk=ev_id)
+            try:
+                process_event(ev)
+            except Exception as e:
+                logger.exception("stripe event %s failed", ev.event_id)
+                retry = ev.attempts < STRIPE_EVENT_MAX_ATTEMPTS
+                StripeEvent.objects.filter(pk=ev_id).update(
+                    status="pending" if retry else "failed", last_error=str(e)[:2000]
+                )
+                # on s'arrête là : les événements suivants attendront pour garder l'ordre
+                break
+            StripeEvent.objects.filter(pk=ev_id).update(status="processed", processed_at=timezone.now(), last_error="")
+            done += 1
+    return done
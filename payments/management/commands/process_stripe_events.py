@@ -0,0 +1,23 @@
+# payments/management/commands/process_stripe_events.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.events import process_pending_events
+
+
+class Command(BaseCommand):
+    help = "Traite les événements Stripe en attente (dans l'ordre de réception)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu.")
+        parser.add_argument("--interval", type=float, default=2.0)
+
+    def handle(self, *args, **opts):
+        while True:
+            n = process_pending_events()
+            if n:
+                self.stdout.write(self.style.SUCCESS(f"{n} événement(s) traité(s)"))
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
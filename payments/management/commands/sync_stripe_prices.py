@@ -0,0 +1,24 @@
+# payments/management/commands/sync_stripe_prices.py
+from django.core.management.base import BaseCommand
+
+from catalog.models import Course
+from payments.stripe_catalog import sync_course_price
+
+
+class Command(BaseCommand):
+    help = "Synchronise Product / Price Stripe pour tout le catalogue (seuls les cours modifiés appellent Stripe)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--include-inactive", action="store_true")
+
+    def handle(self, *args, **opts):
+        qs = Course.objects.all() if opts["include_inactive"] else Course.objects.filter(is_active=True)
+        ok = failed = 0
+        for course in qs.select_related("stripe_price").iterator(chunk_size=200):
+            try:
+                sync_course_price(course)
+                ok += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"[{course}] échec: {e}")
+        self.stdout.write(self.style.SUCCESS(f"{ok} cours synchronisé(s), {failed} échec(s)"))
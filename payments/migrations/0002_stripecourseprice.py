@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_course_trailer_cf_playback_id_and_more'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeCoursePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.CharField(blank=True, max_length=255)),
+                ('price_id', models.CharField(blank=True, max_length=255)),
+                ('unit_amount_cents', models.PositiveIntegerField(default=0)),
+                ('currency', models.CharField(blank=True, max_length=10)),
+                ('product_name', models.CharField(blank=True, max_length=200)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stripe_price', to='catalog.course')),
+            ],
+        ),
+    ]
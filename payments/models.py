@@ -1,3 +1,46 @@
+# payments/models.py
 from django.db import models
 
-# Create your models here.
+
+class StripeEvent(models.Model):
+    """Événements webhook Stripe, dédupliqués par id (Stripe rejoue les événements non acquittés)."""
+    STATUS = [("pending", "pending"), ("processing", "processing"),
+              ("processed", "processed"), ("failed", "failed")]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS, default="pending", db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # début du traitement en cours : un 'processing' trop ancien = worker mort (cf. requeue_stale_events)
+    processing_started_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["received_at", "id"]
+
+    def __str__(self):
+        return f"{self.type} {self.event_id} [{self.status}]"
+
+
+class StripeCoursePrice(models.Model):
+    """Product / Price Stripe d'un cours (évite un price_data ad hoc à chaque checkout)."""
+    course = models.OneToOneField("catalog.Course", on_delete=models.CASCADE, related_name="stripe_price")
+    product_id = models.CharField(max_length=255, blank=True)
+    price_id = models.CharField(max_length=255, blank=True)
+    # valeurs envoyées à Stripe lors de la dernière synchro
+    unit_amount_cents = models.PositiveIntegerField(default=0)
+    currency = models.CharField(max_length=10, blank=True)
+    product_name = models.CharField(max_length=200, blank=True)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.course} → {self.price_id}"
+
+    def is_stale(self, course) -> bool:
+        return (not self.price_id
+                or self.unit_amount_cents != course.price_cents
+                or self.currency != course.currency
+                or self.product_name != course.title)
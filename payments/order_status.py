@@ -0,0 +1,171 @@
+# payments/order_status.py
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+
+from orders.models import Order
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "order_status"
+# < 30 s : limite du routeur HTTP devant gunicorn
+LONGPOLL_TIMEOUT = float(os.getenv("ORDER_STATUS_LONGPOLL_TIMEOUT", "25"))
+LONGPOLL_MAX_TIMEOUT = 28.0
+# LISTEN/NOTIFY Postgres ; désactivable (pooler en mode transaction, autre SGBD…)
+LISTEN_ENABLED = os.getenv("ORDER_STATUS_LISTEN", "1") == "1"
+
+# repli sans notification : on relit la commande avec un intervalle croissant
+POLL_INITIAL = 0.25
+POLL_MAX = 4.0
+# même avec LISTEN actif, relecture de sécurité (notification perdue, reconnexion…)
+POLL_MAX_LISTENING = 5.0
+
+
+def notify_order_status(session_id: str, status: str):
+    """
+    Réveille les long-polls en attente sur cette session (après commit de la transaction).
+    Sans Postgres, no-op : les attentes retombent sur la relecture périodique.
+    """
+    if not session_id or connection.vendor != "postgresql":
+        return
+    payload = json.dumps({"session_id": session_id, "status": status})
+
+    def _send():
+        try:
+            with connection.cursor() as cur:
+                cur.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+        except Exception:
+            logger.warning("pg_notify failed for session %s", session_id)
+
+    transaction.on_commit(_send)
+
+
+class _Listener:
+    """
+    Un seul thread LISTEN par process, sur une connexion psycopg dédiée (autocommit).
+    Les requêtes en attente s'enregistrent par session_id et sont réveillées via un Event.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: dict[str, set[threading.Event]] = {}
+        self._thread = None
+        self.connected = False
+
+    def ensure_started(self) -> bool:
+        if not LISTEN_ENABLED or connection.vendor != "postgresql":
+            return False
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="order-status-listen", daemon=True)
+                self._thread.start()
+        return self.connected
+
+    def register(self, session_id: str) -> threading.Event:
+        ev = threading.Event()
+        with self._lock:
+            self._waiters.setdefault(session_id, set()).add(ev)
+        return ev
+
+    def unregister(self, session_id: str, ev: threading.Event):
+        with self._lock:
+            events = self._waiters.get(session_id)
+            if events:
+                events.discard(ev)
+                if not events:
+                    del self._waiters[session_id]
+
+    def _wake(self, session_id: str):
+        with self._lock:
+            for ev in self._waiters.get(session_id, ()):
+                ev.set()
+
+    def _conninfo(self) -> str:
+        from psycopg.conninfo import make_conninfo
+
+        db = connection.settings_dict
+        params = {
+            "dbname": db.get("NAME") or None,
+            "user": db.get("USER") or None,
+            "password": db.get("PASSWORD") or None,
+            "host": db.get("HOST") or None,
+            "port": str(db.get("PORT") or "") or None,
+        }
+        params.update({k: v for k, v in (db.get("OPTIONS") or {}).items() if k in ("sslmode", "sslrootcert")})
+        return make_conninfo(**{k: v for k, v in params.items() if v is not None})
+
+    def _run(self):
+        import psycopg
+
+        backoff = 1.0
+        while True:
+            try:
+                with psycopg.connect(self._conninfo(), autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    self.connected = True
+                    backoff = 1.0
+                    while True:
+                        for notify in conn.notifies(timeout=30):
+                            try:
+                                session_id = json.loads(notify.payload).get("session_id")
+                            except ValueError:
+                                continue
+                            if session_id:
+                                self._wake(session_id)
+                        # timeout sans notification : simple keepalive
+                        conn.execute("SELECT 1")
+            except Exception:
+                logger.warning("order status listener disconnected, retrying in %.0fs", backoff)
+            self.connected = False
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+
+listener = _Listener()
+
+
+def _order_snapshot(session_id: str, user_id: int):
+    return (Order.objects
+            .filter(stripe_session_id=session_id, user_id=user_id)
+            .values("id", "status", "course_id")
+            .first())
+
+
+async def await_order_status(session_id: str, user_id: int, known_status: str = "pending",
+                             timeout: float = LONGPOLL_TIMEOUT) -> dict | None:
+    """
+    Long-poll (mode ASGI uniquement, cf. formaflix/urls.py) : l'attente ne bloque aucun thread.
+    Le réveil NOTIFY est vu en testant l'Event entre deux pas courts ; la base n'est relue
+    qu'au réveil ou selon le backoff.
+    """
+    snapshot = sync_to_async(_order_snapshot)
+    timeout = max(0.0, min(timeout, LONGPOLL_MAX_TIMEOUT))
+    deadline = time.monotonic() + timeout
+    order = await snapshot(session_id, user_id)
+    if not order or order["status"] != known_status or timeout == 0:
+        return order
+
+    listening = await sync_to_async(listener.ensure_started)()
+    ev = listener.register(session_id)
+    interval = POLL_INITIAL
+    try:
+        while True:
+            next_read = time.monotonic() + (POLL_MAX_LISTENING if listening else interval)
+            while not ev.is_set() and time.monotonic() < min(next_read, deadline):
+                await asyncio.sleep(0.1)
+            if time.monotonic() >= deadline and not ev.is_set():
+                return order
+            ev.clear()
+            order = await snapshot(session_id, user_id) or order
+            if order["status"] != known_status:
+                return order
+            interval = min(interval * 2, POLL_MAX)
+            listening = listener.connected
+    finally:
+        listener.unregister(session_id, ev)
@@ -0,0 +1,60 @@
+# payments/stripe_async.py
+import os
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+import httpx
+import stripe
+
+from formaflix.timing import timed
+
+STRIPE_API_BASE = "https://api.stripe.com/v1"
+
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    # un client (pool de connexions keep-alive) par process, créé dans la boucle du worker uvicorn
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(base_url=STRIPE_API_BASE, timeout=httpx.Timeout(10.0, connect=5.0))
+    return _client
+
+
+def _form_encode(value, prefix: str = "") -> list[tuple[str, str]]:
+    """Encodage « form » de l'API Stripe : a[b][0][c]=v."""
+    items = []
+    if isinstance(value, dict):
+        for k, v in value.items():
+            items += _form_encode(v, f"{prefix}[{k}]" if prefix else str(k))
+    elif isinstance(value, (list, tuple)):
+        for i, v in enumerate(value):
+            items += _form_encode(v, f"{prefix}[{i}]")
+    elif isinstance(value, bool):
+        items.append((prefix, "true" if value else "false"))
+    elif value is not None:
+        items.append((prefix, str(value)))
+    return items
+
+
+async def create_checkout_session(**params) -> SimpleNamespace:
+    """
+    POST /v1/checkout/sessions sans bloquer la boucle d'événements.
+    Même clé et même version d'API que le SDK (stripe.api_key, sinon STRIPE_SECRET_KEY ;
+    stripe.api_version) ; lève stripe.error.APIError sur une réponse d'erreur.
+    """
+    headers = {"Authorization": f"Bearer {stripe.api_key or os.getenv('STRIPE_SECRET_KEY', '')}",
+               "Content-Type": "application/x-www-form-urlencoded"}
+    if stripe.api_version is not None:
+        # sinon version par défaut du compte, comme le SDK : réponses de même forme
+        headers["Stripe-Version"] = stripe.api_version
+    with timed("stripe"):
+        r = await _get_client().post(
+            "/checkout/sessions", content=urlencode(_form_encode(params)), headers=headers,
+        )
+    body = r.json()
+    if r.status_code >= 400:
+        err = body.get("error") or {}
+        raise stripe.error.APIError(err.get("message") or f"Stripe HTTP {r.status_code}",
+                                    http_status=r.status_code, json_body=body)
+    return SimpleNamespace(id=body["id"], url=body.get("url"), expires_at=body.get("expires_at"))
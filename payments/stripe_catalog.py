@@ -0,0 +1,63 @@
+# payments/stripe_catalog.py
+import os
+
+import stripe
+
+from catalog.models import Course
+from formaflix.timing import timed
+from .models import StripeCoursePrice
+
+stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
+
+
+def sync_course_price(course: Course) -> str:
+    """
+    Garantit un Product + Price Stripe à jour pour le cours et retourne le price id.
+    Aucun appel Stripe si le cache est à jour (titre, montant, devise inchangés).
+    Les clés d'idempotence évitent les doublons si deux checkouts synchronisent en même temps ;
+    celle du Price inclut le Price remplacé (A → B → A crée un nouveau Price, pas le A archivé).
+    """
+    try:
+        link = course.stripe_price
+    except StripeCoursePrice.DoesNotExist:
+        link, _ = StripeCoursePrice.objects.get_or_create(course=course)
+    if not link.is_stale(course):
+        return link.price_id
+
+    with timed("stripe"):
+        if not link.product_id:
+            product = stripe.Product.create(
+                name=course.title,
+                metadata={"course_id": str(course.id)},
+                idempotency_key=f"course-{course.id}-product",
+            )
+            link.product_id = product.id
+        elif link.product_name != course.title:
+            stripe.Product.modify(link.product_id, name=course.title)
+
+        # un Price Stripe est immuable : nouveau montant / devise → nouveau Price, l'ancien est archivé
+        if not link.price_id or link.unit_amount_cents != course.price_cents or link.currency != course.currency:
+            price = stripe.Price.create(
+                product=link.product_id,
+                unit_amount=course.price_cents,
+                currency=course.currency,
+                metadata={"course_id": str(course.id)},
+                idempotency_key=(f"course-{course.id}-price-{course.price_cents}-{course.currency}"
+                                 f"-after-{link.price_id or 'none'}"),
+            )
+            if not price.active:
+                # réponse rejouée d'un Price archivé depuis (clé réutilisée dans les 24 h)
+                stripe.Price.modify(price.id, active=True)
+            if link.price_id and link.price_id != price.id:
+                stripe.Price.modify(link.price_id, active=False)
+            link.price_id = price.id
+
+    link.unit_amount_cents = course.price_cents
+    link.currency = course.currency
+    link.product_name = course.title
+    link.save()
+    return link.price_id
+
+
+def sync_course_price_by_id(course_id: int) -> str:
+    return sync_course_price(Course.objects.get(pk=course_id))
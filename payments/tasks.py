@@ -0,0 +1,17 @@
+# payments/tasks.py
+from datetime import timedelta
+
+from jobs.registry import task
+from .events import process_pending_events
+from .stripe_catalog import sync_course_price_by_id
+
+
+@task(every=timedelta(minutes=1), priority=10)
+def process_stripe_events():
+    # priorité haute : l'accès au cours en dépend ; périodique en filet de sécurité
+    process_pending_events()
+
+
+@task(unique=True)
+def sync_course_price(course_id: int):
+    sync_course_price_by_id(course_id)
@@ -1,17 +1,27 @@
 # payments/views.py
 import os, stripe
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from accounts.authentication import StatelessJWTAuthentication
 from catalog.models import Course
+from formaflix.throttling import TokenBucketThrottle
+from formaflix.timing import timed
 from orders.models import Order, OrderItem
+from orders.services import find_reusable_order
+from .checkout import create_pending_order, line_item_for, session_params, store_session
 
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
-FRONTEND_BASE = os.getenv("FRONTEND_BASE_URL", "http://localhost:5173")
+
+
+class CheckoutThrottle(TokenBucketThrottle):
+    scope = "checkout"
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@throttle_classes([CheckoutThrottle])
 def create_checkout_session(request):
     course_id = request.data.get("course_id")
     if not course_id:
@@ -22,40 +32,32 @@ def create_checkout_session(request):
     except Course.DoesNotExist:
         return Response({"detail": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    order = Order.objects.create(
-        user=request.user,
-        total_cents=course.price_cents,
-        currency=course.currency,
-        status="pending",
-    )
-    OrderItem.objects.create(
-        order=order, course=course, unit_amount_cents=course.price_cents, quantity=1
-    )
-
-    session = stripe.checkout.Session.create(
-        mode="payment",
-        line_items=[{
-            "price_data": {
-                "currency": course.currency,
-                "unit_amount": course.price_cents,
-                "product_data": {"name": course.title},
-            },
-            "quantity": 1,
-        }],
-        # ⬇️ redirige directement vers le lecteur du cours
-        success_url=f"{FRONTEND_BASE}/player/{course.id}?session_id={{CHECKOUT_SESSION_ID}}",
-        cancel_url=f"{FRONTEND_BASE}/cancel",
-        customer_email=getattr(request.user, "email", None),
-        metadata={"order_id": str(order.id), "course_id": str(course.id)},
-    )
-    order.stripe_session_id = session.id
-    order.save(update_fields=["stripe_session_id"])
+    # session déjà ouverte pour ce cours (double clic, retour arrière) → même URL, pas de nouvel appel Stripe
+    reusable = find_reusable_order(request.user, course)
+    if reusable:
+        return Response({"checkout_url": reusable.stripe_session_url}, status=status.HTTP_200_OK)
+
+    order = create_pending_order(request.user.id, course)
+    with timed("stripe"):
+        session = stripe.checkout.Session.create(
+            **session_params(course, order, getattr(request.user, "email", None), line_item_for(course))
+        )
+    store_session(order, session)
 
     return Response({"checkout_url": session.url}, status=status.HTTP_200_OK)
 
 
 
+def _status_payload(order: dict) -> dict:
+    course_id = order["course_id"]
+    if course_id is None:
+        # commandes antérieures au champ Order.course
+        course_id = OrderItem.objects.filter(order_id=order["id"]).values_list("course_id", flat=True).first()
+    return {"status": order["status"], "course_id": course_id}
+
+
 @api_view(["GET"])
+@authentication_classes([StatelessJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def checkout_session_status(request):
     session_id = request.query_params.get("session_id")
@@ -63,11 +65,9 @@ def checkout_session_status(request):
         return Response({"detail": "session_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
     order = (Order.objects
-             .filter(stripe_session_id=session_id, user=request.user)
-             .prefetch_related("items__course").first())
+             .filter(stripe_session_id=session_id, user_id=request.user.id)
+             .values("id", "status", "course_id").first())
     if not order:
         return Response({"detail": "not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    item = order.items.first()
-    course_id = item.course_id if item else None
-    return Response({"status": order.status, "course_id": course_id})
\ No newline at end of file
+    return Response(_status_payload(order))
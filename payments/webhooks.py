@@ -1,10 +1,11 @@
 # payments/webhooks.py
+import json
 import os, stripe
 from django.views.decorators.csrf import csrf_exempt
 from django.http import HttpResponse
-from orders.models import Order
-from learning.models import Enrollment
-from catalog.models import Course
+
+from .events import record_event
+from .tasks import process_stripe_events
 
 @csrf_exempt
 def stripe_webhook(request):
@@ -13,23 +14,13 @@ def stripe_webhook(request):
     endpoint_secret = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 
     try:
-        event = stripe.Webhook.construct_event(payload, sig_header, endpoint_secret)
+        stripe.Webhook.construct_event(payload, sig_header, endpoint_secret)
     except (ValueError, stripe.error.SignatureVerificationError):
         return HttpResponse(status=400)
 
-    if event.get("type") == "checkout.session.completed":
-        data = event["data"]["object"]
-        session_id = data.get("id")
-        order = Order.objects.filter(stripe_session_id=session_id).first()
-        if order and order.status != "paid":
-            order.status = "paid"
-            order.save(update_fields=["status"])
-            course_id = (data.get("metadata") or {}).get("course_id")
-            if course_id:
-                try:
-                    course = Course.objects.get(id=course_id)
-                    Enrollment.objects.get_or_create(user=order.user, course=course)
-                except Course.DoesNotExist:
-                    pass
+    # Acquittement dès que l'événement est persisté ; un rejeu (même id) ne refait rien
+    _, created = record_event(json.loads(payload))
+    if created:
+        process_stripe_events.enqueue()
 
-    return HttpResponse(status=200)
\ No newline at end of file
+    return HttpResponse(status=200)
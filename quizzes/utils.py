@@ -0,0 +1,34 @@
+from learning.models import DocumentDownload, Enrollment
+from learning.services.document_downloads import last_download_at
+from .models import Submission
+
+RETAKE_PROGRESS_DELTA = 10  # exiger +10 points de progression vs dernier échec
+
+
+def retake_block(enrollment, quiz, current_percent: int) -> dict | None:
+    """
+    Si la DERNIÈRE soumission est un échec, exige soit +RETAKE_PROGRESS_DELTA points de progression
+    depuis cet échec, soit un téléchargement de document après l'échec.
+    Retourne None si le quiz est ouvert, sinon le détail du blocage.
+    """
+    last_sub = (Submission.objects.filter(user_id=enrollment.user_id, quiz=quiz)
+                .order_by("-submitted_at").first())
+    if not last_sub or last_sub.passed:
+        return None
+    # a) a-t-il téléchargé un doc après l'échec ? (marqueur en cache : clic pas encore écrit par lot ;
+    #    last_document_download_at : écrit au flush, doublons compris, relu en base car `enrollment`
+    #    peut venir d'un cache)
+    last_click = last_download_at(enrollment.id)
+    since = last_sub.submitted_at
+    has_download_after_fail = bool(last_click and last_click > since) or \
+        DocumentDownload.objects.filter(enrollment=enrollment, downloaded_at__gt=since).exists() or \
+        Enrollment.objects.filter(pk=enrollment.id, last_document_download_at__gt=since).exists()
+    # b) a-t-il augmenté sa progression ?
+    needed = min(100, last_sub.progress_percent + RETAKE_PROGRESS_DELTA)
+    if has_download_after_fail or current_percent >= needed:
+        return None
+    return {
+        "needed_progress_at_least": needed,
+        "your_current_progress": current_percent,
+        "since_failed_at": last_sub.submitted_at,
+    }
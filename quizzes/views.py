@@ -6,9 +6,8 @@ from django.shortcuts import get_object_or_404
 from learning.utils import compute_enrollment_percent
 from .models import Quiz, Question, Choice, Submission
 from .serializers import QuizDetailSerializer, QuizSubmitSerializer, SubmissionSerializer
-from learning.models import Enrollment, DocumentDownload
-
-RETAKE_PROGRESS_DELTA = 10  # exiger +10 points de progression vs dernier échec
+from learning.models import Enrollment
+from .utils import retake_block
 
 class QuizDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -30,27 +29,15 @@ class QuizSubmitView(APIView):
         ser = QuizSubmitSerializer(data=request.data); ser.is_valid(raise_exception=True)
         answers = ser.validated_data["answers"]
 
-        # 🔒 Blocage re-take: si la DERNIÈRE soumission est un échec,
-        # exiger soit +10 points de progression depuis cet échec, soit un téléchargement de document après l’échec.
-        last_sub = Submission.objects.filter(user=request.user, quiz=quiz).order_by("-submitted_at").first()
+        # 🔒 Blocage re-take après un échec (voir retake_block)
         current_percent = compute_enrollment_percent(enrollment)
-
-        if last_sub and not last_sub.passed:
-            # a) a-t-il téléchargé un doc après l'échec ?
-            has_download_after_fail = DocumentDownload.objects.filter(
-                enrollment=enrollment, downloaded_at__gt=last_sub.submitted_at
-            ).exists()
-            # b) a-t-il augmenté sa progression ?
-            has_progress_increase = current_percent >= min(100, last_sub.progress_percent + RETAKE_PROGRESS_DELTA)
-
-            if not (has_download_after_fail or has_progress_increase):
-                return Response({
-                    "detail": "Retake blocked",
-                    "reason": "Please rewatch the course (increase your progress) or download a document before retrying the quiz.",
-                    "needed_progress_at_least": min(100, last_sub.progress_percent + RETAKE_PROGRESS_DELTA),
-                    "your_current_progress": current_percent,
-                    "since_failed_at": last_sub.submitted_at,
-                }, status=409)
+        blocked = retake_block(enrollment, quiz, current_percent)
+        if blocked:
+            return Response({
+                "detail": "Retake blocked",
+                "reason": "Please rewatch the course (increase your progress) or download a document before retrying the quiz.",
+                **blocked,
+            }, status=409)
 
         # Corriger / noter
         total = quiz.questions.count() or 1